@@ -0,0 +1,94 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ReadingPlan import ReadingPlan
+from Tokenizer import Tokenizer, CHUNK_SIZE
+from TokenStore import TokenStore
+
+# steps the progress of tokenizing a text is reported in, the last of them being planning it
+PROGRESS_STEPS = 100
+
+
+class DocumentLoader(QThread):
+    loaded = pyqtSignal(object, object)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, documents, document_id=None, text=None, options=(True, True, 1, 0, False)):
+        """
+        Implements QThread to open the document the user was last reading, or tokenize a pasted text, and plan it, off
+        of the gui thread, so that the window can be shown and stays responsive before the text is ready. Emits loaded
+        with the words and their plan, or with None for both if there was nothing to open, and progress while
+        tokenizing. Nothing is emitted once stopped.
+        :param DocumentStore documents: The program's document store
+        :param str document_id: ID of the document to open
+        :param str text: Text to tokenize instead, such as a pasted text
+        :param tuple options: The reading plan's options, as in ReadingPlan.options()
+        """
+        self.documents = documents
+        self.document_id = document_id
+        self.text = text
+        self.options = options
+        self.keep_running = True
+
+        super().__init__()
+
+    def run(self):
+        """
+        Opens or tokenizes the text and builds its reading plan
+        :return:
+        """
+        token_store = None
+        if self.document_id:
+            token_store = self.documents.load(self.document_id)
+            if token_store is None:
+                self.document_id = None
+
+        if token_store is None and self.text:
+            token_store = self.tokenize()
+            if token_store is not None and len(token_store) == 0:
+                token_store = None
+        if not self.keep_running:
+            return
+
+        if token_store is None:
+            self.loaded.emit(None, None)
+            return
+
+        if self.document_id:
+            plan = self.documents.load_plan(self.document_id, token_store, self.options)
+        else:
+            plan = ReadingPlan()
+            plan.set_options(*self.options)
+            plan.set_words(token_store)
+        if self.keep_running:
+            self.loaded.emit(token_store, plan)
+
+    def tokenize(self):
+        """
+        Method to tokenize the text a chunk at a time, reporting progress as it goes. The text is let go of once it
+        has been tokenized.
+        :return: The words, or None if stopped
+        """
+        token_store = TokenStore()
+        token_store.mark_chapter()
+        tokenizer = Tokenizer(token_store)
+        text = self.text
+        self.text = None
+
+        step = 0
+        for start in range(0, len(text), CHUNK_SIZE):
+            if not self.keep_running:
+                return None
+            tokenizer.feed(text[start:start + CHUNK_SIZE])
+            done = (start + CHUNK_SIZE) * (PROGRESS_STEPS - 1) // len(text)
+            if done > step:
+                step = done
+                self.progress.emit(min(step, PROGRESS_STEPS - 1), PROGRESS_STEPS)
+        tokenizer.close()
+        return token_store
+
+    def stop(self):
+        """
+        Convenience method to set self.keep_running to False, cancelling the load
+        :return:
+        """
+        self.keep_running = False
@@ -0,0 +1,494 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from os.path import exists
+
+from ReadingPlan import ReadingPlan, PLAN_VERSION
+from SearchIndex import SearchIndex, SEARCH_INDEX_VERSION
+from TokenStore import TokenStore
+from Tokenizer import TOKENIZER_VERSION
+
+# magic, format version, number of words, length of the text buffer, number of sentence starts, number of chapter
+# starts, CRC-32 of everything after the header, checked by verify(). The header is a multiple of 4 bytes long so that
+# the tables after it stay aligned for memoryview.cast().
+HEADER = struct.Struct('<4sHxxIIIII')
+MAGIC = b'SRDC'
+FORMAT_VERSION = 2
+# magic, plan version, number of frames, CRC-32 of the frame tables
+PLAN_HEADER = struct.Struct('<4sHxxII')
+PLAN_MAGIC = b'SRPL'
+# magic, search index version, number of words indexed, number of terms, length of the terms, number of positions,
+# CRC-32 of everything after the header
+SEARCH_INDEX_HEADER = struct.Struct('<4sHxxIIIII')
+SEARCH_INDEX_MAGIC = b'SRSI'
+# total size the stored documents may take up before the least recently opened ones are removed
+CACHE_SIZE_LIMIT = 512 * 1024 * 1024
+
+
+class DocumentStore:
+    def __init__(self, data_dir):
+        """
+        Keeps tokenized documents on disk, separately from the user's settings. Each document is stored once, under an
+        ID derived from its contents, as its offset table, sentence and chapter tables, and text buffer laid out as
+        they are held in memory. Documents are opened by memory-mapping the file, so opening one takes the same few
+        milliseconds whatever its size. The reading plans made for a document are kept alongside it, one file for each
+        set of reading options, so a long book needn't be planned again each time it is opened, and so is its search
+        index. The store also remembers which document each imported file produced, keyed by the file's hash and the
+        tokenizer version, so importing the same file again can skip straight to the result.
+        :param str data_dir: The program's data directory
+        """
+        self.documents_dir = data_dir + '/documents'
+        self.sources_file = self.documents_dir + '/sources.json'
+        if not exists(self.documents_dir):
+            os.mkdir(self.documents_dir)
+
+    def document_path(self, document_id):
+        """
+        Method to get the path of a document's file
+        :param str document_id: ID of the document
+        :return: Path to the document's file
+        """
+        return self.documents_dir + '/' + document_id + '.srd'
+
+    def save(self, token_store):
+        """
+        Method to add a document to the store. A document that is already stored is not written again, only marked as
+        just opened.
+        :param TokenStore token_store: The words of the document
+        :return: ID of the document
+        """
+        document_id = hashlib.sha1(token_store.buffer).hexdigest()
+        path = self.document_path(document_id)
+        if exists(path):
+            os.utime(path)
+            return document_id
+
+        tables = []
+        for table in (token_store.offsets, token_store.sentences, token_store.chapters):
+            table = array('I', table)
+            if sys.byteorder == 'big':
+                table.byteswap()
+            tables.append(table.tobytes())
+
+        checksum = 0
+        for part in tables + [token_store.buffer]:
+            checksum = zlib.crc32(part, checksum)
+
+        # written under a temporary name first so that an interrupted save never leaves a partial document behind
+        with open(path + '.tmp', 'wb') as file:
+            file.write(HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                len(token_store),
+                len(token_store.buffer),
+                len(token_store.sentences),
+                len(token_store.chapters),
+                checksum
+            ))
+            for part in tables:
+                file.write(part)
+            file.write(token_store.buffer)
+        os.replace(path + '.tmp', path)
+        return document_id
+
+    def load(self, document_id):
+        """
+        Method to open a document from the store by memory-mapping its file. The returned store reads its words
+        straight from the mapped file, so nothing but the file's pages that are actually read is brought into memory.
+        Only the header and the ends of the tables are checked, as checking the whole file would read every page of
+        it; a document whose sizes don't add up is removed from the store.
+        :param str document_id: ID of the document
+        :return: The document's words, or None if the document is missing or damaged
+        """
+        path = self.document_path(document_id)
+        if not exists(path):
+            return None
+
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                mapped = None
+            else:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        token_store = self.map_tables(mapped) if mapped else None
+        if token_store is None:
+            if mapped:
+                mapped.close()
+            self.remove(document_id)
+            return None
+
+        os.utime(path)
+        return token_store
+
+    def plan_path(self, document_id, options):
+        """
+        Method to get the path of the file a document's plan with a set of reading options is kept in
+        :param str document_id: ID of the document
+        :param tuple options: The plan's options, from ReadingPlan.options()
+        :return: Path to the plan's file
+        """
+        return self.documents_dir + '/' + document_id + '.' + '-'.join(str(int(option)) for option in options) + '.srp'
+
+    def load_plan(self, document_id, token_store, options):
+        """
+        Method to get the reading plan of a stored document. A plan made before with the same options is read back
+        from its file, which is much quicker than planning a long book again; otherwise the document is planned and
+        the plan kept for next time.
+        :param str document_id: ID of the document
+        :param TokenStore token_store: The document's words, from load()
+        :param tuple options: The reading options, as in ReadingPlan.options()
+        :return: The plan
+        """
+        plan = self.stored_plan(document_id, token_store, options)
+        if plan is None:
+            plan = ReadingPlan()
+            plan.set_options(*options)
+            plan.set_words(token_store)
+            self.save_plan(document_id, plan)
+        return plan
+
+    def stored_plan(self, document_id, token_store, options):
+        """
+        Method to read back the plan made before for a stored document with a set of reading options
+        :param str document_id: ID of the document
+        :param TokenStore token_store: The document's words, from load()
+        :param tuple options: The reading options, as in ReadingPlan.options()
+        :return: The plan, or None if there isn't a valid one for the current version
+        """
+        path = self.plan_path(document_id, options)
+        if not exists(path):
+            return None
+        with open(path, 'rb') as file:
+            frames = self.read_plan(file.read())
+        if not frames or len(frames[0]) == 0 or frames[0][-1] + frames[1][-1] != len(token_store):
+            return None
+
+        plan = ReadingPlan()
+        plan.set_options(*options)
+        plan.set_frames(token_store, frames)
+        return plan
+
+    def save_plan(self, document_id, plan):
+        """
+        Method to keep a stored document's plan for next time
+        :param str document_id: ID of the document
+        :param ReadingPlan plan: The plan, made from the first word with the options it has now
+        :return:
+        """
+        tables = []
+        for table in plan.frames:
+            if sys.byteorder == 'big':
+                table = array(table.typecode, table)
+                table.byteswap()
+            tables.append(table.tobytes())
+
+        checksum = 0
+        for part in tables:
+            checksum = zlib.crc32(part, checksum)
+
+        path = self.plan_path(document_id, plan.options())
+        with open(path + '.tmp', 'wb') as file:
+            file.write(PLAN_HEADER.pack(PLAN_MAGIC, PLAN_VERSION, len(plan), checksum))
+            for part in tables:
+                file.write(part)
+        os.replace(path + '.tmp', path)
+
+    def read_plan(self, data):
+        """
+        Method to check the contents of a plan file and turn them back into frame tables
+        :param bytes data: Contents of the file
+        :return: Tuple of the frames' first words, word counts and weights, or None if the file is not a valid plan
+            for the current version
+        """
+        if len(data) < PLAN_HEADER.size:
+            return None
+        magic, version, num_frames, checksum = PLAN_HEADER.unpack_from(data, 0)
+        if magic != PLAN_MAGIC or version != PLAN_VERSION or len(data) != PLAN_HEADER.size + num_frames * 9:
+            return None
+
+        view = memoryview(data)[PLAN_HEADER.size:]
+        if zlib.crc32(view) != checksum:
+            return None
+
+        frames = []
+        position = 0
+        for typecode in ('I', 'B', 'f'):
+            table = array(typecode)
+            size = num_frames * table.itemsize
+            table.frombytes(view[position:position + size])
+            if sys.byteorder == 'big':
+                table.byteswap()
+            frames.append(table)
+            position += size
+        return tuple(frames)
+
+    def search_index_path(self, document_id):
+        """
+        Method to get the path of the file a document's search index is kept in
+        :param str document_id: ID of the document
+        :return: Path to the index's file
+        """
+        return self.documents_dir + '/' + document_id + '.sri'
+
+    def save_search_index(self, document_id, index):
+        """
+        Method to keep a document's search index for next time. An index that is already stored is not written again.
+        :param str document_id: ID of the document
+        :param SearchIndex index: The document's index
+        :return:
+        """
+        path = self.search_index_path(document_id)
+        if exists(path):
+            return
+
+        terms = '\n'.join(index.terms).encode('utf-8')
+        counts = array('I', (stop - start for start, stop in index.terms.values()))
+        postings = array('I', index.postings)
+        if sys.byteorder == 'big':
+            counts.byteswap()
+            postings.byteswap()
+        parts = [counts.tobytes(), postings.tobytes(), terms]
+
+        checksum = 0
+        for part in parts:
+            checksum = zlib.crc32(part, checksum)
+
+        with open(path + '.tmp', 'wb') as file:
+            file.write(SEARCH_INDEX_HEADER.pack(
+                SEARCH_INDEX_MAGIC,
+                SEARCH_INDEX_VERSION,
+                index.num_words,
+                len(counts),
+                len(terms),
+                len(postings),
+                checksum
+            ))
+            for part in parts:
+                file.write(part)
+        os.replace(path + '.tmp', path)
+
+    def load_search_index(self, document_id):
+        """
+        Method to read back a document's search index
+        :param str document_id: ID of the document
+        :return: The index, or None if there isn't a valid one for the current version
+        """
+        path = self.search_index_path(document_id)
+        if not exists(path):
+            return None
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        if len(data) < SEARCH_INDEX_HEADER.size:
+            return None
+        magic, version, num_words, num_terms, terms_length, num_postings, checksum = \
+            SEARCH_INDEX_HEADER.unpack_from(data, 0)
+        if magic != SEARCH_INDEX_MAGIC or version != SEARCH_INDEX_VERSION or \
+                len(data) != SEARCH_INDEX_HEADER.size + (num_terms + num_postings) * 4 + terms_length:
+            return None
+
+        view = memoryview(data)[SEARCH_INDEX_HEADER.size:]
+        if zlib.crc32(view) != checksum:
+            return None
+
+        counts = array('I')
+        counts.frombytes(view[:num_terms * 4])
+        postings = array('I')
+        postings.frombytes(view[num_terms * 4:(num_terms + num_postings) * 4])
+        if sys.byteorder == 'big':
+            counts.byteswap()
+            postings.byteswap()
+        terms = str(view[(num_terms + num_postings) * 4:], 'utf-8').split('\n') if num_terms else []
+
+        index = SearchIndex()
+        index.set_tables(terms, counts, postings, num_words)
+        return index
+
+    def map_tables(self, mapped):
+        """
+        Method to check a mapped document file's header and build a store on top of it, without reading its tables
+        and text
+        :param mmap.mmap mapped: The mapped file
+        :return: The document's words, or None if the file is not a valid document
+        """
+        magic, version, num_words, buffer_length, num_sentences, num_chapters = HEADER.unpack_from(mapped, 0)[:6]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+
+        sizes = [(num_words + 1) * 4, num_sentences * 4, num_chapters * 4, buffer_length]
+        if HEADER.size + sum(sizes) != len(mapped):
+            return None
+
+        view = memoryview(mapped)
+        parts = []
+        position = HEADER.size
+        for size in sizes:
+            parts.append(view[position:position + size])
+            position += size
+
+        token_store = TokenStore()
+        if sys.byteorder == 'big':
+            # the tables are stored little-endian, so they have to be copied and swapped rather than mapped
+            tables = []
+            for part in parts[:3]:
+                table = array('I')
+                table.frombytes(part)
+                table.byteswap()
+                tables.append(table)
+            token_store.offsets, token_store.sentences, token_store.chapters = tables
+        else:
+            token_store.offsets = parts[0].cast('I')
+            token_store.sentences = parts[1].cast('I')
+            token_store.chapters = parts[2].cast('I')
+        token_store.buffer = parts[3]
+
+        if token_store.offsets[0] != 0 or token_store.offsets[-1] != buffer_length:
+            return None
+        return token_store
+
+    def verify(self, document_id):
+        """
+        Method to check a stored document against the checksum it was saved with. This reads the whole file, so it is
+        done on an importer's thread when an import finds the document already stored, not each time one is opened.
+        A damaged document is removed from the store.
+        :param str document_id: ID of the document
+        :return: True if the document is intact
+        """
+        try:
+            with open(self.document_path(document_id), 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return False
+
+        if len(data) >= HEADER.size and HEADER.unpack_from(data, 0)[-1] == zlib.crc32(memoryview(data)[HEADER.size:]):
+            return True
+        self.remove(document_id)
+        return False
+
+    def remove(self, document_id):
+        """
+        Method to delete a document from the store, along with its plans and search index and any imported files that
+        pointed to it
+        :param str document_id: ID of the document
+        :return: True if the document was removed
+        """
+        try:
+            os.remove(self.document_path(document_id))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # most likely the document is still mapped by the reader on a platform that won't delete open files
+            return False
+
+        for file_name in os.listdir(self.documents_dir):
+            if file_name.startswith(document_id + '.') and file_name.endswith(('.srp', '.sri')):
+                os.remove(self.documents_dir + '/' + file_name)
+
+        sources = self.load_sources()
+        for key in [key for key in sources if sources[key] == document_id]:
+            del sources[key]
+        self.save_sources(sources)
+        return True
+
+    def evict(self, keep=()):
+        """
+        Method to remove the least recently opened documents until the store fits in CACHE_SIZE_LIMIT. A document's
+        plans and search index count towards its size along with the document itself.
+        :param keep: IDs of documents that must not be removed, such as pinned ones and the one being read
+        :return: List of the IDs of the documents removed
+        """
+        sizes = {}
+        opened = {}
+        for file_name in os.listdir(self.documents_dir):
+            if not file_name.endswith(('.srd', '.srp', '.sri')):
+                continue
+            document_id = file_name.split('.', 1)[0]
+            try:
+                stat = os.stat(self.documents_dir + '/' + file_name)
+            except OSError:
+                continue
+            sizes[document_id] = sizes.get(document_id, 0) + stat.st_size
+            if file_name.endswith('.srd'):
+                opened[document_id] = stat.st_mtime
+
+        total_size = sum(sizes.values())
+        removed = []
+        # plans or indexes left without their document are the first to go
+        for document_id in sorted(sizes, key=lambda document_id: opened.get(document_id, 0)):
+            if total_size <= CACHE_SIZE_LIMIT:
+                break
+            if document_id not in keep and self.remove(document_id):
+                total_size -= sizes[document_id]
+                removed.append(document_id)
+        return removed
+
+    def source_key(self, file_name):
+        """
+        Method to get the key an imported file's document is remembered under
+        :param str file_name: Path to the imported file
+        :return: The file's SHA-256 hash and the tokenizer version
+        """
+        file_hash = hashlib.sha256()
+        with open(file_name, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                file_hash.update(block)
+        return self.hashed_source_key(file_hash)
+
+    def hashed_source_key(self, file_hash):
+        """
+        Method to get the key an imported file's document is remembered under from a hash of the file made while it
+        was read, so that a file streamed in doesn't have to be read twice
+        :param file_hash: SHA-256 hash object that has been fed the whole file
+        :return: The file's key
+        """
+        return file_hash.hexdigest() + '-' + str(TOKENIZER_VERSION)
+
+    def find_source(self, source_key):
+        """
+        Method to look up the document an imported file produced, checking that it is still intact
+        :param str source_key: The file's key, from source_key()
+        :return: ID of the document, or None if the file has not been imported or its document was removed or damaged
+        """
+        document_id = self.load_sources().get(source_key)
+        if document_id and self.verify(document_id):
+            return document_id
+        return None
+
+    def add_source(self, source_key, document_id):
+        """
+        Method to remember the document an imported file produced
+        :param str source_key: The file's key, from source_key()
+        :param str document_id: ID of the document
+        :return:
+        """
+        sources = self.load_sources()
+        sources[source_key] = document_id
+        self.save_sources(sources)
+
+    def load_sources(self):
+        """
+        Method to read the record of which document each imported file produced
+        :return: Dictionary of document IDs by file key, empty if there is no record or it can't be read
+        """
+        if exists(self.sources_file):
+            try:
+                with open(self.sources_file, 'r') as file:
+                    return json.loads(file.read())
+            except ValueError:
+                pass
+        return {}
+
+    def save_sources(self, sources):
+        """
+        Method to write the record of which document each imported file produced, replacing the old one whole
+        :param dict sources: Document IDs by file key
+        :return:
+        """
+        with open(self.sources_file + '.tmp', 'w') as file:
+            file.write(json.dumps(sources))
+        os.replace(self.sources_file + '.tmp', self.sources_file)
@@ -0,0 +1,72 @@
+from ebooklib import epub
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from TextExtraction import extract_texts, spine_documents
+
+
+class EpubImporter(QThread):
+    chapter_ready = pyqtSignal(str)
+    document_ready = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_name, documents):
+        """
+        Implements QThread to read an EPUB file off of the gui thread, sending the text of each spine document to the
+        reader as soon as it has been extracted. A file that has been imported before is not read again; its stored
+        document is sent instead.
+        :param str file_name: Path to the EPUB file
+        :param DocumentStore documents: The program's document store
+        """
+        self.file_name = file_name
+        self.documents = documents
+        self.source_key = None
+        self.title = ''
+        self.completed = False
+        self.keep_running = True
+
+        super().__init__()
+
+    def run(self):
+        """
+        Looks the EPUB up in the document store, or else reads it, then extracts the text of its documents, emitting
+        chapter_ready in reading order for each one that contains text and progress after each one. If the file can't
+        be read as an EPUB, failed is emitted with the reason instead.
+        :return: None
+        """
+        try:
+            self.source_key = self.documents.source_key(self.file_name)
+            document_id = self.documents.find_source(self.source_key)
+            if document_id:
+                self.document_ready.emit(document_id)
+                return
+
+            book = epub.read_epub(self.file_name)
+        except Exception as ex:
+            # ebooklib raises all sorts for a file that is missing, corrupt, or not an EPUB at all
+            self.failed.emit(str(ex) or type(ex).__name__)
+            return
+
+        titles = book.get_metadata('DC', 'title')
+        if titles:
+            self.title = titles[0][0].strip()
+        contents = [document.get_content() for document in spine_documents(book)]
+
+        texts = extract_texts(contents)
+        for i, text in enumerate(texts):
+            if not self.keep_running:
+                texts.close()
+                break
+
+            if len(text) > 0:
+                self.chapter_ready.emit(text)
+            self.progress.emit(i + 1, len(contents))
+        else:
+            self.completed = True
+
+    def stop(self):
+        """
+        Convenience method to set self.keep_running to False, cancelling the import after the current document
+        :return:
+        """
+        self.keep_running = False
@@ -0,0 +1,157 @@
+import csv
+import json
+from array import array
+
+# number of most recent frames kept
+FRAME_STATS_CAPACITY = 4096
+
+
+class FrameStats:
+    def __init__(self, capacity=FRAME_STATS_CAPACITY):
+        """
+        Records, for the most recent frames of playback, when each frame was due, when the word label was actually
+        repainted with it, how many words it showed and how long it was meant to stay up. The records are kept in
+        fixed-size arrays used as a ring buffer, so recording costs the same whether the user has read for a minute or
+        a day. Frames are recorded by the playback thread and paints by the gui thread.
+        :param int capacity: Number of frames to keep
+        """
+        self.capacity = capacity
+        self.scheduled = array('d', [0.0]) * capacity
+        # 0.0 until the frame has been painted
+        self.painted = array('d', [0.0]) * capacity
+        self.words = array('I', [0]) * capacity
+        self.delays = array('d', [0.0]) * capacity
+        # which run of the playback loop each frame belongs to, so that pauses aren't counted as reading time
+        self.runs = array('I', [0]) * capacity
+        self.count = 0
+        self.run = 0
+
+    def clear(self):
+        """
+        Method to forget every recorded frame
+        :return:
+        """
+        self.count = 0
+
+    def start_run(self):
+        """
+        Method to be called when playback starts or resumes
+        :return:
+        """
+        self.run += 1
+
+    def record_frame(self, scheduled, words, delay):
+        """
+        Method to record a frame as it is sent to the gui
+        :param float scheduled: perf_counter() time the frame was due to appear
+        :param int words: Number of words the frame shows
+        :param float delay: How long the frame is meant to stay up, in seconds
+        :return:
+        """
+        i = self.count % self.capacity
+        self.scheduled[i] = scheduled
+        self.painted[i] = 0.0
+        self.words[i] = words
+        self.delays[i] = delay
+        self.runs[i] = self.run
+        self.count += 1
+
+    def record_paint(self, painted):
+        """
+        Method to record that the word label has been repainted. Only the first paint after a frame was recorded counts
+        as that frame being shown; later paints, such as from resizing the window, are ignored.
+        :param float painted: perf_counter() time of the paint
+        :return:
+        """
+        count = self.count
+        if count > 0:
+            i = (count - 1) % self.capacity
+            if self.painted[i] == 0.0:
+                self.painted[i] = painted
+
+    def frames(self):
+        """
+        Method to get the frames held in the buffer, oldest first
+        :return: List of (scheduled, painted, words, delay, run) tuples, where painted is None for frames never painted
+        """
+        count = self.count
+        first = max(0, count - self.capacity)
+        frames = []
+        for frame_num in range(first, count):
+            i = frame_num % self.capacity
+            painted = self.painted[i] if self.painted[i] != 0.0 else None
+            frames.append((self.scheduled[i], painted, self.words[i], self.delays[i], self.runs[i]))
+        return frames
+
+    def summary(self, frames=None):
+        """
+        Method to calculate the figures shown in the stats overlay. A frame counts as dropped if its word was never
+        painted, or was painted only after the following frame was already due. The most recent frame is left out of
+        the dropped count, since its paint may still be on its way.
+        :param list frames: Frames from frames(), to avoid taking another snapshot
+        :return: Dictionary of statistics, with times in milliseconds
+        """
+        if frames is None:
+            frames = self.frames()
+
+        lateness = sorted((painted - scheduled) * 1000 for scheduled, painted, words, delay, run in frames if painted)
+
+        dropped = 0
+        shown_words = 0
+        shown_time = 0.0
+        target_time = 0.0
+        for current, following in zip(frames, frames[1:]):
+            if not current[1] or (following[4] == current[4] and current[1] > following[0]):
+                dropped += 1
+            elif following[1] and following[4] == current[4]:
+                shown_words += current[2]
+                shown_time += following[1] - current[1]
+                target_time += current[3]
+
+        def percentile(fraction):
+            if len(lateness) == 0:
+                return None
+            return round(lateness[int(fraction * (len(lateness) - 1))], 3)
+
+        return {
+            'frames': len(frames),
+            'painted': len(lateness),
+            'dropped': dropped,
+            'target_wpm': round(60 * shown_words / target_time, 1) if target_time > 0 else None,
+            'effective_wpm': round(60 * shown_words / shown_time, 1) if shown_time > 0 else None,
+            'lateness_p50_ms': percentile(0.5),
+            'lateness_p95_ms': percentile(0.95),
+            'lateness_p99_ms': percentile(0.99),
+            'lateness_max_ms': round(lateness[-1], 3) if lateness else None
+        }
+
+    def export(self, file_name):
+        """
+        Method to write the recorded frames to a file for offline analysis. Files ending in .json get the summary and
+        every frame as JSON; anything else gets the frames as CSV. Times are in milliseconds from the oldest frame.
+        :param str file_name: Path to write to
+        :return:
+        """
+        frames = self.frames()
+        origin = frames[0][0] if frames else 0.0
+        rows = []
+        for frame_num, (scheduled, painted, words, delay, run) in enumerate(frames):
+            rows.append({
+                'frame': frame_num,
+                'run': run,
+                'scheduled_ms': round((scheduled - origin) * 1000, 3),
+                'painted_ms': round((painted - origin) * 1000, 3) if painted else None,
+                'lateness_ms': round((painted - scheduled) * 1000, 3) if painted else None,
+                'words': words,
+                'delay_ms': round(delay * 1000, 3)
+            })
+
+        if file_name.lower().endswith('.json'):
+            with open(file_name, 'w') as file:
+                file.write(json.dumps({'summary': self.summary(frames), 'frames': rows}, indent=2))
+        else:
+            with open(file_name, 'w', newline='') as file:
+                writer = csv.DictWriter(
+                    file, ['frame', 'run', 'scheduled_ms', 'painted_ms', 'lateness_ms', 'words', 'delay_ms'])
+                writer.writeheader()
+                writer.writerows(rows)
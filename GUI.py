@@ -1,16 +1,34 @@
-import ebooklib
+import html
 import os.path
-import re
 import time
+from bisect import bisect_right
 
-from codecs import decode
-from ebooklib import epub
-from PyQt5.QtCore import pyqtSignal, Qt, QSize
+from PyQt5.QtCore import pyqtSignal, Qt, QSize, QEvent, QTimer
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from PyQt5.QtWidgets import QWidget, QMainWindow, QLabel, QPushButton, QHBoxLayout, QVBoxLayout, QSlider, \
-    QDialog, QTextEdit, QFontDialog, QTabWidget, QTextBrowser, QGridLayout, QFileDialog
+    QDialog, QTextEdit, QPlainTextEdit, QFontDialog, QTabWidget, QTextBrowser, QGridLayout, QFileDialog, QProgressDialog
 
+from DocumentLoader import DocumentLoader
+from LibraryDialog import LibraryDialog
 from OptionsMenu import OptionsMenu
+from SearchDialog import SearchDialog
+from TextImporter import TextImporter
+from WordDisplay import WordDisplay
+
+# files of the icons, which are only loaded the first time each one is shown
+ICON_FILES = {
+    'window': 'resources/sr_logo.svg',
+    'edit': 'resources/edit.svg',
+    'play': 'resources/play.svg',
+    'stop': 'resources/stop.svg',
+    'settings': 'resources/settings.svg',
+    'font': 'resources/change_font.svg',
+    'background': 'resources/change_background.svg',
+    'punctuation_off': 'resources/punctuation.svg',
+    'punctuation_on': 'resources/punctuation_grey.svg',
+    'combine_off': 'resources/combine.svg',
+    'combine_on': 'resources/combine_grey.svg'
+}
 
 
 class GUI(QMainWindow):
@@ -18,21 +36,59 @@ class GUI(QMainWindow):
     start_words = pyqtSignal()
     stop_words = pyqtSignal()
     set_current_word_index = pyqtSignal(int)
+    go_to_word = pyqtSignal(int)
+    skip_sentences = pyqtSignal(int)
+    skip_chapters = pyqtSignal(int)
+    set_chapters = pyqtSignal(object)
     set_current_word_string = pyqtSignal(str)
     change_text = pyqtSignal(str)
+    load_pasted_words = pyqtSignal(object, object)
+    append_text = pyqtSignal(str)
+    change_words = pyqtSignal(object)
+    continue_words = pyqtSignal(object)
+    set_text_loading = pyqtSignal(bool)
+    open_document = pyqtSignal(str)
+    remove_document = pyqtSignal(str)
+    pin_document = pyqtSignal(str, bool)
+    remember_position = pyqtSignal()
+    search_index_changed = pyqtSignal()
+    save_import = pyqtSignal(str, str, str)
     save_settings = pyqtSignal()
     timed_popup = pyqtSignal(str)
     block_word_slider_signals = pyqtSignal(bool)
     set_word_slider_value = pyqtSignal(int)
     set_speed_slider_value = pyqtSignal(int)
-    set_time_remaining_text = pyqtSignal(str)
+    set_time_remaining_text = pyqtSignal(str, str)
     reading_ready = pyqtSignal(int)
     set_gui_settings = pyqtSignal(dict)
+    set_reading_options = pyqtSignal(bool, bool, int, int, bool)
+    set_engine = pyqtSignal(str)
+    prepare_words = pyqtSignal(list)
 
     current_font = None
     punctuation_pause = None
     group_words = None
+    chunk_words = 1
+    chunk_characters = 0
+    adaptive_pacing = False
+    engine = 'thread'
+    # whether the word slider covers only the chapter being read, and the index of the first word of each chapter
+    chapter_slider = False
+    chapter_starts = ()
+    num_words = 0
     current_background = None
+    importer = None
+    paste_loader = None
+    documents = None
+    library = None
+    document_search = None
+    search_dialog = None
+    frame_stats = None
+    reading_core = None
+    # slider value the word slider has been dragged to but not yet let go at
+    scrub_value = 0
+    # how often the preview of where the word slider is being dragged to is brought up to date, in ms
+    scrub_interval = 16
 
     def __init__(self):
         """
@@ -41,22 +97,22 @@ class GUI(QMainWindow):
         super().__init__()
         os.chdir(os.path.dirname(__file__))
 
-        self.icons = {
-            'window': QIcon('resources/sr_logo.svg'),
-            'edit': QIcon('resources/edit.svg'),
-            'play': QIcon('resources/play.svg'),
-            'stop': QIcon('resources/stop.svg'),
-            'settings': QIcon('resources/settings.svg'),
-            'font': QIcon('resources/change_font.svg'),
-            'background': QIcon('resources/change_background.svg'),
-            'punctuation_off': QIcon('resources/punctuation.svg'),
-            'punctuation_on': QIcon('resources/punctuation_grey.svg'),
-            'combine_off': QIcon('resources/combine.svg'),
-            'combine_on': QIcon('resources/combine_grey.svg')
-        }
+        self.icons = {}
         self.create_gui()
         self.setWindowTitle('SpeeDReaD')
-        self.setWindowIcon(self.icons['window'])
+        self.setWindowIcon(self.icon('window'))
+
+    def icon(self, name):
+        """
+        Method to get one of the program's icons, loading it the first time it is asked for
+        :param str name: Name of the icon in ICON_FILES
+        :return: The icon
+        """
+        icon = self.icons.get(name)
+        if icon is None:
+            icon = QIcon(ICON_FILES[name])
+            self.icons[name] = icon
+        return icon
 
     def create_gui(self):
         """
@@ -72,17 +128,33 @@ class GUI(QMainWindow):
         self.setContentsMargins(0, 0, 0, 0)
         main_widget.setContentsMargins(0, 0, 0, 0)
 
-        self.word_widget = QWidget()
-        word_layout = QVBoxLayout()
-        self.word_widget.setLayout(word_layout)
+        self.word_display = WordDisplay('SpeeDReaD')
+        self.word_display.installEventFilter(self)
+
+        self.stats_label = QLabel(self.word_display)
+        self.stats_label.setFont(QFont('Courier New', 10))
+        self.stats_label.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: white; padding: 6px;')
+        self.stats_label.move(10, 10)
+        self.stats_label.hide()
+
+        self.stats_timer = QTimer()
+        self.stats_timer.setInterval(500)
+        self.stats_timer.timeout.connect(self.update_stats_overlay)
 
-        self.word_label = QLabel('SpeeDReaD')
-        self.word_label.setAlignment(Qt.AlignCenter)
-        word_layout.addStretch()
-        word_layout.addWidget(self.word_label)
-        word_layout.addStretch()
+        self.scrub_label = QLabel(self.word_display)
+        self.scrub_label.setFont(QFont('Arial', 14))
+        self.scrub_label.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: white; padding: 8px;')
+        self.scrub_label.setTextFormat(Qt.RichText)
+        self.scrub_label.setWordWrap(True)
+        self.scrub_label.hide()
 
-        main_layout.addWidget(self.word_widget)
+        # one preview per interval, of wherever the slider is by then, however many times it moves in between
+        self.scrub_timer = QTimer()
+        self.scrub_timer.setSingleShot(True)
+        self.scrub_timer.setInterval(self.scrub_interval)
+        self.scrub_timer.timeout.connect(self.show_scrub_preview)
+
+        main_layout.addWidget(self.word_display)
 
         slider_container = QWidget()
         slider_layout = QHBoxLayout()
@@ -94,7 +166,11 @@ class GUI(QMainWindow):
         self.word_slider.setOrientation(Qt.Horizontal)
         self.word_slider.setAutoFillBackground(False)
         self.word_slider.setFocusPolicy(Qt.NoFocus)
+        # while the slider is being dragged, where it is going is only previewed; the move is made when it is let go
+        self.word_slider.setTracking(False)
         self.word_slider.valueChanged.connect(self.slider_word_change)
+        self.word_slider.sliderMoved.connect(self.scrub_word_slider)
+        self.word_slider.sliderReleased.connect(self.end_scrub)
         self.word_slider.setToolTip('Drag to change current word')
         slider_layout.addWidget(self.word_slider)
         main_layout.addWidget(slider_container)
@@ -108,7 +184,7 @@ class GUI(QMainWindow):
         button_widget.setLayout(button_layout)
 
         self.speed_slider = QSlider()
-        self.speed_slider.setRange(100, 999)
+        self.speed_slider.setRange(100, 2000)
         self.speed_slider.setValue(200)
         self.speed_slider.setSingleStep(10)
         self.speed_slider.setFocusPolicy(Qt.NoFocus)
@@ -132,7 +208,7 @@ class GUI(QMainWindow):
         button_layout.addWidget(speed_widget)
 
         load_button = QPushButton()
-        load_button.setIcon(self.icons['edit'])
+        load_button.setIcon(self.icon('edit'))
         load_button.setStyleSheet(
             'QPushButton { background-color: #F0F0FF; border: none; }' +
             'QPushButton:hover { background-color: lightgrey; border: none; }'
@@ -145,7 +221,7 @@ class GUI(QMainWindow):
         button_layout.addStretch()
 
         self.start_button = QPushButton()
-        self.start_button.setIcon(self.icons['play'])
+        self.start_button.setIcon(self.icon('play'))
         self.start_button.setStyleSheet(
             'QPushButton { background-color: #F0F0FF; border: none; }' +
             'QPushButton:hover { background-color: lightgrey; border: none; }' +
@@ -161,7 +237,7 @@ class GUI(QMainWindow):
         button_layout.addSpacing(20)
 
         self.stop_button = QPushButton()
-        self.stop_button.setIcon(self.icons['stop'])
+        self.stop_button.setIcon(self.icon('stop'))
         self.stop_button.setStyleSheet(
             'QPushButton { background-color: #F0F0FF; border: none; }' +
             'QPushButton:hover { background-color: lightgrey; border: none; }'
@@ -176,7 +252,7 @@ class GUI(QMainWindow):
         button_layout.addStretch()
 
         self.options_button = QPushButton()
-        self.options_button.setIcon(self.icons['settings'])
+        self.options_button.setIcon(self.icon('settings'))
         self.options_button.setStyleSheet(
             'QPushButton { background-color: #F0F0FF; border: none; }' +
             'QPushButton:hover { background-color: lightgrey; border: none; }'
@@ -186,6 +262,7 @@ class GUI(QMainWindow):
         self.options_button.setToolTip('Options')
         button_layout.addWidget(self.options_button)
 
+        # the menu's actions are only created the first time it is opened
         self.options_menu = OptionsMenu(self)
         self.options_button.setMenu(self.options_menu)
 
@@ -198,6 +275,47 @@ class GUI(QMainWindow):
         """
         self.set_current_word_index.emit(self.sender().value() - 1)
 
+    def scrub_word_slider(self, value):
+        """
+        Method called as the user drags the word slider, noting where it has got to for the next preview
+        :param int value: Slider value the slider has been dragged to
+        :return:
+        """
+        self.scrub_value = value
+        if not self.scrub_timer.isActive():
+            self.scrub_timer.start()
+
+    def show_scrub_preview(self):
+        """
+        Method called by scrub_timer to show the sentence around where the word slider has been dragged to, and how
+        far through the text it is
+        :return:
+        """
+        core = self.reading_core
+        if not self.word_slider.isSliderDown() or not core or not core.words:
+            return
+
+        word_num = min(max(self.scrub_value - 1, 0), len(core) - 1)
+        before, word, after = core.sentence_context(word_num)
+        self.scrub_label.setText(
+            '{}%&nbsp;&nbsp;&nbsp;'.format(100 * word_num // len(core)) + html.escape(before) +
+            ' <b><u>' + html.escape(word) + '</u></b> ' + html.escape(after))
+
+        width = self.word_display.width() - 40
+        self.scrub_label.setFixedWidth(width)
+        self.scrub_label.adjustSize()
+        self.scrub_label.move(20, self.word_display.height() - self.scrub_label.height() - 20)
+        self.scrub_label.show()
+
+    def end_scrub(self):
+        """
+        Method called when the user lets go of the word slider, taking away the preview. The slider's value changes
+        as it is let go, which moves to the word.
+        :return:
+        """
+        self.scrub_timer.stop()
+        self.scrub_label.hide()
+
     def word_slider_block_signals(self, value):
         """
         Method called by the block_word_slider_signals signal
@@ -212,17 +330,138 @@ class GUI(QMainWindow):
         :param int value:  Value to set the slider to
         :return:
         """
+        if self.word_slider.isSliderDown():
+            # the reader moving on doesn't pull the slider out from under the user
+            return
         self.word_slider.blockSignals(True)
+        if value < self.word_slider.minimum() or value > self.word_slider.maximum():
+            self.update_word_slider_range(value)
         self.word_slider.setValue(value)
         self.word_slider_block_signals(False)
 
+    def update_word_slider_range(self, value):
+        """
+        Method to set the word slider's range to the whole text or, when it covers only the chapter being read, to the
+        chapter of the word at a slider value. Chapters are found by bisecting their first words.
+        :param int value: Slider value of the word, one more than its index
+        :return:
+        """
+        minimum, maximum = 1, self.num_words
+        if self.chapter_slider and len(self.chapter_starts) > 1:
+            chapter = max(bisect_right(self.chapter_starts, value - 1) - 1, 0)
+            minimum = self.chapter_starts[chapter] + 1
+            if chapter + 1 < len(self.chapter_starts):
+                maximum = self.chapter_starts[chapter + 1]
+
+        if (minimum, maximum) != (self.word_slider.minimum(), self.word_slider.maximum()):
+            blocked = self.word_slider.blockSignals(True)
+            self.word_slider.setRange(minimum, max(minimum, maximum))
+            self.word_slider.setValue(value)
+            self.word_slider.blockSignals(blocked)
+
+    def set_chapter_starts(self, chapter_starts):
+        """
+        Method called by the set_chapters signal when the text being read changes
+        :param array chapter_starts: Index of the first word of each chapter
+        :return:
+        """
+        self.chapter_starts = chapter_starts
+
+    def toggle_chapter_slider(self):
+        """
+        Method to switch the word slider between covering the whole text and covering only the chapter being read
+        :return:
+        """
+        self.chapter_slider = not self.chapter_slider
+        if self.chapter_slider:
+            self.timed_popup.emit('Slider Covers Chapter')
+        else:
+            self.timed_popup.emit('Slider Covers Whole Text')
+        self.update_word_slider_range(self.word_slider.value())
+        self.options_menu.update_actions()
+
     def set_word(self, word):
         """
         Method called by the set_current_word_string signal to set the word currently being displayed
         :param str word: The word to show
         :return:
         """
-        self.word_label.setText(word)
+        if self.frame_stats and word == self.word_display.text():
+            # the label won't repaint for an unchanged word, but the word is on screen all the same
+            self.frame_stats.record_paint(time.perf_counter())
+        self.word_display.setText(word)
+
+    def eventFilter(self, obj, evt):
+        """
+        Overrides eventFilter to note when the word display is repainted, which is when a word actually reaches the
+        screen
+        :param QObject obj: The object receiving the event
+        :param QEvent evt: The event
+        :return: False, so that the event is still delivered
+        """
+        if obj is self.word_display and evt.type() == QEvent.Paint and self.frame_stats:
+            self.frame_stats.record_paint(time.perf_counter())
+        return super().eventFilter(obj, evt)
+
+    def toggle_stats_overlay(self):
+        """
+        Method to show or hide the playback stats overlay in the corner of the reading area
+        :return:
+        """
+        if self.stats_label.isVisible():
+            self.stats_timer.stop()
+            self.stats_label.hide()
+        else:
+            self.update_stats_overlay()
+            self.stats_label.show()
+            self.stats_label.raise_()
+            self.stats_timer.start()
+        self.options_menu.update_actions()
+
+    def update_stats_overlay(self):
+        """
+        Method called by stats_timer to refresh the playback stats overlay
+        :return:
+        """
+        if not self.frame_stats:
+            return
+
+        summary = self.frame_stats.summary()
+
+        def number(value, unit):
+            return '-' if value is None else str(value) + unit
+
+        self.stats_label.setText(
+            'Target:    ' + number(summary['target_wpm'], ' wpm') + '\n' +
+            'Actual:    ' + number(summary['effective_wpm'], ' wpm') + '\n' +
+            'Late p50:  ' + number(summary['lateness_p50_ms'], ' ms') + '\n' +
+            'Late p95:  ' + number(summary['lateness_p95_ms'], ' ms') + '\n' +
+            'Late p99:  ' + number(summary['lateness_p99_ms'], ' ms') + '\n' +
+            'Dropped:   ' + str(summary['dropped']) + ' of ' + str(summary['frames']) + ' frames'
+        )
+        self.stats_label.adjustSize()
+
+    def export_stats(self):
+        """
+        Provides the user with a file dialog to save the recorded playback stats as CSV or JSON
+        :return:
+        """
+        if not self.frame_stats:
+            return
+
+        file_dialog = QFileDialog()
+        result = file_dialog.getSaveFileName(
+            self,
+            'Export Playback Stats',
+            os.path.expanduser('~') + '/Documents/speedread_stats.csv',
+            'CSV (*.csv);;JSON (*.json)'
+        )
+
+        if len(result[0]) > 0:
+            file_name = result[0]
+            if not file_name.lower().endswith(('.csv', '.json')):
+                file_name += '.json' if 'JSON' in result[1] else '.csv'
+            self.frame_stats.export(file_name)
 
     def speed_slider_set_value(self, value):
         """
@@ -232,13 +471,15 @@ class GUI(QMainWindow):
         """
         self.speed_slider.setValue(value)
 
-    def time_remainting_set_text(self, text):
+    def time_remainting_set_text(self, text, sessions_text):
         """
         Method called by the set_time_remaining_text signal to set what the time remaining label shows
         :param str text: Text to show
+        :param str sessions_text: How far reading sessions of a few lengths would get, shown as the label's tooltip
         :return:
         """
         self.time_remaining_label.setText(text)
+        self.time_remaining_label.setToolTip(sessions_text)
 
     def reading_ready_widget_set(self, num_words):
         """
@@ -247,8 +488,9 @@ class GUI(QMainWindow):
         :param int num_words: Number of words in the text to be read
         :return:
         """
+        self.num_words = num_words
         self.word_slider.setEnabled(True)
-        self.word_slider.setRange(1, num_words)
+        self.update_word_slider_range(self.word_slider.value())
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(True)
 
@@ -259,20 +501,20 @@ class GUI(QMainWindow):
         :return:
         """
         self.current_font = QFont(settings['font_name'], settings['font_size'])
-        self.word_label.setFont(self.current_font)
+        self.word_display.setFont(self.current_font)
         self.change_background(settings['background'])
 
         self.punctuation_pause = settings['pause']
-        if settings['pause']:
-            self.options_menu.pause_punctuation_action.setIcon(self.icons['punctuation_on'])
-        else:
-            self.options_menu.pause_punctuation_action.setIcon(self.icons['punctuation_off'])
-
         self.group_words = settings['combine']
-        if settings['combine']:
-            self.options_menu.group_words_action.setIcon(self.icons['combine_on'])
-        else:
-            self.options_menu.group_words_action.setIcon(self.icons['combine_off'])
+        self.chunk_words = settings.get('chunk_words', 1)
+        self.chunk_characters = settings.get('chunk_characters', 0)
+        self.adaptive_pacing = settings.get('adaptive_pacing', False)
+        self.engine = settings.get('engine', 'thread')
+        self.chapter_slider = settings.get('chapter_slider', False)
+        self.options_menu.update_actions()
+
+        self.set_reading_options.emit(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing)
 
     def change_background(self, color):
         """
@@ -282,17 +524,13 @@ class GUI(QMainWindow):
         """
         self.current_background = color
         if color == 'white':
-            self.word_widget.setStyleSheet('background-color: white')
-            self.word_label.setStyleSheet('font-color: black')
+            self.word_display.set_colors('white', 'black')
         elif color == 'cream':
-            self.word_widget.setStyleSheet('background-color: #EFE0D0')
-            self.word_label.setStyleSheet('font-color: black')
+            self.word_display.set_colors('#EFE0D0', 'black')
         elif color == 'neutral':
-            self.word_widget.setStyleSheet('background-color: #B0B0B0')
-            self.word_label.setStyleSheet('font-color: black')
+            self.word_display.set_colors('#B0B0B0', 'black')
         elif color == 'black':
-            self.word_widget.setStyleSheet('background-color: black')
-            self.word_label.setStyleSheet('color: white')
+            self.word_display.set_colors('black', 'white')
 
     def pause_for_punctuation(self):
         """
@@ -302,12 +540,13 @@ class GUI(QMainWindow):
         """
         if self.punctuation_pause:
             self.punctuation_pause = False
-            self.options_menu.pause_punctuation_action.setIcon(self.icons['punctuation_off'])
             self.timed_popup.emit('Punctuation Pause OFF')
         else:
             self.punctuation_pause = True
-            self.options_menu.pause_punctuation_action.setIcon(self.icons['punctuation_on'])
             self.timed_popup.emit('Punctuation Pause ON')
+        self.options_menu.update_actions()
+        self.set_reading_options.emit(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing)
 
     def combine_words(self):
         """
@@ -317,12 +556,56 @@ class GUI(QMainWindow):
         """
         if self.group_words:
             self.group_words = False
-            self.options_menu.group_words_action.setIcon(self.icons['combine_off'])
             self.timed_popup.emit('Combine Small Words OFF')
         else:
             self.group_words = True
-            self.options_menu.group_words_action.setIcon(self.icons['combine_on'])
             self.timed_popup.emit('Combine Small Words ON')
+        self.options_menu.update_actions()
+        self.set_reading_options.emit(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing)
+
+    def toggle_adaptive_pacing(self):
+        """
+        Method to provide the user with feedback when turning adaptive pacing on or off
+        :return:
+        """
+        self.adaptive_pacing = not self.adaptive_pacing
+        self.timed_popup.emit('Adaptive Pacing ' + ('ON' if self.adaptive_pacing else 'OFF'))
+        self.options_menu.update_actions()
+        self.set_reading_options.emit(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing)
+
+    def change_chunking(self, chunk_words=None, chunk_characters=None):
+        """
+        Method called when the user changes the chunk size or chunk character limit from the options menu
+        :param int chunk_words: Number of words to show at once, or 1 to turn chunk mode off
+        :param int chunk_characters: Most characters a chunk may take up, or 0 for no limit
+        :return:
+        """
+        if chunk_words is not None:
+            self.chunk_words = chunk_words
+            if chunk_words > 1:
+                self.timed_popup.emit('Chunks of ' + str(chunk_words) + ' Words')
+            else:
+                self.timed_popup.emit('Chunk Mode OFF')
+        if chunk_characters is not None:
+            self.chunk_characters = chunk_characters
+        self.set_reading_options.emit(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing)
+        self.options_menu.update_actions()
+
+    def change_engine(self, engine):
+        """
+        Method called when the user chooses a playback engine from the options menu
+        :param str engine: 'thread' or 'timer'
+        :return:
+        """
+        self.engine = engine
+        self.set_engine.emit(engine)
+        if engine == 'timer':
+            self.timed_popup.emit('Precise Timer Engine (from next start)')
+        else:
+            self.timed_popup.emit('Reading Thread Engine (from next start)')
 
     def change_speed(self):
         """
@@ -343,7 +626,7 @@ class GUI(QMainWindow):
 
         if result[1]:
             self.current_font = result[0]
-            self.word_label.setFont(self.current_font)
+            self.word_display.setFont(self.current_font)
 
     def start_reading(self, set_state=False):
         """
@@ -375,7 +658,8 @@ class GUI(QMainWindow):
 
     def load_text(self):
         """
-        Provides the user with a dialog to paste the text they would like to read, or to import text from an epub file.
+        Provides the user with a dialog to paste the text they would like to read, or to import text from an EPUB, plain
+        text or HTML file.
         :return:
         """
         dialog = QDialog()
@@ -387,7 +671,8 @@ class GUI(QMainWindow):
         label = QLabel('Paste text here:')
         layout.addWidget(label)
 
-        text_edit = QTextEdit()
+        # plain text only, which stays responsive with far larger texts than a rich text editor
+        text_edit = QPlainTextEdit()
         layout.addWidget(text_edit)
 
         button_widget = QWidget()
@@ -412,47 +697,296 @@ class GUI(QMainWindow):
         or_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(or_label)
 
-        import_button = QPushButton('Import from EPUB')
+        import_button = QPushButton('Import from File')
         import_button.setStyleSheet('padding: 10px;')
         import_button.pressed.connect(lambda: dialog.done(2))
         layout.addWidget(import_button, 0, Qt.AlignCenter)
 
+        library_button = QPushButton('Open from Library')
+        library_button.setStyleSheet('padding: 10px;')
+        library_button.pressed.connect(lambda: dialog.done(3))
+        layout.addWidget(library_button, 0, Qt.AlignCenter)
+
         result = dialog.exec()
         if result == 0:
-            self.change_text.emit(text_edit.toPlainText())
-            self.word_slider.setEnabled(True)
-            self.word_slider.setRange(1, len(text_edit.toPlainText().split(' ')))
-            self.start_button.setEnabled(True)
-            self.stop_button.setEnabled(True)
+            self.paste_text(text_edit.toPlainText())
         elif result == 2:
             file_dialog = QFileDialog()
             result = file_dialog.getOpenFileName(
                 self,
-                'Import from EPUB',
+                'Import from File',
                 os.path.expanduser('~') + '/Documents',
-                'EPUB (*.epub)'
+                'Books and Text (*.epub *.txt *.html *.htm *.xhtml);;EPUB (*.epub);;Plain Text (*.txt);;'
+                'HTML (*.html *.htm *.xhtml);;All Files (*)'
             )
 
             if len(result[0]) > 0:
-                if '.epub' in result[0]:
-                    book = epub.read_epub(result[0])
-
-                    text_array = book.get_items_of_type(ebooklib.ITEM_DOCUMENT)
-
-                    all_text = ''
-                    for text in text_array:
-                        text = decode(text.get_body_content(), 'utf-8')
-                        text = text.replace('</p>', ' ')
-                        text = re.sub('<.*?>', '', text)
-                        text = re.sub('\n+', ' ', text)
-                        if len(text.strip()) > 0:
-                            all_text += ' ' + text.strip()
-
-                    self.change_text.emit(all_text)
-                    self.word_slider.setEnabled(True)
-                    self.word_slider.setRange(1, len(all_text.split(' ')))
-                    self.start_button.setEnabled(True)
-                    self.stop_button.setEnabled(True)
+                self.import_file(result[0])
+        elif result == 3:
+            self.show_library()
+
+    def paste_text(self, text):
+        """
+        Method to tokenize and plan a pasted text on a DocumentLoader thread, showing its progress, so that even a very
+        large text doesn't hold up the gui. The text replaces the one being read, and any import, once it is ready.
+        :param str text: The pasted text
+        :return:
+        """
+        if self.paste_loader and self.paste_loader.isRunning():
+            self.paste_loader.stop()
+            self.paste_loader.wait()
+            self.paste_progress.close()
+
+        self.paste_progress = QProgressDialog('Preparing the text', 'Cancel', 0, 0, self)
+        self.paste_progress.setWindowTitle('Paste Text')
+        self.paste_progress.setModal(False)
+        # a short text is ready before the dialog would be seen
+        self.paste_progress.setMinimumDuration(500)
+
+        self.paste_loader = DocumentLoader(self.documents, text=text, options=(
+            self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing))
+        self.paste_loader.loaded.connect(self.paste_loaded)
+        self.paste_loader.progress.connect(self.paste_progress_changed)
+        self.paste_progress.canceled.connect(self.paste_loader.stop)
+        self.paste_loader.start()
+
+    def paste_progress_changed(self, done, total):
+        """
+        Method called by the paste loader's progress signal
+        :param int done: Steps done so far
+        :param int total: Number of steps
+        :return:
+        """
+        self.paste_progress.setMaximum(total)
+        self.paste_progress.setValue(done)
+
+    def paste_loaded(self, token_store, plan):
+        """
+        Method called by the paste loader's loaded signal, making the pasted text the one being read. An empty paste
+        leaves the text being read as it was.
+        :param TokenStore token_store: The pasted text's words, or None if it had none
+        :param ReadingPlan plan: Their reading plan
+        :return:
+        """
+        if self.sender() is not self.paste_loader:
+            return
+
+        self.paste_progress.close()
+        if token_store is None:
+            return
+
+        if self.importer and self.importer.isRunning():
+            self.importer.stop()
+            self.importer.wait()
+            self.import_progress.close()
+        if self.start_button.isChecked():
+            self.stop_words.emit()
+            self.start_button.setChecked(False)
+        self.load_pasted_words.emit(token_store, plan)
+
+    def show_library(self):
+        """
+        Provides the user with a dialog to search the library and switch to another document in it
+        :return:
+        """
+        # brings the library's record of the current document up to date before it is listed
+        self.remember_position.emit()
+        LibraryDialog(self).exec()
+
+    def show_search(self):
+        """
+        Shows the dialog to search the text being read
+        :return:
+        """
+        if not self.search_dialog:
+            self.search_dialog = SearchDialog(self)
+            self.search_index_changed.connect(self.search_dialog.refresh)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+        self.search_dialog.search_edit.setFocus()
+        self.search_dialog.search_edit.selectAll()
+
+    def skip(self, signal, step):
+        """
+        Method to move by sentences or chapters, pausing the reader first if it is running
+        :param signal: skip_sentences or skip_chapters
+        :param int step: -1 for the start of the current one or else the previous one, 1 for the next, and so on
+        :return:
+        """
+        if self.start_button.isChecked():
+            self.start_button.setChecked(False)
+        signal.emit(step)
+
+    def jump_to_word(self, word_num):
+        """
+        Method to move straight to a word, such as a search hit, pausing the reader first if it is running
+        :param int word_num: Index of the word
+        :return:
+        """
+        if self.start_button.isChecked():
+            self.start_button.setChecked(False)
+        self.go_to_word.emit(word_num)
+
+    def open_library_document(self, document_id):
+        """
+        Method to switch to a document from the library, cancelling any import and stopping the reader first
+        :param str document_id: ID of the document
+        :return:
+        """
+        if self.importer and self.importer.isRunning():
+            self.importer.stop()
+            self.importer.wait()
+            self.import_progress.close()
+        if self.start_button.isChecked():
+            self.stop_words.emit()
+            self.start_button.setChecked(False)
+        self.open_document.emit(document_id)
+        self.set_text_loading.emit(False)
+
+    def import_file(self, file_name):
+        """
+        Method to import a file of any of the kinds that can be read: EPUB, or else plain text or HTML, which are
+        streamed in
+        :param str file_name: Path to the file, or '-' for standard input
+        :return:
+        """
+        if file_name.lower().endswith('.epub'):
+            self.import_epub(file_name)
+        elif file_name == '-' or os.path.isfile(file_name):
+            self.import_text(file_name)
+        else:
+            self.timed_popup.emit("Can't open " + os.path.basename(file_name))
+
+    def begin_import(self, label, title):
+        """
+        Method to get ready for an import, cancelling any import already running and showing the import's progress
+        :param str label: What is being imported, for the progress dialog
+        :param str title: Title of the progress dialog
+        :return:
+        """
+        if self.importer and self.importer.isRunning():
+            self.importer.stop()
+            self.importer.wait()
+            self.import_progress.close()
+
+        self.first_chapter = True
+        self.set_text_loading.emit(True)
+
+        self.import_progress = QProgressDialog(label, 'Cancel', 0, 0, self)
+        self.import_progress.setWindowTitle(title)
+        self.import_progress.setModal(False)
+        self.import_progress.setMinimumDuration(0)
+
+    def import_epub(self, file_name):
+        """
+        Starts importing an EPUB file in the background, showing the import's progress. Reading can begin as soon as
+        the first chapter has arrived.
+        :param str file_name: Path to the EPUB file
+        :return:
+        """
+        self.begin_import('Importing ' + os.path.basename(file_name), 'Import from EPUB')
+
+        # EPUB support is only loaded the first time a book is imported
+        from EpubImporter import EpubImporter
+
+        self.importer = EpubImporter(file_name, self.documents)
+        self.importer.chapter_ready.connect(self.import_chapter_ready)
+        self.importer.document_ready.connect(self.open_document)
+        self.importer.progress.connect(self.import_progress_changed)
+        self.importer.failed.connect(self.import_failed)
+        self.importer.finished.connect(self.import_finished)
+        self.import_progress.canceled.connect(self.importer.stop)
+        self.importer.start()
+
+    def import_failed(self, reason):
+        """
+        Method called by the importer's failed signal when the file couldn't be read, to tell the user why
+        :param str reason: What went wrong
+        :return:
+        """
+        if self.sender() is not self.importer:
+            return
+
+        self.import_progress.close()
+        self.timed_popup.emit("Can't import " + os.path.basename(self.importer.file_name) + ': ' + reason)
+
+    def import_chapter_ready(self, text):
+        """
+        Method called by the importer's chapter_ready signal. The first chapter replaces the current text, the rest
+        are added to the end of it.
+        :param str text: Text of the chapter
+        :return:
+        """
+        if self.sender() is not self.importer or not self.importer.keep_running:
+            # a chapter from an import that has since been cancelled or replaced
+            return
+
+        if self.first_chapter:
+            self.first_chapter = False
+            self.change_text.emit(text)
+        else:
+            self.append_text.emit(text)
+
+    def import_text(self, file_name):
+        """
+        Starts streaming a plain text or HTML file, or standard input, in the background, showing how much of it has
+        been read. Reading can begin as soon as the first piece has arrived.
+        :param str file_name: Path to the file, or '-' for standard input
+        :return:
+        """
+        if file_name == '-':
+            self.begin_import('Reading standard input', 'Import')
+        else:
+            self.begin_import('Importing ' + os.path.basename(file_name), 'Import from File')
+
+        self.importer = TextImporter(file_name, self.documents)
+        self.importer.words_ready.connect(self.import_words_ready)
+        self.importer.progress.connect(self.import_progress_changed)
+        self.importer.finished.connect(self.import_finished)
+        self.import_progress.canceled.connect(self.importer.stop)
+        self.importer.start()
+
+    def import_words_ready(self, token_store):
+        """
+        Method called by a text importer's words_ready signal. The first piece replaces the current text, the rest
+        continue it.
+        :param TokenStore token_store: The words of the next piece of the text
+        :return:
+        """
+        importer = self.sender()
+        if importer is self.importer and importer.keep_running:
+            if self.first_chapter:
+                self.first_chapter = False
+                self.change_words.emit(token_store)
+            else:
+                self.continue_words.emit(token_store)
+        importer.piece_taken()
+
+    def import_progress_changed(self, done, total):
+        """
+        Method called by the importer's progress signal
+        :param int done: Number of documents processed so far, or for a text file, steps of it read so far
+        :param int total: Number of documents in the book, or steps in the file
+        :return:
+        """
+        self.import_progress.setMaximum(total)
+        self.import_progress.setValue(done)
+
+    def import_finished(self):
+        """
+        Method called when the importer's thread finishes, whether the import completed or was cancelled. A completed
+        import is stored so that the same file opens instantly next time.
+        :return:
+        """
+        if self.sender() is not self.importer:
+            return
+
+        self.import_progress.close()
+        # an import that turned up no text leaves the text being read as it was
+        if self.importer.completed and not self.first_chapter:
+            self.save_import.emit(self.importer.source_key or '', self.importer.file_name, self.importer.title)
+        self.set_text_loading.emit(False)
 
     def show_help(self):
         """
@@ -505,7 +1039,11 @@ class GUI(QMainWindow):
         hotkeys_text.setStyleSheet('background: none; border: none;')
         hotkeys_text.setFont(regular_font)
         hotkeys_text.setText('CTRL-R: Start/Pause Reading\nCTRL-UP: Increase Reading Speed\nCTRL-DOWN: Decrease'
-                             'Reading Speed\nCTRL-LEFT: Go to the previous word\nCTRL-RIGHT: Go to the next word'
+                             'Reading Speed\nCTRL-LEFT: Go back to the start of the sentence, or the one before'
+                             '\nCTRL-RIGHT: Go to the next sentence'
+                             '\nCTRL-SHIFT-LEFT/RIGHT: Go to the previous/next word'
+                             '\nCTRL-PAGE UP/DOWN: Go to the previous/next chapter'
+                             '\nCTRL-I: Show/hide playback stats\nCTRL-L: Open the library\nCTRL-F: Find in the text'
                              '\nBACKSPACE: Stop, reset to the first word')
         help_layout.addWidget(hotkeys_text)
         help_layout.addStretch()
@@ -547,7 +1085,7 @@ class GUI(QMainWindow):
         :param evt:
         :return:
         """
-        if evt.modifiers and Qt.ControlModifier:
+        if evt.modifiers() & Qt.ControlModifier:
             if evt.key() == Qt.Key_R:
                 if self.start_button.isEnabled():
                     self.start_reading(True)
@@ -557,10 +1095,28 @@ class GUI(QMainWindow):
                 self.speed_slider.setValue(self.speed_slider.value() - 10)
             if evt.key() == Qt.Key_Left:
                 if self.start_button.isEnabled():
-                    self.word_slider.setValue(self.word_slider.value() - 1)
+                    if evt.modifiers() & Qt.ShiftModifier:
+                        self.set_current_word_index.emit(self.word_slider.value() - 2)
+                    else:
+                        self.skip(self.skip_sentences, -1)
             if evt.key() == Qt.Key_Right:
                 if self.start_button.isEnabled():
-                    self.word_slider.setValue(self.word_slider.value() + 1)
+                    if evt.modifiers() & Qt.ShiftModifier:
+                        self.set_current_word_index.emit(self.word_slider.value())
+                    else:
+                        self.skip(self.skip_sentences, 1)
+            if evt.key() == Qt.Key_PageUp:
+                if self.start_button.isEnabled():
+                    self.skip(self.skip_chapters, -1)
+            if evt.key() == Qt.Key_PageDown:
+                if self.start_button.isEnabled():
+                    self.skip(self.skip_chapters, 1)
+            if evt.key() == Qt.Key_I:
+                self.toggle_stats_overlay()
+            if evt.key() == Qt.Key_L:
+                self.show_library()
+            if evt.key() == Qt.Key_F:
+                self.show_search()
         if evt.key() == Qt.Key_Backspace:
             if self.start_button.isEnabled():
                 self.reset()
@@ -0,0 +1,40 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from SearchIndex import SearchIndex
+
+
+class IndexBuilder(QThread):
+    built = pyqtSignal(object, object)
+
+    def __init__(self, documents, words, document_id=None):
+        """
+        Implements QThread to build the search index of a text off of the gui thread, or read back the one kept by the
+        document store for a stored document. Emits built with the words and their index.
+        :param DocumentStore documents: The program's document store
+        :param TokenStore words: The words of the text
+        :param str document_id: ID of the text in the document store, if it is stored
+        """
+        self.documents = documents
+        self.words = words
+        self.document_id = document_id
+
+        super().__init__()
+
+    def run(self):
+        """
+        Reads back or builds the index
+        :return:
+        """
+        index = None
+        if self.document_id:
+            index = self.documents.load_search_index(self.document_id)
+            if index is not None and index.num_words != len(self.words):
+                index = None
+
+        if index is None:
+            index = SearchIndex()
+            index.build(self.words)
+            if self.document_id:
+                self.documents.save_search_index(self.document_id, index)
+
+        self.built.emit(self.words, index)
@@ -0,0 +1,128 @@
+import sqlite3
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    source TEXT,
+    num_words INTEGER NOT NULL,
+    current_word INTEGER NOT NULL DEFAULT 0,
+    wpm INTEGER,
+    added REAL NOT NULL,
+    opened REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS documents_opened ON documents (opened);
+'''
+COLUMNS = ('document_id', 'title', 'source', 'num_words', 'current_word', 'wpm', 'added', 'opened', 'pinned')
+
+
+class Library:
+    def __init__(self, data_dir):
+        """
+        Keeps an index of the documents the user has read in an SQLite database: each document's title, where it came
+        from, its length, the word the user was on and the speed they were reading it at. The words themselves stay in
+        the DocumentStore, under the same document IDs, so listing and searching the library never touches them.
+        Documents the user hasn't pinned leave the library when the document store removes them to make room.
+        :param str data_dir: The program's data directory
+        """
+        self.connection = sqlite3.connect(data_dir + '/library.db')
+        self.connection.executescript(SCHEMA)
+        # libraries made before documents could be pinned
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(documents)')}
+        if 'pinned' not in columns:
+            with self.connection:
+                self.connection.execute('ALTER TABLE documents ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0')
+
+    def add(self, document_id, title, num_words, source=None):
+        """
+        Method to add a document to the library, or mark it as just opened if it is already there
+        :param str document_id: ID of the document in the document store
+        :param str title: Title to list the document under
+        :param int num_words: Number of words in the document
+        :param str source: File the document was imported from
+        :return:
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO documents (document_id, title, source, num_words, added, opened) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (document_id, title, source, num_words, now, now)
+            )
+            self.connection.execute('UPDATE documents SET opened = ? WHERE document_id = ?', (now, document_id))
+
+    def get(self, document_id):
+        """
+        Method to look up a document in the library
+        :param str document_id: ID of the document
+        :return: Dictionary of the document's columns, or None if it isn't in the library
+        """
+        row = self.connection.execute(
+            'SELECT ' + ', '.join(COLUMNS) + ' FROM documents WHERE document_id = ?', (document_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def documents(self, search=None):
+        """
+        Method to list the documents in the library, the most recently opened first
+        :param str search: Only list documents with this in their title or file name
+        :return: List of dictionaries of the documents' columns
+        """
+        query = 'SELECT ' + ', '.join(COLUMNS) + ' FROM documents'
+        parameters = ()
+        if search:
+            # LIKE wildcards typed by the user are matched literally
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query += " WHERE title LIKE ? ESCAPE '\\' OR source LIKE ? ESCAPE '\\'"
+            parameters = (pattern, pattern)
+        query += ' ORDER BY opened DESC'
+        return [dict(zip(COLUMNS, row)) for row in self.connection.execute(query, parameters)]
+
+    def pinned_ids(self):
+        """
+        Method to get the IDs of the documents the user has pinned, which the document store must keep
+        :return: Set of document IDs
+        """
+        return {row[0] for row in self.connection.execute('SELECT document_id FROM documents WHERE pinned')}
+
+    def set_pinned(self, document_id, pinned):
+        """
+        Method to pin a document, so that it is never removed to make room for others, or unpin it
+        :param str document_id: ID of the document
+        :param bool pinned: Whether the document is to be pinned
+        :return:
+        """
+        with self.connection:
+            self.connection.execute(
+                'UPDATE documents SET pinned = ? WHERE document_id = ?', (int(pinned), document_id))
+
+    def set_position(self, document_id, current_word, wpm):
+        """
+        Method to remember where the user is in a document and how fast they are reading it
+        :param str document_id: ID of the document
+        :param int current_word: Index of the word the user is on
+        :param int wpm: Reading speed in words per minute
+        :return:
+        """
+        with self.connection:
+            self.connection.execute(
+                'UPDATE documents SET current_word = ?, wpm = ? WHERE document_id = ?',
+                (current_word, wpm, document_id)
+            )
+
+    def remove(self, document_id):
+        """
+        Method to take a document out of the library. The document store is left alone.
+        :param str document_id: ID of the document
+        :return:
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM documents WHERE document_id = ?', (document_id,))
+
+    def close(self):
+        """
+        Method to close the library's database
+        :return:
+        """
+        self.connection.close()
@@ -0,0 +1,163 @@
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QTableWidget, QTableWidgetItem, \
+    QPushButton, QHeaderView, QAbstractItemView
+
+
+class LibraryDialog(QDialog):
+    def __init__(self, gui):
+        """
+        Implements QDialog to let the user search the library and pick a document to read, remove, or pin so that it
+        is kept when room is made for others. Everything shown comes from the library's index, so no document is
+        opened until one is picked.
+        :param GUI gui: The current instance of GUI
+        """
+        super().__init__()
+        self.gui = gui
+
+        self.setWindowTitle('Library')
+        self.setModal(True)
+        self.resize(700, 450)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Search titles and file names')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.refresh)
+        layout.addWidget(self.search_edit)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(['Title', 'Words', 'Read', 'Last Opened', 'Pinned'])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.itemDoubleClicked.connect(self.open_selected)
+        self.table.itemSelectionChanged.connect(self.selection_changed)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        layout.addLayout(button_layout)
+
+        self.remove_button = QPushButton('Remove')
+        self.remove_button.pressed.connect(self.remove_selected)
+        button_layout.addWidget(self.remove_button)
+
+        self.pin_button = QPushButton('Pin')
+        self.pin_button.pressed.connect(self.pin_selected)
+        button_layout.addWidget(self.pin_button)
+        button_layout.addStretch()
+
+        self.open_button = QPushButton('Open')
+        self.open_button.setDefault(True)
+        self.open_button.pressed.connect(self.open_selected)
+        button_layout.addWidget(self.open_button)
+
+        close_button = QPushButton('Close')
+        close_button.pressed.connect(self.reject)
+        button_layout.addWidget(close_button)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Method to fill the table with the documents matching the search box
+        :return:
+        """
+        documents = self.gui.library.documents(self.search_edit.text().strip())
+        self.table.setRowCount(len(documents))
+        for row, document in enumerate(documents):
+            title_item = QTableWidgetItem(document['title'])
+            title_item.setData(Qt.UserRole, document['document_id'])
+            title_item.setData(Qt.UserRole + 1, bool(document['pinned']))
+            if document['source']:
+                title_item.setToolTip(document['source'])
+            self.table.setItem(row, 0, title_item)
+
+            words_item = QTableWidgetItem('{:,}'.format(document['num_words']))
+            words_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, 1, words_item)
+
+            progress = 100 * document['current_word'] // max(document['num_words'], 1)
+            progress_item = QTableWidgetItem(str(progress) + '%')
+            progress_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, 2, progress_item)
+
+            opened = time.strftime('%Y-%m-%d %H:%M', time.localtime(document['opened']))
+            self.table.setItem(row, 3, QTableWidgetItem(opened))
+
+            pinned_item = QTableWidgetItem('Yes' if document['pinned'] else '')
+            pinned_item.setTextAlignment(Qt.AlignCenter)
+            self.table.setItem(row, 4, pinned_item)
+
+        self.table.resizeColumnsToContents()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        if documents:
+            self.table.selectRow(0)
+        self.selection_changed()
+
+    def selected_document(self):
+        """
+        Method to get the document selected in the table
+        :return: ID of the document, or None if nothing is selected
+        """
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.table.item(rows[0].row(), 0).data(Qt.UserRole)
+
+    def selection_changed(self):
+        """
+        Method to enable the buttons that act on a document only while one is selected, and label the pin button for
+        the selected document
+        :return:
+        """
+        enabled = self.selected_document() is not None
+        self.open_button.setEnabled(enabled)
+        self.remove_button.setEnabled(enabled)
+        self.pin_button.setEnabled(enabled)
+        self.pin_button.setText('Unpin' if enabled and self.selected_pinned() else 'Pin')
+
+    def selected_pinned(self):
+        """
+        Method to check whether the document selected in the table is pinned
+        :return: True if it is
+        """
+        rows = self.table.selectionModel().selectedRows()
+        return bool(rows) and self.table.item(rows[0].row(), 0).data(Qt.UserRole + 1)
+
+    def open_selected(self):
+        """
+        Method called when the user opens a document, switching to it and closing the dialog
+        :return:
+        """
+        document_id = self.selected_document()
+        if document_id:
+            self.accept()
+            self.gui.open_library_document(document_id)
+
+    def remove_selected(self):
+        """
+        Method called when the user removes a document from the library
+        :return:
+        """
+        document_id = self.selected_document()
+        if document_id:
+            self.gui.remove_document.emit(document_id)
+            self.refresh()
+
+    def pin_selected(self):
+        """
+        Method called when the user pins or unpins a document, keeping the selection on it
+        :return:
+        """
+        document_id = self.selected_document()
+        if document_id:
+            self.gui.pin_document.emit(document_id, not self.selected_pinned())
+            self.refresh()
+            for row in range(self.table.rowCount()):
+                if self.table.item(row, 0).data(Qt.UserRole) == document_id:
+                    self.table.selectRow(row)
@@ -1,29 +1,39 @@
-from PyQt5.QtWidgets import QMenu, QAction
+from PyQt5.QtWidgets import QMenu, QAction, QActionGroup
+
+# chunk sizes, in words, and chunk character limits offered in the menu; 1 word and 0 characters mean off
+CHUNK_WORDS = (1, 2, 3, 4, 5)
+CHUNK_CHARACTERS = (0, 16, 24, 32)
 
 
 class OptionsMenu(QMenu):
     def __init__(self, gui):
         """
-        Implements QMenu to provide a popup menu for the settings button in GUI
+        Implements QMenu to provide a popup menu for the settings button in GUI. The actions are created the first
+        time the menu is about to be shown, so that starting the program doesn't wait for them.
         :param GUI gui: The current instance of GUI
         """
         self.gui = gui
+        self.created = False
         super().__init__()
-        self.create_menu()
+        self.aboutToShow.connect(self.create_menu)
 
     def create_menu(self):
         """
-        Method to add all of the actions to this menu
+        Method to add all of the actions to this menu, if they haven't been added already
         :return:
         """
+        if self.created:
+            return
+        self.created = True
+
         change_font_action = QAction(self.gui.options_button)
-        change_font_action.setIcon(self.gui.icons['font'])
+        change_font_action.setIcon(self.gui.icon('font'))
         change_font_action.setText('&Change Font')
         change_font_action.triggered.connect(self.gui.change_font)
         self.addAction(change_font_action)
 
         change_background_menu = self.addMenu('Change Background')
-        change_background_menu.setIcon(self.gui.icons['background'])
+        change_background_menu.setIcon(self.gui.icon('background'))
         self.addMenu(change_background_menu)
 
         background_white_action = QAction(self.gui.options_button)
@@ -47,20 +57,131 @@ class OptionsMenu(QMenu):
         change_background_menu.addAction(background_black_action)
 
         self.pause_punctuation_action = QAction(self.gui.options_button)
-        self.pause_punctuation_action.setIcon(self.gui.icons['punctuation_off'])
         self.pause_punctuation_action.setText('&Pause for Punctuation')
         self.pause_punctuation_action.triggered.connect(self.gui.pause_for_punctuation)
         self.pause_punctuation_action.setCheckable(True)
         self.addAction(self.pause_punctuation_action)
 
         self.group_words_action = QAction(self.gui.options_button)
-        self.group_words_action.setIcon(self.gui.icons['combine_off'])
         self.group_words_action.setText('&Combine Small Words')
         self.group_words_action.triggered.connect(self.gui.combine_words)
         self.group_words_action.setCheckable(True)
         self.addAction(self.group_words_action)
 
+        self.adaptive_pacing_action = QAction(self.gui.options_button)
+        self.adaptive_pacing_action.setText('&Adaptive Pacing')
+        self.adaptive_pacing_action.setToolTip('Show long, rare and clause-ending words for longer and common words '
+                                               'for less, at the same average speed')
+        self.adaptive_pacing_action.triggered.connect(self.gui.toggle_adaptive_pacing)
+        self.adaptive_pacing_action.setCheckable(True)
+        self.addAction(self.adaptive_pacing_action)
+
+        chunk_menu = self.addMenu('Chunk Mode')
+        chunk_words_group = QActionGroup(chunk_menu)
+        self.chunk_words_actions = {}
+        for chunk_words in CHUNK_WORDS:
+            action = QAction(self.gui.options_button)
+            if chunk_words == 1:
+                action.setText('&Off')
+            else:
+                action.setText('&' + str(chunk_words) + ' Words')
+            action.setCheckable(True)
+            action.triggered.connect(lambda checked, value=chunk_words: self.gui.change_chunking(chunk_words=value))
+            chunk_words_group.addAction(action)
+            chunk_menu.addAction(action)
+            self.chunk_words_actions[chunk_words] = action
+
+        chunk_menu.addSeparator()
+        chunk_characters_group = QActionGroup(chunk_menu)
+        self.chunk_characters_actions = {}
+        for chunk_characters in CHUNK_CHARACTERS:
+            action = QAction(self.gui.options_button)
+            if chunk_characters == 0:
+                action.setText('No Character Limit')
+            else:
+                action.setText('Up to ' + str(chunk_characters) + ' Characters')
+            action.setCheckable(True)
+            action.triggered.connect(
+                lambda checked, value=chunk_characters: self.gui.change_chunking(chunk_characters=value))
+            chunk_characters_group.addAction(action)
+            chunk_menu.addAction(action)
+            self.chunk_characters_actions[chunk_characters] = action
+
+        engine_menu = self.addMenu('Playback Engine')
+        engine_group = QActionGroup(engine_menu)
+
+        self.thread_engine_action = QAction(self.gui.options_button)
+        self.thread_engine_action.setText('&Reading Thread')
+        self.thread_engine_action.setCheckable(True)
+        self.thread_engine_action.triggered.connect(lambda: self.gui.change_engine('thread'))
+        engine_group.addAction(self.thread_engine_action)
+        engine_menu.addAction(self.thread_engine_action)
+
+        self.timer_engine_action = QAction(self.gui.options_button)
+        self.timer_engine_action.setText('&Precise Timer')
+        self.timer_engine_action.setCheckable(True)
+        self.timer_engine_action.triggered.connect(lambda: self.gui.change_engine('timer'))
+        engine_group.addAction(self.timer_engine_action)
+        engine_menu.addAction(self.timer_engine_action)
+
+        self.chapter_slider_action = QAction(self.gui.options_button)
+        self.chapter_slider_action.setText('Slider Covers Current C&hapter')
+        self.chapter_slider_action.setCheckable(True)
+        self.chapter_slider_action.triggered.connect(self.gui.toggle_chapter_slider)
+        self.addAction(self.chapter_slider_action)
+
+        self.addSeparator()
+
+        self.show_stats_action = QAction(self.gui.options_button)
+        self.show_stats_action.setText('&Show Playback Stats')
+        self.show_stats_action.setCheckable(True)
+        self.show_stats_action.triggered.connect(self.gui.toggle_stats_overlay)
+        self.addAction(self.show_stats_action)
+
+        export_stats_action = self.addAction('&Export Playback Stats...')
+        export_stats_action.triggered.connect(self.gui.export_stats)
+
         self.addSeparator()
 
         help_action = self.addAction('Help')
         help_action.triggered.connect(self.gui.show_help)
+
+        self.update_actions()
+
+    def update_actions(self):
+        """
+        Method to bring the icons and checked states of the actions in line with the gui's current settings. Does
+        nothing until the menu has been created.
+        :return:
+        """
+        if not self.created:
+            return
+
+        gui = self.gui
+        if gui.punctuation_pause:
+            self.pause_punctuation_action.setIcon(gui.icon('punctuation_on'))
+        else:
+            self.pause_punctuation_action.setIcon(gui.icon('punctuation_off'))
+
+        if gui.group_words:
+            self.group_words_action.setIcon(gui.icon('combine_on'))
+        else:
+            self.group_words_action.setIcon(gui.icon('combine_off'))
+
+        self.adaptive_pacing_action.setChecked(gui.adaptive_pacing)
+
+        if gui.chunk_words in self.chunk_words_actions:
+            self.chunk_words_actions[gui.chunk_words].setChecked(True)
+        if gui.chunk_characters in self.chunk_characters_actions:
+            self.chunk_characters_actions[gui.chunk_characters].setChecked(True)
+        # a character limit only applies to chunks
+        for action in self.chunk_characters_actions.values():
+            action.setEnabled(gui.chunk_words > 1)
+
+        if gui.engine == 'timer':
+            self.timer_engine_action.setChecked(True)
+        else:
+            self.thread_engine_action.setChecked(True)
+
+        self.chapter_slider_action.setChecked(gui.chapter_slider)
+        self.show_stats_action.setChecked(gui.stats_timer.isActive())
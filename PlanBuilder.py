@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class PlanBuilder(QThread):
+    built = pyqtSignal(object)
+
+    def __init__(self, plan, options, word_num, documents=None, document_id=None):
+        """
+        Implements QThread to replan a text with new reading options off of the gui thread, so that the window doesn't
+        freeze while a long text is replanned. A copy of the plan being read is replanned from the frame with word_num
+        onward and emitted with built, to be swapped in for the plan being read, which is left alone meanwhile. A plan
+        without any frames yet, such as that of a document opened without a plan kept for it, is planned in full, and
+        kept in the document store for next time.
+        :param ReadingPlan plan: The plan being read
+        :param tuple options: The new reading options, as in ReadingPlan.options()
+        :param int word_num: Index of the word the reader is on
+        :param DocumentStore documents: The program's document store, if the text is a stored document
+        :param str document_id: ID of the document
+        """
+        self.plan = plan.copy()
+        self.options = options
+        self.word_num = word_num
+        self.documents = documents
+        self.document_id = document_id
+        # words added to the text while the plan is being made are planned when it is swapped in
+        self.num_words = len(plan.words)
+        self.whole_plan = len(plan) == 0
+
+        super().__init__()
+
+    def run(self):
+        """
+        Replans the copy
+        :return:
+        """
+        self.plan.set_options(*self.options, word_num=self.word_num)
+        if self.whole_plan:
+            if len(self.plan) == 0:
+                self.plan.rebuild_from(0)
+            if self.document_id:
+                self.documents.save_plan(self.document_id, self.plan)
+        self.built.emit(self.plan)
@@ -0,0 +1,71 @@
+import time
+from array import array
+
+
+class PlaybackClock:
+    # the final stretch of every wait is spun instead of slept, since sleep() can overshoot by a full scheduler tick
+    spin_threshold = 0.002
+    # if a frame ends up this late (i.e. the machine stalled), start counting from now instead of rushing to catch up
+    resync_threshold = 0.25
+
+    def __init__(self):
+        """
+        Provides absolute, deadline-based pacing for the reading loop. Each frame's deadline is the previous deadline
+        plus that frame's delay, so the time spent emitting and painting a word is absorbed by the next wait rather
+        than being added to it, and no drift accumulates over the length of a text.
+        """
+        self.next_deadline = None
+        self.lateness = array('d')
+
+    def start(self):
+        """
+        Method to begin a new run of frames, anchoring the first deadline to the current time and clearing the
+        lateness recorded for any previous run.
+        :return:
+        """
+        self.next_deadline = time.perf_counter()
+        self.lateness = array('d')
+
+    def frame_shown(self):
+        """
+        Method to be called as soon as a frame has been sent to the display. Records how late it is relative to its
+        deadline.
+        :return: Lateness of the frame, in seconds
+        """
+        late = time.perf_counter() - self.next_deadline
+        self.lateness.append(late)
+        if late > self.resync_threshold:
+            self.next_deadline += late
+        return late
+
+    def advance(self, delay):
+        """
+        Method to advance the deadline by the given delay without waiting for it
+        :param float delay: How long the current frame should be shown, in seconds
+        :return: Time left until the new deadline, in seconds
+        """
+        self.next_deadline += delay
+        return self.next_deadline - time.perf_counter()
+
+    def wait(self, delay):
+        """
+        Method to advance the deadline by the given delay and block until it is reached
+        :param float delay: How long the current frame should be shown, in seconds
+        :return:
+        """
+        remaining = self.advance(delay)
+        if remaining > self.spin_threshold:
+            time.sleep(remaining - self.spin_threshold)
+        while time.perf_counter() < self.next_deadline:
+            time.sleep(0)
+
+    def spin(self):
+        """
+        Method to block for whatever is left before the deadline, for callers that have already slept or been woken
+        up by a timer to within spin_threshold of it
+        :return:
+        """
+        if self.next_deadline - time.perf_counter() > self.spin_threshold:
+            return
+        while time.perf_counter() < self.next_deadline:
+            time.sleep(0)
@@ -0,0 +1,103 @@
+import os
+import struct
+import zlib
+
+# a record is the document's ID, as the 20 bytes of its SHA-1, the word the user is on and their reading speed,
+# followed by a CRC-32 of the three
+RECORD = struct.Struct('<20sII')
+RECORD_SIZE = RECORD.size + 4
+# records the journal may hold before it should be compacted into the settings file
+COMPACT_RECORDS = 1024
+
+
+def replace_file(path, data):
+    """
+    Function to write a file so that it is either entirely the old version or entirely the new one, whenever the
+    program or the computer stops: the new version is written alongside, flushed to disk, and then swapped in
+    :param str path: Path to the file
+    :param bytes data: The file's new contents
+    :return:
+    """
+    with open(path + '.tmp', 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+
+
+class ProgressJournal:
+    def __init__(self, path):
+        """
+        An append-only file of where the user is in what they are reading, added to every few seconds while they read
+        so that a crash or power cut loses no more than that. Each record is a few dozen bytes written to the end of
+        the file, and is checked on the way back in, so a record torn by a crash is simply left off. The journal is
+        compacted by writing what it says into the settings file and emptying it.
+        :param str path: Path to the journal file
+        """
+        self.path = path
+        self.file = open(path, 'ab', buffering=0)
+        self.num_records = self.file.tell() // RECORD_SIZE
+        self.last_record = None
+
+    def __len__(self):
+        return self.num_records
+
+    def record(self, document_id, current_word, wpm):
+        """
+        Method to add the user's position to the journal, unless it is the same as the last one added
+        :param str document_id: ID of the document being read
+        :param int current_word: Index of the word the user is on
+        :param int wpm: Reading speed in words per minute
+        :return: True if a record was written
+        """
+        data = RECORD.pack(bytes.fromhex(document_id), current_word, wpm)
+        if data == self.last_record:
+            return False
+
+        self.file.write(data + struct.pack('<I', zlib.crc32(data)))
+        os.fsync(self.file.fileno())
+        self.last_record = data
+        self.num_records += 1
+        return True
+
+    def replay(self):
+        """
+        Method to read back the journal, up to the end or the first record that was only partly written
+        :return: List of (document ID, word index, wpm) tuples, oldest first
+        """
+        with open(self.path, 'rb') as file:
+            data = file.read()
+
+        records = []
+        for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+            record = data[offset:offset + RECORD.size]
+            (crc,) = struct.unpack_from('<I', data, offset + RECORD.size)
+            if zlib.crc32(record) != crc:
+                break
+            document_id, current_word, wpm = RECORD.unpack(record)
+            records.append((document_id.hex(), current_word, wpm))
+        return records
+
+    def full(self):
+        """
+        Method to check whether the journal has grown enough to be compacted
+        :return: True if it has
+        """
+        return self.num_records >= COMPACT_RECORDS
+
+    def clear(self):
+        """
+        Method to empty the journal, once what it holds has been saved elsewhere
+        :return:
+        """
+        self.file.truncate(0)
+        os.fsync(self.file.fileno())
+        self.last_record = None
+        self.num_records = 0
+
+    def close(self):
+        """
+        Method to close the journal's file
+        :return:
+        """
+        self.file.close()
@@ -0,0 +1,393 @@
+from bisect import bisect_left, bisect_right
+
+from FrameStats import FrameStats
+from PlaybackClock import PlaybackClock
+from ReadingPlan import ReadingPlan, INITIAL_SLOWDOWN
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+# lengths of reading session, in minutes, to show how far each would get
+SESSION_MINUTES = (10, 30, 60)
+# most words shown on either side of a word in the sentence around it, so that a very long sentence costs no more
+SENTENCE_CONTEXT_WORDS = 20
+
+
+def duration_text(minutes):
+    """
+    Function to write out a length of time
+    :param float minutes: The length of time, in minutes
+    :return: The time as 'h:mm:ss', or 'less than 1 minute'
+    """
+    seconds = int(minutes * 60)
+    if seconds < 60:
+        return 'less than 1 minute'
+    return '{}:{:02}:{:02}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+class ReadingCore:
+    def __init__(self):
+        """
+        The reading engine without any user interface: holds the text, the reading plan, the reader's position and
+        speed, and hands out the frames to show one at a time, each with how long it should stay up. It doesn't
+        import Qt, so the Qt gui and the command line both drive it, each showing the frames and waiting in its own
+        way.
+        """
+        self.words = None
+        self.plan = ReadingPlan()
+        self.clock = PlaybackClock()
+        self.frame_stats = FrameStats()
+        self.current_word = 0
+        self.wpm = 200
+        self.reading_speed = 60 / self.wpm
+        # whether more of the text is still on its way, so reaching the end of the plan means waiting for it
+        self.text_loading = False
+        # whether the plan is still being made elsewhere, so reaching its end means waiting for the rest of it
+        self.plan_loading = False
+
+        self.frame_num = 0
+        self.slowdown_frame = 0
+        self.last_frame = None
+        # the plan frame_num counts frames of, which is the plan being read unless it has just been replaced
+        self.frames_plan = self.plan
+
+    def __len__(self):
+        return len(self.words) if self.words else 0
+
+    def set_text(self, text):
+        """
+        Method to clean and tokenize a text and make it the text being read, from the beginning
+        :param str text: The text
+        :return:
+        """
+        token_store = TokenStore()
+        token_store.mark_chapter()
+        tokenize(text, token_store)
+        if len(token_store) == 0:
+            token_store.extend([''])
+        self.load_words(token_store)
+
+    def load_words(self, token_store, plan=None):
+        """
+        Method to make already tokenized words the text being read, from the beginning
+        :param TokenStore token_store: The words
+        :param ReadingPlan plan: A plan of the words made ahead of time, such as on another thread. Any options changed
+            since it was made are applied to it.
+        :return:
+        """
+        self.words = token_store
+        if plan is None:
+            self.plan.set_words(token_store)
+        else:
+            current = self.plan
+            plan.set_options(*current.options())
+            self.plan = plan
+        self.current_word = 0
+
+    def append_text(self, text, new_chapter=True):
+        """
+        Method to clean and tokenize a text and add it to the end of the text being read
+        :param str text: The text
+        :param bool new_chapter: Whether the text starts a new chapter, rather than going on with the last one. Text
+            going on with the last chapter must not start partway through a word.
+        :return:
+        """
+        if not self.words:
+            self.set_text(text)
+            return
+
+        num_words = len(self.words)
+        if new_chapter:
+            self.words.mark_chapter()
+        tokenize(text, self.words)
+        self.plan.rebuild_from(num_words - 1)
+
+    def append_words(self, token_store):
+        """
+        Method to add words tokenized elsewhere, such as on an importer's thread, to the end of the text being read,
+        planning only the new words
+        :param TokenStore token_store: The words, which go on with the last chapter unless they start with a chapter
+            of their own
+        :return:
+        """
+        if not self.words:
+            self.load_words(token_store)
+            return
+
+        num_words = len(self.words)
+        self.words.extend_store(token_store)
+        self.plan.rebuild_from(num_words - 1)
+
+    def set_speed(self, wpm):
+        """
+        Method to set the reading speed
+        :param int wpm: Reading speed in words per minute
+        :return:
+        """
+        self.wpm = wpm
+        self.reading_speed = 60 / wpm
+
+    def set_options(self, group_words, punctuation_pause, chunk_words=1, chunk_characters=0, adaptive_pacing=False):
+        """
+        Method to change how words are grouped into frames and how long they stay up, replanning from the current word
+        onward
+        :param bool group_words: Whether to combine small words with the word after them
+        :param bool punctuation_pause: Whether to pause longer on words containing punctuation
+        :param int chunk_words: Number of words to show in each frame, or 1 to show words singly
+        :param int chunk_characters: Most characters a chunk may take up, or 0 for no limit
+        :param bool adaptive_pacing: Whether to pace each frame by how long its words take to take in
+        :return:
+        """
+        self.plan.set_options(
+            group_words, punctuation_pause, chunk_words, chunk_characters, adaptive_pacing, self.current_word)
+
+    def replace_plan(self, plan):
+        """
+        Method to switch to a plan of the same words made elsewhere, such as with new options on another thread. It can
+        be switched to while frames are being handed out; the reader finds its place in it before the next frame.
+        :param ReadingPlan plan: The new plan
+        :return:
+        """
+        self.plan = plan
+
+    def follow_plan(self):
+        """
+        Method to find the reader's place again in a plan that has replaced the one frames were being handed out from.
+        Only called by whatever is handing out frames, so frame_num is never changed under it.
+        :return: The plan being read
+        """
+        plan = self.plan
+        if plan is not self.frames_plan:
+            self.frames_plan = plan
+            if self.last_frame:
+                start, count = self.last_frame
+                self.frame_num = bisect_left(plan.frames[0], start + count)
+            else:
+                self.frame_num = plan.frame_at(self.current_word)
+        return plan
+
+    def seek(self, word_num):
+        """
+        Method to move the reader to a word
+        :param int word_num: Index of the word, which is kept within the text
+        :return: The word the reader is now on
+        """
+        self.current_word = max(0, min(word_num, len(self) - 1))
+        return self.current_word
+
+    def word(self, word_num=None):
+        """
+        Method to get a word of the text
+        :param int word_num: Index of the word, defaulting to the current word
+        :return: The word
+        """
+        return self.words[self.current_word if word_num is None else word_num]
+
+    def boundary(self, starts, step):
+        """
+        Method to find the start of a sentence or chapter relative to the current word, by bisecting a sorted table
+        of starts
+        :param starts: Sorted indices of the words that start each sentence or chapter
+        :param int step: How many to move: -1 to go back to the start of the one the reader is in, or to the one
+            before if the reader is already at its start, 1 to go forward to the next one, and so on
+        :return: Index of the word to move to
+        """
+        if step < 0:
+            i = bisect_left(starts, self.current_word) + step
+            return starts[i] if i >= 0 else 0
+        i = bisect_right(starts, self.current_word) + step - 1
+        if i < len(starts) and starts[i] < len(self):
+            return starts[i]
+        return self.current_word
+
+    def sentence_boundary(self, step):
+        """
+        Method to find the start of a sentence relative to the current word
+        :param int step: -1 for the start of the current sentence or else the previous one, 1 for the next, and so on
+        :return: Index of the word to move to
+        """
+        return self.boundary(self.words.sentences, step) if self.words else 0
+
+    def chapter_boundary(self, step):
+        """
+        Method to find the start of a chapter relative to the current word
+        :param int step: -1 for the start of the current chapter or else the previous one, 1 for the next, and so on
+        :return: Index of the word to move to
+        """
+        return self.boundary(self.words.chapters, step) if self.words else 0
+
+    def sentence_context(self, word_num):
+        """
+        Method to get the sentence a word is in, such as to preview a place in the text before moving to it
+        :param int word_num: Index of the word
+        :return: Tuple of the words of the sentence before the word, the word, and the words after it, with '...' where
+            the sentence has been cut short
+        """
+        sentences = self.words.sentences
+        i = bisect_right(sentences, word_num)
+        sentence_start = sentences[i - 1]
+        sentence_stop = min(sentences[i], len(self)) if i < len(sentences) else len(self)
+
+        start = max(sentence_start, word_num - SENTENCE_CONTEXT_WORDS)
+        stop = min(sentence_stop, word_num + 1 + SENTENCE_CONTEXT_WORDS)
+        before = self.words[start:word_num]
+        after = self.words[word_num + 1:stop]
+        if start > sentence_start:
+            before = '...' + before
+        if stop < sentence_stop:
+            after += '...'
+        return before, self.words[word_num], after
+
+    def start(self):
+        """
+        Method to begin handing out frames from the current word, easing the reader up to speed over the first few
+        :return:
+        """
+        self.frames_plan = self.plan
+        self.frame_num = self.plan.frame_at(self.current_word)
+        self.slowdown_frame = 0
+        self.last_frame = None
+        self.clock.start()
+        self.frame_stats.start_run()
+
+    def resume(self):
+        """
+        Method to pick up the pace again after waiting for more of the text to arrive, without easing up to speed again
+        :return:
+        """
+        self.clock.start()
+        self.frame_stats.start_run()
+
+    def next_frame(self):
+        """
+        Method to get the next frame to show. The frame is due at clock.next_deadline; the caller shows it, calls
+        clock.frame_shown(), and then waits out its delay with clock.wait() or clock.advance().
+        :return: The frame's text, the index of its first word, its number of words and its delay in seconds, or None
+            at the end of the plan
+        """
+        plan = self.follow_plan()
+        if self.frame_num >= len(plan):
+            return None
+
+        word, start, count, weight = plan.frame(self.frame_num)
+        self.current_word = start
+        self.last_frame = (start, count)
+        self.frame_num += 1
+
+        delay = self.reading_speed * weight
+        if self.slowdown_frame < len(INITIAL_SLOWDOWN):
+            delay = delay * INITIAL_SLOWDOWN[self.slowdown_frame]
+            self.slowdown_frame += 1
+
+        self.frame_stats.record_frame(self.clock.next_deadline, count, delay)
+        return word, start, count, delay
+
+    def upcoming_texts(self, count):
+        """
+        Method to get the text of the frames after the one last handed out
+        :param int count: Number of frames
+        :return: List of the frames' texts
+        """
+        return self.frames_plan.frame_texts(self.frame_num, count)
+
+    def stop(self):
+        """
+        Method to stop handing out frames, moving the reader past the last frame shown so that reading picks up where
+        it left off
+        :return: The word the reader is now on
+        """
+        if self.last_frame:
+            start, count = self.last_frame
+            self.seek(start + count)
+            self.last_frame = None
+        return self.current_word
+
+    def at_end(self):
+        """
+        Method to check whether every frame has been handed out and no more text is coming
+        :return: True at the end of the text
+        """
+        return self.frame_num >= len(self.follow_plan()) and not self.more_coming()
+
+    def more_coming(self):
+        """
+        Method to check whether frames past the end of the plan are on their way, from a text still being imported or
+        a plan still being made
+        :return: True if the reader should wait for them
+        """
+        return self.text_loading or self.plan_loading
+
+    def time_remaining(self, word_num=None, stop_word=None):
+        """
+        Method to calculate the time it will take to read to a word at the current speed, from the planned delay of
+        every frame on the way, pauses and all, including the easing up to speed after starting
+        :param int word_num: Index of the word to count from, defaulting to the current word
+        :param int stop_word: Index of the word to stop before, defaulting to the end of the text
+        :return: Time remaining, in minutes
+        """
+        if word_num is None:
+            word_num = self.current_word
+        plan = self.plan
+        first = plan.frame_at(word_num)
+        stop = len(plan) if stop_word is None else bisect_left(plan.frames[0], stop_word)
+        if stop <= first:
+            return 0
+
+        weight = plan.duration(first, stop)
+        # while reading, the rest of the easing is still to come; once stopped, all of it comes again on starting
+        slowdown = INITIAL_SLOWDOWN[self.slowdown_frame:] if self.last_frame else INITIAL_SLOWDOWN
+        weights = plan.frames[2]
+        for frame_num, factor in zip(range(first, stop), slowdown):
+            weight += weights[frame_num] * (factor - 1)
+        return weight * self.reading_speed / 60
+
+    def chapter_time_remaining(self, word_num=None):
+        """
+        Method to calculate the time it will take to finish the chapter at the current speed
+        :param int word_num: Index of the word to count from, defaulting to the current word
+        :return: Time remaining, in minutes
+        """
+        if word_num is None:
+            word_num = self.current_word
+        chapters = self.words.chapters
+        chapter = bisect_right(chapters, word_num)
+        return self.time_remaining(word_num, chapters[chapter] if chapter < len(chapters) else None)
+
+    def word_after(self, minutes, word_num=None):
+        """
+        Method to find how far reading for a while at the current speed will get
+        :param float minutes: Time spent reading
+        :param int word_num: Index of the word to start from, defaulting to the current word
+        :return: Index of the word reached, or the number of words if the text is finished by then
+        """
+        if word_num is None:
+            word_num = self.current_word
+        plan = self.plan
+        frame_num = plan.frame_after(plan.frame_at(word_num), minutes * 60 / self.reading_speed)
+        return plan.frames[0][frame_num] if frame_num < len(plan) else len(self)
+
+    def time_remaining_text(self, word_num=None):
+        """
+        Method to describe the time it will take to finish reading the text, and the chapter if there are more than
+        one, at the current speed
+        :param int word_num: Index of the word to count from, defaulting to the current word
+        :return: The time remaining, as 'h:mm:ss remaining' or 'less than 1 minute remaining'
+        """
+        result = duration_text(self.time_remaining(word_num)) + ' remaining'
+        if len(self.words.chapters) > 1:
+            result += ' (' + duration_text(self.chapter_time_remaining(word_num)) + ' in chapter)'
+        return result
+
+    def sessions_text(self, word_num=None):
+        """
+        Method to describe how far reading sessions of a few lengths would get at the current speed
+        :param int word_num: Index of the word to count from, defaulting to the current word
+        :return: One line for each session length in SESSION_MINUTES
+        """
+        lines = ['At this speed:']
+        for minutes in SESSION_MINUTES:
+            word_num_after = self.word_after(minutes, word_num)
+            if word_num_after >= len(self):
+                lines.append('{} minutes finishes the text'.format(minutes))
+                break
+            lines.append('{} minutes reads to {}%'.format(minutes, 100 * word_num_after // len(self)))
+        return '\n'.join(lines)
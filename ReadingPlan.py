@@ -0,0 +1,413 @@
+import re
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, compress, islice, repeat
+from operator import add, and_, mul, or_, sub, truediv
+
+from TokenStore import TokenStore, SENTENCE_END_PATTERN, SENTENCE_END_MARK, NOT_MARK, UNMARKED_TABLE
+from WordFrequency import frequency_weights
+
+PUNCTUATION = b'.,?!;'
+FULLWIDTH_COMMA = '\uFF0C'.encode('utf-8')
+# reduces each word to one \x01 per punctuation mark, keeping the space after it
+PUNCTUATION_TABLE = bytes.maketrans(PUNCTUATION, b'\x01' * len(PUNCTUATION))
+NOT_PUNCTUATION = bytes(byte for byte in range(256) if byte not in PUNCTUATION + b' ')
+PUNCTUATED_WORD_PATTERN = re.compile(b'\x01+ ')
+UNPUNCTUATED_WORD_TABLE = bytes.maketrans(b' ', b'\x00')
+# reduces each word to one x per character, keeping the space after it; UTF-8 continuation bytes are dropped so that
+# a multi-byte character counts once
+CHARACTER_TABLE = bytes.maketrans(
+    bytes(byte for byte in range(256) if byte != ord(' ')),
+    b'x' * 255
+)
+CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+LONG_WORD_PATTERN = re.compile(b'x{4,} ')
+SHORT_WORD_PATTERN = re.compile(b'x{0,3} ')
+# a short word (flag 1) takes the word after it along with it, marking the pair 'AB'; anything else stands alone
+COMBINE_PATTERN = re.compile(b'\x01[\x00\x01]')
+FRAME_START_TABLE = bytes.maketrans(b'\x00\x01AB', b'\x01\x01\x01\x00')
+FRAME_COUNT_TABLE = bytes.maketrans(b'\x00\x01AB', b'\x01\x01\x02\x00')
+PAIR_START_TABLE = bytes.maketrans(b'\x00\x01AB', b'\x00\x00\x01\x00')
+PUNCTUATION_WEIGHT = 2.0
+# turns 0 and 1 flag bytes into letters that can each be replaced by the bytes of a float
+FLAG_LETTER_TABLE = bytes.maketrans(b'\x00\x01', b'AB')
+# adaptive pacing: how long a word takes to take in, relative to an average word, by its number of characters, the
+# last entry being for anything longer, and how much longer a word stays up for ending nothing, a clause, a sentence
+# or a chapter
+LENGTH_WEIGHTS = (0.8, 0.8, 0.85, 0.9, 0.95, 1.0, 1.0, 1.05, 1.1, 1.15, 1.2, 1.25, 1.3, 1.35, 1.4)
+LENGTH_WEIGHT_TABLE = dict(enumerate(LENGTH_WEIGHTS))
+PAUSE_WEIGHTS = (1.0, 1.5, 2.0, 3.0)
+# the end of a word that ends a clause, with any closing quotes or brackets, and the space after it. The multi-byte
+# characters, '，', '’' and '”', are matched as whole UTF-8 sequences, as their bytes on their own end other words.
+CLAUSE_END_PATTERN = re.compile(b'(?:[,;:]|\xef\xbc\x8c)(?:[\'")\\]]|\xe2\x80[\x99\x9d])* ')
+# delay multipliers for the first frames after reading starts, easing the reader up to speed
+INITIAL_SLOWDOWN = tuple(2 - 0.05 * i for i in range(20))
+# number of words looked at together while building a plan
+PLAN_CHUNK_SIZE = 65536
+# changed whenever the way frames are planned changes, so that plans kept by the document store are made again
+PLAN_VERSION = 2
+
+
+def flag_weights(flags, unflagged, flagged):
+    """
+    Function to give each of a run of frames one of two weights by a flag, the bytes of the weights being swapped in
+    for the flags with bytes.replace rather than a Python loop
+    :param bytes flags: One byte for each frame, 1 if it is flagged, else 0
+    :param float unflagged: Weight of a frame that isn't flagged
+    :param float flagged: Weight of a frame that is flagged
+    :return: Array of the weights
+    """
+    weights = array('f')
+    letters = bytes(flags).translate(FLAG_LETTER_TABLE)
+    weights.frombytes(
+        letters.replace(b'A', array('f', [unflagged]).tobytes()).replace(b'B', array('f', [flagged]).tobytes()))
+    return weights
+
+
+class ReadingPlan:
+    def __init__(self):
+        """
+        Holds the frames the reading loop walks through: the index of the first word in each frame, how many words
+        the frame shows, and how many word-delays it stays on screen. The plan is built once when the text or the
+        reading options change, so the reading loop makes no per-word decisions of its own.
+        """
+        self.words = TokenStore()
+        self.group_words = False
+        self.punctuation_pause = False
+        # words per frame in chunk mode, 1 when chunk mode is off, and the most characters a chunk may take up, 0 for
+        # no limit
+        self.chunk_words = 1
+        self.chunk_characters = 0
+        # whether frame delays follow how long their words take to take in, rather than being the same for every word
+        self.adaptive_pacing = False
+        # kept in a single tuple so that a rebuild swaps all three arrays at once for a reader on another thread
+        self.frames = (array('I'), array('B'), array('f'))
+        # running total of the weights: elapsed[i] is the weight of every frame before frame i, so the time between
+        # any two frames is one subtraction, at whatever speed
+        self.elapsed = array('d', [0.0])
+
+    def __len__(self):
+        return len(self.frames[0])
+
+    def set_words(self, words, plan_now=True):
+        """
+        Method to plan a new text from the beginning
+        :param TokenStore words: The words of the text
+        :param bool plan_now: Whether to plan the text now, rather than leave it without frames for rebuild_from() to
+            plan later, such as on another thread
+        :return:
+        """
+        self.words = words
+        self.frames = (array('I'), array('B'), array('f'))
+        self.elapsed = array('d', [0.0])
+        if plan_now:
+            self.rebuild_from(0)
+
+    def set_frames(self, words, frames):
+        """
+        Method to use frames planned earlier for a text with the current options, such as ones kept by the document
+        store, instead of planning it again
+        :param TokenStore words: The words of the text
+        :param tuple frames: The frames' first words, word counts and weights, as arrays
+        :return:
+        """
+        self.words = words
+        self.frames = frames
+        self.elapsed = array('d', accumulate(frames[2], initial=0.0))
+
+    def options(self):
+        """
+        Method to get the options the plan is made with
+        :return: Tuple of group_words, punctuation_pause, chunk_words, chunk_characters and adaptive_pacing
+        """
+        return self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters, self.adaptive_pacing
+
+    def set_options(self, group_words, punctuation_pause, chunk_words=1, chunk_characters=0, adaptive_pacing=False,
+                    word_num=0):
+        """
+        Method to change the reading options. Only the frames from word_num onward are recomputed; the frames that
+        have already been read are left alone.
+        :param bool group_words: Whether to combine small words with the word after them
+        :param bool punctuation_pause: Whether to pause longer on words containing punctuation
+        :param int chunk_words: Number of words to show in each frame, or 1 to show words singly. Chunk mode takes the
+            place of combining small words.
+        :param int chunk_characters: Most characters, including spaces, a chunk may take up, or 0 for no limit. A
+            single word longer than this still gets a frame of its own.
+        :param bool adaptive_pacing: Whether to give each frame a delay that follows how long its words take to take in
+        :param int word_num: Index of the word the reader is on
+        :return:
+        """
+        options = (group_words, punctuation_pause, chunk_words, chunk_characters, adaptive_pacing)
+        if options == self.options():
+            return
+        (self.group_words, self.punctuation_pause, self.chunk_words, self.chunk_characters,
+         self.adaptive_pacing) = options
+        self.rebuild_from(word_num)
+
+    def copy(self):
+        """
+        Method to make a copy of the plan that can be replanned without changing this one, such as on another thread
+        while this one is still being read
+        :return: The copy
+        """
+        plan = ReadingPlan()
+        (plan.group_words, plan.punctuation_pause, plan.chunk_words, plan.chunk_characters,
+         plan.adaptive_pacing) = self.options()
+        plan.words = self.words
+        plan.frames = tuple(table[:] for table in self.frames)
+        plan.elapsed = self.elapsed[:]
+        return plan
+
+    def rebuild_from(self, word_num):
+        """
+        Method to recompute the frames starting with the frame that contains word_num. Since words are only ever
+        combined with the words after them, the frames before that point are unaffected. A plan without any frames yet
+        is planned from the first word.
+        :param int word_num: Index of the first word that needs planning
+        :return:
+        """
+        starts, counts, weights = self.frames
+        keep = self.frame_at(word_num) if len(starts) > 0 else 0
+        first_word = starts[keep] if keep < len(starts) else 0
+
+        new_starts, new_counts, new_weights = self.plan_words(first_word)
+        if 0 < len(starts) == keep + 1:
+            # only the last frame is replanned, as when words are added to the end, so the arrays are added to where
+            # they are instead of being copied. A reader on another thread goes by the number of frame starts, so
+            # those are replaced last, once everything else about the new frames is in place.
+            counts[keep:] = new_counts
+            weights[keep:] = new_weights
+            self.elapsed[keep + 1:] = array('d', islice(accumulate(new_weights, initial=self.elapsed[keep]), 1, None))
+            starts[keep:] = new_starts
+            return
+
+        self.frames = (
+            starts[:keep] + new_starts,
+            counts[:keep] + new_counts,
+            weights[:keep] + new_weights
+        )
+        elapsed = self.elapsed[:keep + 1]
+        elapsed.extend(islice(accumulate(new_weights, initial=elapsed[-1]), 1, None))
+        self.elapsed = elapsed
+
+    def plan_words(self, first_word):
+        """
+        Method to build the frames for every word from first_word to the end of the text. The words' bytes are reduced
+        a chunk at a time to one flag byte per word with bytes.translate, and the frames are then derived from the flags
+        with regular expression substitution, translation tables and itertools, so no Python code runs per word. Chunk
+        mode is planned by plan_chunks(), which runs Python code for every word when chunks have a character limit.
+        :param int first_word: Index of the first word to plan
+        :return: The frame start, word count, and delay weight arrays
+        """
+        num_words = len(self.words) - first_word
+        chunking = self.chunk_words > 1
+        short_flags = bytearray()
+        punctuated = bytearray()
+        lengths = array('I')
+        for chunk_start in range(first_word, len(self.words), PLAN_CHUNK_SIZE):
+            chunk = self.words.raw(chunk_start, chunk_start + PLAN_CHUNK_SIZE)
+            if chunking:
+                if self.chunk_characters > 0:
+                    characters = chunk.translate(CHARACTER_TABLE, CONTINUATION_BYTES)
+                    lengths.extend(map(len, characters.split(b' ')[:-1]))
+            elif self.group_words:
+                characters = chunk.translate(CHARACTER_TABLE, CONTINUATION_BYTES)
+                short_flags.extend(SHORT_WORD_PATTERN.sub(b'\x01', LONG_WORD_PATTERN.sub(b'\x00', characters)))
+            if self.punctuation_pause:
+                marks = chunk.replace(FULLWIDTH_COMMA, b',').translate(PUNCTUATION_TABLE, NOT_PUNCTUATION)
+                punctuated.extend(PUNCTUATED_WORD_PATTERN.sub(b'\x01', marks).translate(UNPUNCTUATED_WORD_TABLE))
+
+        if chunking:
+            starts, counts, weights = self.plan_chunks(first_word, num_words, lengths, punctuated)
+        elif self.group_words:
+            pairs = COMBINE_PATTERN.sub(b'AB', short_flags)
+            frame_starts = pairs.translate(FRAME_START_TABLE)
+            starts = array('I', compress(range(first_word, first_word + num_words), frame_starts))
+            counts = array('B', compress(pairs.translate(FRAME_COUNT_TABLE), frame_starts))
+            if self.punctuation_pause:
+                # a pair pauses if either of its words has punctuation
+                next_punctuated = punctuated[1:] + b'\x00'
+                punctuated = bytes(compress(
+                    map(or_, punctuated, map(and_, pairs.translate(PAIR_START_TABLE), next_punctuated)),
+                    frame_starts
+                ))
+        else:
+            starts = array('I', range(first_word, first_word + num_words))
+            counts = array('B', [1]) * num_words
+
+        if not chunking:
+            if self.punctuation_pause:
+                weights = flag_weights(punctuated, 1.0, PUNCTUATION_WEIGHT)
+            else:
+                weights = array('f', [1.0]) * len(starts)
+
+        if self.adaptive_pacing and len(starts) > 0:
+            weights = self.pace(first_word, starts, counts, weights)
+
+        return starts, counts, weights
+
+    def plan_chunks(self, first_word, num_words, lengths, punctuated):
+        """
+        Method to build the frames for chunk mode, where each frame shows up to chunk_words words, fewer if they
+        wouldn't fit in chunk_characters, and stays up for as many word-delays as it has words. Without a character
+        limit the frames are laid out with range(), slicing and big integer arithmetic, with no Python code run per
+        word or frame. With one, chunks are packed greedily, each starting where the one before ended, so Python code
+        runs for every word.
+        :param int first_word: Index of the first word to plan
+        :param int num_words: Number of words to plan
+        :param array lengths: Number of characters in each word, when there is a character limit
+        :param bytearray punctuated: Flag for each word that contains punctuation, when pausing for punctuation
+        :return: The frame start, word count, and delay weight arrays
+        """
+        size = self.chunk_words
+        extra_weight = PUNCTUATION_WEIGHT - 1 if self.punctuation_pause else 0
+        if self.chunk_characters == 0:
+            starts = array('I', range(first_word, first_word + num_words, size))
+            counts = array('B', [size]) * len(starts)
+            if len(starts) == 0:
+                return starts, counts, array('f')
+            counts[-1] = first_word + num_words - starts[-1]
+
+            if self.punctuation_pause:
+                # a chunk has punctuation if any of its words does: the flags of the first words of the chunks, of the
+                # second words and so on are ORed together as big integers
+                flags = 0
+                for offset in range(size):
+                    flags |= int.from_bytes(punctuated[offset::size], 'little')
+                weights = flag_weights(flags.to_bytes(len(starts), 'little'), size, size + extra_weight)
+                weights[-1] = counts[-1] + extra_weight * (punctuated.find(1, starts[-1] - first_word) != -1)
+            else:
+                weights = array('f', counts)
+        else:
+            starts = array('I')
+            counts = array('B')
+            weights = array('f')
+            limit = self.chunk_characters
+            i = 0
+            while i < num_words:
+                count = 1
+                width = lengths[i]
+                while count < size and i + count < num_words and width + 1 + lengths[i + count] <= limit:
+                    width += 1 + lengths[i + count]
+                    count += 1
+                starts.append(first_word + i)
+                counts.append(count)
+                if extra_weight and punctuated.find(1, i, i + count) != -1:
+                    weights.append(count + extra_weight)
+                else:
+                    weights.append(count)
+                i += count
+
+        return starts, counts, weights
+
+    def pace(self, first_word, starts, counts, weights):
+        """
+        Method to share out the time of the frames from first_word on by how long their words take to take in. Longer
+        words and rarer ones, by the frequency band of the bundled word list they fall in, stay up longer and common
+        words less, and when pausing for punctuation, the last word of a clause, a sentence or a chapter stays up
+        longer still. The frames take as long in total as they did before, so the average speed is still the reading
+        speed. Like the rest of planning, the words are weighed a chunk at a time with translation tables and map(),
+        with no Python code run per word.
+        :param int first_word: Index of the first word planned
+        :param array starts: Index of the first word of each frame
+        :param array counts: Number of words in each frame
+        :param array weights: Delay weight of each frame without adaptive pacing
+        :return: The frames' new delay weights
+        """
+        words = self.words
+        word_weights = array('d')
+        # one byte for each word: 0, or the index in PAUSE_WEIGHTS of the pause for the clause, sentence or chapter it
+        # ends
+        pauses = bytearray()
+        for chunk_start in range(first_word, len(words), PLAN_CHUNK_SIZE):
+            chunk = words.raw(chunk_start, chunk_start + PLAN_CHUNK_SIZE)
+            lengths = map(len, chunk.translate(CHARACTER_TABLE, CONTINUATION_BYTES).split(b' ')[:-1])
+            length_weights = map(LENGTH_WEIGHT_TABLE.get, lengths, repeat(LENGTH_WEIGHTS[-1]))
+            word_weights.extend(map(mul, length_weights, frequency_weights(chunk)))
+            if self.punctuation_pause:
+                clause_marks = CLAUSE_END_PATTERN.sub(SENTENCE_END_MARK, chunk).translate(None, NOT_MARK)
+                sentence_marks = SENTENCE_END_PATTERN.sub(SENTENCE_END_MARK, chunk).translate(None, NOT_MARK)
+                pauses.extend(map(
+                    max,
+                    clause_marks.replace(SENTENCE_END_MARK, b'\x01').translate(UNMARKED_TABLE),
+                    sentence_marks.replace(SENTENCE_END_MARK, b'\x02').translate(UNMARKED_TABLE)
+                ))
+
+        if self.punctuation_pause:
+            # a chapter ends with the word before the next one starts
+            chapters = words.chapters
+            for chapter_start in islice(chapters, bisect_right(chapters, first_word), None):
+                pauses[chapter_start - first_word - 1] = 3
+            word_weights = array('d', map(mul, word_weights, map(PAUSE_WEIGHTS.__getitem__, pauses)))
+
+        if len(starts) == len(word_weights):
+            # a frame for every word
+            paced = word_weights
+        else:
+            # each frame takes its words' average weight times the weight it would have had for its number of words, 1
+            # word-delay for a pair and one per word for a chunk
+            totals = array('d', accumulate(word_weights, initial=0.0))
+            frame_starts = array('I', map(sub, starts, repeat(first_word)))
+            sums = map(
+                sub, map(totals.__getitem__, map(add, frame_starts, counts)), map(totals.__getitem__, frame_starts))
+            paced = array('d', sums if self.chunk_words > 1 else map(truediv, sums, counts))
+
+        scale = sum(weights) / sum(paced)
+        return array('f', map(mul, paced, repeat(scale)))
+
+    def frame_at(self, word_num):
+        """
+        Method to find the frame that shows a given word
+        :param int word_num: Index of the word
+        :return: Index of the frame
+        """
+        return max(bisect_right(self.frames[0], word_num) - 1, 0)
+
+    def duration(self, first_frame, stop_frame=None):
+        """
+        Method to get how long a run of frames stays on screen, in word-delays
+        :param int first_frame: Index of the first frame
+        :param int stop_frame: Index of the frame after the last, defaulting to the end of the plan
+        :return: Total weight of the frames
+        """
+        # the frames may be rebuilt on another thread between the caller finding its frames and this lookup
+        elapsed = self.elapsed
+        last = len(elapsed) - 1
+        if stop_frame is None or stop_frame > last:
+            stop_frame = last
+        return elapsed[stop_frame] - elapsed[min(first_frame, stop_frame)]
+
+    def frame_after(self, first_frame, weight):
+        """
+        Method to find how far a number of word-delays goes from a frame
+        :param int first_frame: Index of the frame to start from
+        :param float weight: Number of word-delays
+        :return: Index of the frame that will be showing then, or len(self) if the plan has ended by then
+        """
+        elapsed = self.elapsed
+        first_frame = min(first_frame, len(elapsed) - 1)
+        return bisect_right(elapsed, elapsed[first_frame] + weight) - 1
+
+    def frame(self, frame_num):
+        """
+        Method to get everything the reading loop needs to show a frame
+        :param int frame_num: Index of the frame
+        :return: The frame's text, the index of its first word, its number of words, and its delay weight
+        """
+        starts, counts, weights = self.frames
+        start = starts[frame_num]
+        count = counts[frame_num]
+        return self.words[start:start + count], start, count, weights[frame_num]
+
+    def frame_texts(self, frame_num, count):
+        """
+        Method to get the text of a run of frames, so that the display can get them ready before they are shown
+        :param int frame_num: Index of the first frame
+        :param int count: Number of frames
+        :return: List of the frames' texts, shorter than count near the end of the plan
+        """
+        starts, counts, weights = self.frames
+        return [
+            self.words[starts[i]:starts[i] + counts[i]]
+            for i in range(frame_num, min(frame_num + count, len(starts)))
+        ]
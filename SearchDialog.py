@@ -0,0 +1,83 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QLabel, QListWidget, QListWidgetItem
+
+
+class SearchDialog(QDialog):
+    def __init__(self, gui):
+        """
+        Implements QDialog to search the text being read for a word or phrase and jump to any of the hits. The dialog
+        isn't modal, so it can stay open while reading from one hit to the next.
+        :param GUI gui: The current instance of GUI
+        """
+        super().__init__(gui)
+        self.gui = gui
+
+        self.setWindowTitle('Find in Text')
+        self.resize(600, 400)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Word or phrase')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.refresh)
+        self.search_edit.returnPressed.connect(self.jump_to_first)
+        layout.addWidget(self.search_edit)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.results_list = QListWidget()
+        self.results_list.itemActivated.connect(self.jump_to_item)
+        layout.addWidget(self.results_list)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Method to search for what is in the search box and list the hits, each with the words around it
+        :return:
+        """
+        self.results_list.clear()
+        document_search = self.gui.document_search
+        query = self.search_edit.text()
+
+        if not document_search.ready():
+            self.status_label.setText('Indexing the text...' if document_search.words else 'No text to search')
+            return
+        if not query.strip():
+            self.status_label.setText('')
+            return
+
+        total, hits = document_search.search(query)
+        if total == 0:
+            self.status_label.setText('No matches')
+        elif total > len(hits):
+            self.status_label.setText('{:,} matches, showing the first {:,}'.format(total, len(hits)))
+        else:
+            self.status_label.setText('{:,} match'.format(total) + ('' if total == 1 else 'es'))
+
+        num_words = len(document_search.words)
+        length = len(query.split())
+        for word_num in hits:
+            item = QListWidgetItem(
+                '{:>3}%   '.format(100 * word_num // num_words) + document_search.context(word_num, length))
+            item.setData(Qt.UserRole, word_num)
+            self.results_list.addItem(item)
+
+    def jump_to_item(self, item):
+        """
+        Method called when the user picks a hit from the list
+        :param QListWidgetItem item: The hit
+        :return:
+        """
+        self.gui.jump_to_word(item.data(Qt.UserRole))
+
+    def jump_to_first(self):
+        """
+        Method called when the user presses enter in the search box, jumping to the selected hit or else the first
+        :return:
+        """
+        item = self.results_list.currentItem() or self.results_list.item(0)
+        if item:
+            self.jump_to_item(item)
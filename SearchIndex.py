@@ -0,0 +1,154 @@
+from array import array
+from itertools import accumulate, repeat
+
+# changed whenever the way words are turned into search terms changes, so that indexes kept by the document store are
+# built again
+SEARCH_INDEX_VERSION = 1
+# punctuation taken off the ends of a word to make its search term
+TERM_STRIP_CHARACTERS = '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~‘’“”«»…–—'
+# most hits a search hands back; the total number of hits is always counted
+SEARCH_RESULT_LIMIT = 500
+
+
+def search_terms(text):
+    """
+    Function to turn words into search terms: case-folded, with the punctuation on either end taken off
+    :param str text: Words separated by spaces
+    :return: List of terms, one for each word, some of which may be empty
+    """
+    return list(map(str.strip, text.casefold().split(' '), repeat(TERM_STRIP_CHARACTERS)))
+
+
+class SearchIndex:
+    def __init__(self):
+        """
+        An inverted index over the words of a document: for every search term, the indices of the words it occurs
+        at, in order. The positions of all the terms are held in one array, term after term, and each term maps to
+        the range of that array holding its positions, so a lookup is a dictionary access and a slice.
+        """
+        # term -> (start, stop) in postings
+        self.terms = {}
+        self.postings = array('I')
+        self.num_words = 0
+
+    def build(self, token_store):
+        """
+        Method to index every word of a text
+        :param TokenStore token_store: The words of the text
+        :return:
+        """
+        positions = {}
+        for position, term in enumerate(search_terms(token_store.get_text())):
+            postings = positions.get(term)
+            if postings is None:
+                postings = positions[term] = array('I')
+            postings.append(position)
+        positions.pop('', None)
+
+        terms = sorted(positions)
+        postings = array('I')
+        for term in terms:
+            postings.extend(positions[term])
+        self.set_tables(terms, [len(positions[term]) for term in terms], postings, len(token_store))
+
+    def set_tables(self, terms, counts, postings, num_words):
+        """
+        Method to fill the index from its tables, as built or as read back from the document store
+        :param list terms: The terms, in the order their positions appear in postings
+        :param counts: Number of positions of each term
+        :param array postings: The positions of every term, term after term
+        :param int num_words: Number of words in the indexed text
+        :return:
+        """
+        stops = list(accumulate(counts))
+        self.terms = dict(zip(terms, zip([0] + stops[:-1], stops)))
+        self.postings = postings
+        self.num_words = num_words
+
+    def positions(self, term):
+        """
+        Method to get the positions of a term
+        :param str term: The term, from search_terms()
+        :return: Array of the indices of the words the term occurs at, in order
+        """
+        start, stop = self.terms.get(term, (0, 0))
+        return self.postings[start:stop]
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """
+        Method to find a word or phrase. The words of a phrase have to occur one right after another; case and the
+        punctuation at the ends of words are ignored.
+        :param str query: The word or phrase
+        :param int limit: Most hits to hand back
+        :return: The total number of hits, and a list of the indices of the first word of the first limit hits
+        """
+        # split the way the tokenizer splits the text, so that hyphenated words are found
+        terms = search_terms(' '.join(query.replace('\u2014', '-').replace('-', '- ').split()))
+        terms = [term for term in terms if term]
+        if not terms:
+            return 0, []
+
+        postings = [self.positions(term) for term in terms]
+        # the phrase is found by checking each occurrence of its rarest word against the others
+        rarest = min(range(len(terms)), key=lambda i: len(postings[i]))
+        hits = [position - rarest for position in postings[rarest] if position >= rarest]
+        for offset, positions in enumerate(postings):
+            if offset != rarest and hits:
+                following = set(positions)
+                hits = [hit for hit in hits if hit + offset in following]
+        return len(hits), hits[:limit]
+
+
+class DocumentSearch:
+    def __init__(self):
+        """
+        The search index of the text being read, shared between SpeedRead, which builds it, and the gui, which
+        searches it
+        """
+        self.words = None
+        self.index = None
+
+    def set_index(self, words, index):
+        """
+        Method to make an index the one being searched
+        :param TokenStore words: The words of the text
+        :param SearchIndex index: Their index, or None while it is being built
+        :return:
+        """
+        self.words = words
+        self.index = index
+
+    def ready(self):
+        """
+        Method to check whether the text being read has been indexed yet
+        :return: True if it can be searched
+        """
+        return self.index is not None
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """
+        Method to find a word or phrase in the text being read
+        :param str query: The word or phrase
+        :param int limit: Most hits to hand back
+        :return: The total number of hits, and a list of the indices of the first word of the first limit hits
+        """
+        if self.index is None:
+            return 0, []
+        return self.index.search(query, limit)
+
+    def context(self, word_num, length=1, around=6):
+        """
+        Method to get a hit with the words around it, to show in a list of results
+        :param int word_num: Index of the first word of the hit
+        :param int length: Number of words in the hit
+        :param int around: Number of words to show on either side
+        :return: The words
+        """
+        start = max(0, word_num - around)
+        stop = min(len(self.words), word_num + length + around)
+        text = self.words[start:stop]
+        if start > 0:
+            text = '...' + text
+        if stop < len(self.words):
+            text += '...'
+        return text
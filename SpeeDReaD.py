@@ -18,113 +18,167 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import time
+
+# taken before anything else is imported, so that --startup-profile can time the imports
+started = time.perf_counter()
+
 import json
 import os.path
-import re
 import sys
-import time
+from array import array
 from os.path import exists
 
-from PyQt5.QtCore import QThread, Qt
+from PyQt5.QtCore import QThread, QTimer, Qt
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel
 
+from DocumentLoader import DocumentLoader
+from DocumentStore import DocumentStore
 from GUI import GUI
+from IndexBuilder import IndexBuilder
+from Library import Library
+from PlanBuilder import PlanBuilder
+from ProgressJournal import ProgressJournal, replace_file
+from ReadingCore import ReadingCore
+from ReadingPlan import ReadingPlan
+from SearchIndex import DocumentSearch
+from StartupProfile import StartupProfile
+from TimerEngine import TimerEngine
 
 class SpeedRead(QThread):
     settings = None
+    # while reading, the word slider and time remaining are only brought up to date this often, in seconds
+    ui_update_interval = 0.25
+    # number of frames the word display lays out ahead of the one being shown, refreshed along with the slider
+    prepare_ahead = 64
+    # how long the last word stays up before going back to the first word, in seconds
+    end_of_text_delay = 2
+    # number of words a pasted text is listed under in the library
+    title_words = 8
+    # how often the word the user is on is written to the progress journal, in ms
+    journal_interval = 5000
 
     def __init__(self, gui):
         """
         Implements QThread to provide the ability to change the word(s) displayed in the reading area at the proper
-        interval.
+        interval. The text, position, speed and pacing live in a ReadingCore; this class connects it to the gui.
         :param GUI gui: The current instance of GUI
         """
         self.load_settings()
+        self.documents = DocumentStore(self.data_dir)
+        self.library = Library(self.data_dir)
+        self.journal = ProgressJournal(self.data_dir + '/progress.journal')
+        self.recover_progress()
+        self.document_search = DocumentSearch()
+        # threads building search indexes; one is only dropped once it has finished
+        self.index_builders = []
+        # threads replanning the text with new reading options, the last of them making the plan that will be used
+        self.plan_builders = []
+        self.plan_builder = None
+        # the last time remaining texts sent to the gui
+        self.time_remaining_texts = None
+        self.document_id = None
+        self.document_loader = None
+        # whether the document the user was last reading is still being opened in the background
+        self.restoring = False
         self.gui = gui
-        self.current_word = 0
         self.keep_running = True
-        self.wpm = 200
-        self.reading_speed = None
-        self.word_array = None
+        self.core = ReadingCore()
+        self.core.plan.group_words = self.settings['combine']
+        self.core.plan.punctuation_pause = self.settings['pause']
+        self.core.plan.chunk_words = self.settings.get('chunk_words', 1)
+        self.core.plan.chunk_characters = self.settings.get('chunk_characters', 0)
+        self.core.plan.adaptive_pacing = self.settings.get('adaptive_pacing', False)
+        self.engine = self.settings.get('engine', 'thread')
 
         super().__init__()
+        self.timer_engine = TimerEngine(self)
+        self.journal_timer = QTimer(self)
+        self.journal_timer.timeout.connect(self.journal_progress)
+        self.journal_timer.start(self.journal_interval)
 
     def run(self):
         """
-        Walks through the words in the user's text, applying the proper delay between words, and sends the word to the
+        Walks through the frames of the reading plan, applying each frame's delay, and sends the frame's word(s) to the
         gui.
         :return: None
         """
         self.keep_running = True
-        finished = False
-        punctuations = ['.', ',', '?', '!', ';', '\uFF0C', '\u002C']
-
-        skip_word = False
-        initial_slowdown = True
-        slowdown_value = 2
-        for i in range(self.current_word, len(self.word_array)):
-            if slowdown_value <= 1:
-                initial_slowdown = False
-
+        core = self.core
+
+        next_ui_update = 0
+        core.start()
+        while self.keep_running:
+            frame = core.next_frame()
+            if frame is None:
+                if not core.more_coming():
+                    break
+                # the reader has caught up with a text that is still being imported or planned
+                time.sleep(0.1)
+                core.resume()
+                continue
+
+            word, start, count, delay = frame
+            # the word is the only thing the gui has to handle every frame; the slider and time remaining can lag a
+            # little without anyone noticing
+            self.gui.set_current_word_string.emit(word)
+            if core.clock.next_deadline >= next_ui_update:
+                next_ui_update = core.clock.next_deadline + self.ui_update_interval
+                self.gui.set_word_slider_value.emit(start + count)
+                self.gui.prepare_words.emit(core.upcoming_texts(self.prepare_ahead))
+                self.calc_time_remaining(start + count)
+            core.clock.frame_shown()
+            core.clock.wait(delay)
+
+        if core.at_end():
+            # stopping, or moving elsewhere, cuts the pause short, so nothing waiting for this thread waits long
+            end = time.perf_counter() + self.end_of_text_delay
+            while self.keep_running and time.perf_counter() < end:
+                time.sleep(0.05)
             if self.keep_running:
-                # skip_word is true if self.word_array[i] was already combined with the previous word
-                if not skip_word:
-                    if len(self.word_array[i]) < 4 and self.gui.group_words and not i == len(self.word_array) - 1:
-                        word = self.word_array[i] + ' ' + self.word_array[i + 1]
-                        skip_word = True
-                    else:
-                        word = self.word_array[i]
-
-                    delay = self.reading_speed
-                    if self.gui.punctuation_pause:
-                        for punctuation in punctuations:
-                            if punctuation in word:
-                                delay = self.reading_speed * 2
-
-                    self.gui.set_current_word_string.emit(word)
-                    self.gui.set_word_slider_value.emit(i + 1)
-                    app.processEvents()
-
-                    if initial_slowdown:
-                        time.sleep(delay * slowdown_value)
-                        slowdown_value = slowdown_value - 0.05
-                    else:
-                        time.sleep(delay)
-                    self.current_word = i
-                else:
-                    skip_word = False
-                    self.gui.set_word_slider_value.emit(i + 1)
-
-                if i == len(self.word_array) - 1:
-                    finished = True
-            else:
-                self.current_word = i
-                self.calc_time_remaining()
-                break
+                self.set_current_word(0)
+        else:
+            word_num = core.stop()
+            self.gui.set_word_slider_value.emit(word_num + 1)
+            self.calc_time_remaining()
 
-        if finished:
-            time.sleep(2)
-            self.current_word = 0
-            self.set_current_word(self.current_word)
+    def start_reading(self):
+        """
+        Method called when the user starts reading. Plays the text with whichever engine the user has chosen: this
+        thread's run loop, or the timer engine on the gui thread.
+        :return:
+        """
+        if self.engine == 'timer':
+            if not self.isRunning():
+                self.timer_engine.start()
+        elif not self.timer_engine.running:
+            self.start()
 
     def stop(self):
         """
-        Convenience method to set self.keep_running to False, stopping the run loop
+        Convenience method to set self.keep_running to False, stopping the run loop, and to stop the timer engine
         :return:
         """
         self.keep_running = False
+        self.timer_engine.stop()
+
+    def set_engine(self, engine):
+        """
+        Method called when the user chooses a playback engine. Takes effect the next time reading starts.
+        :param str engine: 'thread' to play on this thread, 'timer' to play on the gui thread with a precise timer
+        :return:
+        """
+        self.engine = engine
 
     def set_reading_speed(self, wpm, move_slider=False):
         """
-        Method to set the reading speed based on the user's preference. Takes the value in Words Per Minute and converts
-        that to a millisecond delay time, recalculating the read time remaining.
+        Method to set the reading speed based on the user's preference, recalculating the read time remaining.
         :param wpm: Reading speed in Words Per Minute
         :param move_slider: Whether to also move the gui's speed slider
         :return:
         """
-        self.wpm = wpm
-        self.reading_speed = 60 / wpm
+        self.core.set_speed(wpm)
         self.calc_time_remaining()
         if move_slider:
             self.gui.set_speed_slider_value.emit(wpm)
@@ -136,59 +190,388 @@ class SpeedRead(QThread):
         :param word_num: Desired word's index
         :return:
         """
-        self.current_word = word_num
-        self.gui.set_current_word_string.emit(self.word_array[self.current_word])
+        word_num = self.core.seek(word_num)
+        self.gui.set_current_word_string.emit(self.core.word())
         self.gui.set_word_slider_value.emit(word_num + 1)
         self.calc_time_remaining()
 
+    def go_to_word(self, word_num):
+        """
+        Method to move straight to a word, such as a search hit, stopping the reader first and waiting for it to stop
+        so that it doesn't move the current word again as it finishes
+        :param int word_num: Index of the word
+        :return:
+        """
+        self.stop()
+        self.wait()
+        self.set_current_word(word_num)
+
+    def skip_sentences(self, step):
+        """
+        Method to move to the start of a sentence, stopping the reader first
+        :param int step: -1 for the start of the current sentence or else the previous one, 1 for the next, and so on
+        :return:
+        """
+        self.stop()
+        self.wait()
+        self.set_current_word(self.core.sentence_boundary(step))
+
+    def skip_chapters(self, step):
+        """
+        Method to move to the start of a chapter, stopping the reader first
+        :param int step: -1 for the start of the current chapter or else the previous one, 1 for the next, and so on
+        :return:
+        """
+        self.stop()
+        self.wait()
+        self.set_current_word(self.core.chapter_boundary(step))
+
+    def set_reading_options(self, group_words, punctuation_pause, chunk_words, chunk_characters, adaptive_pacing=False):
+        """
+        Method called when the user changes how words are grouped into frames or turns pausing for punctuation or
+        adaptive pacing on or off. Replans the text from the current word onward on a PlanBuilder thread; the reader
+        goes on with the current plan until plan_built swaps the new one in.
+        :param bool group_words: Whether to combine small words
+        :param bool punctuation_pause: Whether to pause for punctuation
+        :param int chunk_words: Number of words to show at once, or 1 to turn chunk mode off
+        :param int chunk_characters: Most characters a chunk may take up, or 0 for no limit
+        :param bool adaptive_pacing: Whether to pace each frame by how long its words take to take in
+        :return:
+        """
+        options = (group_words, punctuation_pause, chunk_words, chunk_characters, adaptive_pacing)
+        if self.plan_builder and options == self.plan_builder.options:
+            return
+        # a plan still being made with other options is no longer wanted
+        self.plan_builder = None
+        if not self.core.words:
+            self.core.set_options(*options)
+            return
+        # a document opened without a plan kept for it still has to be planned, whatever the options
+        if options == self.core.plan.options() and len(self.core.plan) > 0:
+            return
+        self.build_plan(options)
+
+    def build_plan(self, options):
+        """
+        Method to start planning the text on a PlanBuilder thread, from the current word onward, or in full if it has
+        no frames yet
+        :param tuple options: The reading options, as in ReadingPlan.options()
+        :return:
+        """
+        self.plan_builders = [builder for builder in self.plan_builders if builder.isRunning()]
+        self.plan_builder = PlanBuilder(
+            self.core.plan, options, self.core.current_word, self.documents, self.document_id)
+        self.plan_builder.built.connect(self.plan_built)
+        self.plan_builder.start()
+        self.plan_builders.append(self.plan_builder)
+
+    def plan_built(self, plan):
+        """
+        Method called by a plan builder's built signal, swapping the new plan in if it is still wanted
+        :param ReadingPlan plan: The text's new plan
+        :return:
+        """
+        builder = self.sender()
+        if builder is not self.plan_builder:
+            return
+
+        self.plan_builder = None
+        if plan.words is not self.core.words:
+            return
+        if len(plan.words) > builder.num_words:
+            # more of the text arrived while the plan was being made
+            plan.rebuild_from(builder.num_words - 1)
+        self.core.replace_plan(plan)
+        self.core.plan_loading = False
+        self.calc_time_remaining()
+
+    def drop_replan(self):
+        """
+        Method to drop a plan still being made for the text that is being replaced, giving the plan being read its
+        options without replanning it, so that the next text is planned with them, and to stop waiting for it
+        :return:
+        """
+        if self.plan_builder:
+            plan = self.core.plan
+            (plan.group_words, plan.punctuation_pause, plan.chunk_words, plan.chunk_characters,
+             plan.adaptive_pacing) = self.plan_builder.options
+            self.plan_builder = None
+        self.core.plan_loading = False
+
     def change_text(self, text):
         """
-        Cleans and sets the block of text to be read. Resets the current word index to 0.
+        Cleans and sets the block of text to be read. Resets the current word index to 0. The position in the text
+        being replaced is kept in the library.
         :param text: Text to be read
         :return:
         """
-        text = re.sub("\u2014", "- ", text)
-        text = re.sub("-", "- ", text)
-        text = re.sub("\\s+", " ", text)
-        text = re.sub("\r", "", text)
-        text = re.sub("\n", "", text)
-        text = re.sub("\t", "", text)
+        if not self.core.text_loading:
+            # when a text is being imported, this was done as the import started
+            self.remember_position()
+        self.restoring = False
+        self.drop_replan()
+        self.core.set_text(text)
+        self.document_id = None
+        self.words_loaded()
+
+    def load_words(self, token_store, plan=None):
+        """
+        Sets already tokenized words as the text to be read. Resets the current word index to 0.
+        :param TokenStore token_store: Words to be read
+        :param ReadingPlan plan: The words' reading plan, if it has already been made
+        :return:
+        """
+        self.restoring = False
+        self.drop_replan()
+        self.core.load_words(token_store, plan)
+        self.words_loaded()
 
-        self.word_array = text.strip().split(' ')
+    def load_pasted_words(self, token_store, plan):
+        """
+        Sets a pasted text, tokenized and planned in the background, as the text to be read. The position in the text
+        being replaced is kept in the library.
+        :param TokenStore token_store: The pasted text's words
+        :param ReadingPlan plan: Their reading plan
+        :return:
+        """
+        self.stop()
+        self.wait()
+        # a text still being imported is dropped, not stored
+        self.remember_position()
+        self.core.text_loading = False
+        self.document_id = None
+        self.load_words(token_store, plan)
+
+    def words_loaded(self):
+        """
+        Method to bring the gui up to date with a new text
+        :return:
+        """
         self.set_current_word(0)
-        self.gui.set_current_word_string.emit(self.word_array[0])
-        self.gui.set_current_word_index.emit(1)
+        self.gui.set_chapters.emit(array('I', self.core.words.chapters))
+        self.gui.reading_ready.emit(len(self.core))
+        if not self.core.text_loading:
+            self.index_text()
+
+    def append_text(self, text):
+        """
+        Cleans a block of text and adds it to the end of the text being read, planning the new words. Used when a
+        text arrives in pieces, such as the chapters of an EPUB being imported.
+        :param text: Text to be added
+        :return:
+        """
+        if not self.core.words:
+            self.change_text(text)
+            return
+
+        self.restoring = False
+        self.document_id = None
+        self.core.append_text(text)
+        self.gui.set_chapters.emit(array('I', self.core.words.chapters))
+        self.gui.reading_ready.emit(len(self.core))
+        self.calc_time_remaining()
+
+    def change_words(self, token_store):
+        """
+        Sets words tokenized in the background, such as the first piece of a file being streamed in, as the text to be
+        read. Resets the current word index to 0. The position in the text being replaced is kept in the library.
+        :param TokenStore token_store: Words to be read
+        :return:
+        """
+        if not self.core.text_loading:
+            self.remember_position()
+        self.restoring = False
+        self.drop_replan()
+        self.core.load_words(token_store)
+        self.document_id = None
+        self.words_loaded()
+
+    def continue_words(self, token_store):
+        """
+        Adds words tokenized in the background to the end of the text being read, in the same chapter, planning only
+        the new words. Used when a text is streamed in a piece at a time.
+        :param TokenStore token_store: Words to be added
+        :return:
+        """
+        if not self.core.words:
+            self.change_words(token_store)
+            return
+
+        self.restoring = False
+        self.document_id = None
+        self.core.append_words(token_store)
+        self.gui.reading_ready.emit(len(self.core))
+        self.calc_time_remaining()
+
+    def open_document(self, document_id):
+        """
+        Method to set a document from the document store as the text to be read, picking up at the word and speed the
+        user last read it at. The position in the text being replaced is kept in the library. A document without a plan
+        kept for the reading options is planned on a PlanBuilder thread, which keeps the plan for next time.
+        :param str document_id: ID of the document
+        :return: True if the document was opened
+        """
+        if document_id == self.document_id and self.core.words:
+            return True
+
+        self.stop()
+        self.wait()
+        token_store = self.documents.load(document_id)
+        if token_store is None:
+            self.library.remove(document_id)
+            return False
+
+        self.remember_position()
+        self.document_id = document_id
+        self.drop_replan()
+        options = self.core.plan.options()
+        plan = self.documents.stored_plan(document_id, token_store, options)
+        if plan is None:
+            # planned on a PlanBuilder thread instead, the reader waiting for the plan if it is started first
+            plan = ReadingPlan()
+            plan.set_options(*options)
+            plan.set_words(token_store, plan_now=False)
+        self.load_words(token_store, plan)
+        if len(self.core.plan) == 0:
+            self.core.plan_loading = True
+            self.build_plan(options)
+        # adds documents stored before the library existed, and marks the document as just opened
+        self.library.add(document_id, self.default_title(), len(self.core))
+
+        entry = self.library.get(document_id)
+        if entry['wpm']:
+            self.set_reading_speed(entry['wpm'], move_slider=True)
+        if entry['current_word']:
+            self.set_current_word(entry['current_word'])
+        return True
+
+    def save_import(self, source_key, file_name, title):
+        """
+        Method called when an import has completed, storing the imported text, adding it to the library and
+        remembering which file it came from
+        :param str source_key: The imported file's key in the document store, or an empty string for standard input
+        :param str file_name: Path to the imported file
+        :param str title: The imported book's title, or an empty string to use the file name
+        :return:
+        """
+        if source_key:
+            self.store_document(title or os.path.basename(file_name), file_name)
+            self.documents.add_source(source_key, self.document_id)
+        else:
+            # piped in, so there is no file to name it after or to find it by again
+            self.store_document(title)
+
+    def store_document(self, title=None, source=None):
+        """
+        Method to write the text being read to the document store, if it isn't there already, and add it to the
+        library. The least recently opened documents are removed from both to make room, other than pinned ones.
+        :param str title: Title to list the text under, defaulting to its first few words
+        :param str source: File the text was imported from
+        :return:
+        """
+        self.document_id = self.documents.save(self.core.words)
+        self.library.add(self.document_id, title or self.default_title(), len(self.core), source)
+        if self.document_search.ready() and self.document_search.words is self.core.words:
+            self.documents.save_search_index(self.document_id, self.document_search.index)
+        for document_id in self.documents.evict(keep=self.library.pinned_ids() | {self.document_id}):
+            self.library.remove(document_id)
+
+    def default_title(self):
+        """
+        Method to make up a title for a text that doesn't have one, from its first few words
+        :return: The title
+        """
+        count = min(self.title_words, len(self.core))
+        title = ' '.join(self.core.words[i] for i in range(count))
+        if count < len(self.core):
+            title += '...'
+        return title
+
+    def remember_position(self):
+        """
+        Method to save the word the user is on and their reading speed to the library, storing the text first if it
+        hasn't been stored yet. A text still being imported is left until the import completes.
+        :return:
+        """
+        if not self.core.words or self.restoring or self.core.text_loading:
+            return
+        if not self.document_id:
+            self.store_document()
+        self.library.set_position(self.document_id, self.core.current_word, self.core.wpm)
+
+    def remove_document(self, document_id):
+        """
+        Method called when the user removes a document from the library, deleting its stored words. The text being
+        read can't be removed.
+        :param str document_id: ID of the document
+        :return:
+        """
+        if document_id == self.document_id:
+            self.gui.timed_popup.emit("Can't remove the text being read")
+            return
+        self.library.remove(document_id)
+        self.documents.remove(document_id)
+
+    def set_text_loading(self, loading):
+        """
+        Method called while a text is being imported in pieces, so that the run loop waits for the rest of the text
+        instead of finishing when it reaches the end of what has arrived so far
+        :param bool loading: Whether more text is on its way
+        :return:
+        """
+        if loading and not self.core.text_loading:
+            self.remember_position()
+        elif not loading and self.core.text_loading and self.core.words:
+            # the whole of an imported text has arrived, or as much of it as will
+            self.core.text_loading = False
+            self.index_text()
+        self.core.text_loading = loading
+
+    def index_text(self):
+        """
+        Method to start building the search index of the text being read, or reading back the one kept for it, on an
+        IndexBuilder thread. Searching waits until text_indexed is called with the index.
+        :return:
+        """
+        self.document_search.set_index(self.core.words, None)
+        self.gui.search_index_changed.emit()
+
+        self.index_builders = [builder for builder in self.index_builders if builder.isRunning()]
+        builder = IndexBuilder(self.documents, self.core.words, self.document_id)
+        builder.built.connect(self.text_indexed)
+        builder.start()
+        self.index_builders.append(builder)
 
-    def calc_time_remaining(self):
+    def text_indexed(self, words, index):
+        """
+        Method called by an index builder's built signal, making the index the one searched if the text it belongs to
+        is still the one being read
+        :param TokenStore words: The words that were indexed
+        :param SearchIndex index: Their index
+        :return:
+        """
+        if words is not self.core.words:
+            return
+
+        self.document_search.set_index(words, index)
+        if self.document_id:
+            self.documents.save_search_index(self.document_id, index)
+        self.gui.search_index_changed.emit()
+
+    def calc_time_remaining(self, word_num=None):
         """
         Method to calculate the time it will take to finish reading the text based on the current reading speed. Sets
         the time remaining label in GUI to the result.
+        :param int word_num: Index of the word to count from, defaulting to the current word
         :return:
         """
-        if self.word_array:
-            num_words = len(self.word_array) - self.current_word
-            time_left = num_words / self.gui.speed_slider.value()
-
-            hours = 0
-            minutes = 0
-            seconds = 0
-            if time_left > 60:
-                seconds = int((time_left % 1) * 60)
-                time_left = time_left - (time_left % 1)
-                minutes = int(time_left % 60)
-                hours = int((time_left - minutes) / 60)
-            elif time_left > 1:
-                seconds = int((time_left % 1) * 60)
-                minutes = int(time_left - (time_left % 1))
-            elif time_left < 1:
-                seconds = int(time_left * 60)
-
-            if hours < 1 and minutes < 1:
-                result = 'less than 1 minute'
-            else:
-                result = str(hours) + ':' + str(minutes) + ':' + str(seconds)
-
-            self.gui.set_time_remaining_text.emit(result + ' remaining')
+        if self.core.words:
+            # called for every frame, so the label is only touched when what it shows changes
+            text = self.core.time_remaining_text(word_num)
+            sessions_text = self.core.sessions_text(word_num)
+            if (text, sessions_text) != self.time_remaining_texts:
+                self.time_remaining_texts = (text, sessions_text)
+                self.gui.set_time_remaining_text.emit(text, sessions_text)
 
     def timed_popup(self, text):
         """
@@ -218,16 +601,21 @@ class SpeedRead(QThread):
         Method to retrieve the user's saved settings from the settings file.
         :return:
         """
-        data_dir = os.getenv('APPDATA') + '/SpeeDReaD'
-        settings_file = data_dir + '/settings.json'
+        self.data_dir = os.getenv('APPDATA') + '/SpeeDReaD'
+        settings_file = self.data_dir + '/settings.json'
 
-        if not exists(data_dir):
-            os.mkdir(data_dir)
+        if not exists(self.data_dir):
+            os.mkdir(self.data_dir)
 
+        self.settings = None
         if exists(settings_file):
-            with open(settings_file, 'r') as file:
-                self.settings = json.loads(file.read())
-        else:
+            try:
+                with open(settings_file, 'r') as file:
+                    self.settings = json.loads(file.read())
+            except ValueError:
+                # only settings files written before they were replaced whole can have been left half written
+                pass
+        if self.settings is None:
             self.settings = {
                 'speed': 200,
                 'current_word': None,
@@ -236,87 +624,282 @@ class SpeedRead(QThread):
                 'background': 'white',
                 'pause': True,
                 'combine': True,
-                'reading_text': ''
+                'chunk_words': 1,
+                'chunk_characters': 0,
+                'adaptive_pacing': False,
+                'engine': 'thread',
+                'chapter_slider': False,
+                'document_id': None
             }
-            with open(settings_file, 'w') as file:
-                file.write(json.dumps(self.settings, indent=2))
+            replace_file(settings_file, json.dumps(self.settings, indent=2).encode('utf-8'))
 
     def save_settings(self):
         """
         Method to save the current settings to the user's settings file.
         :return:
         """
-        self.settings.update({'speed': self.wpm})
-        self.settings.update({'current_word': self.current_word})
+        if self.document_loader:
+            self.document_loader.wait()
+        for builder in self.index_builders:
+            builder.wait()
+
+        self.settings.update({'speed': self.core.wpm})
         self.settings.update({'font_name': self.gui.current_font.family()})
         self.settings.update({'font_size': self.gui.current_font.pointSize()})
         self.settings.update({'background': self.gui.current_background})
         self.settings.update({'pause': self.gui.punctuation_pause})
         self.settings.update({'combine': self.gui.group_words})
-        if self.word_array:
-            self.settings.update({'reading_text': ' '.join(self.word_array)})
-        else:
-            self.settings.update({'reading_text': None})
-
-        data_dir = os.getenv('APPDATA') + '/SpeeDReaD'
-        settings_file = data_dir + '/settings.json'
+        self.settings.update({'chunk_words': self.gui.chunk_words})
+        self.settings.update({'chunk_characters': self.gui.chunk_characters})
+        self.settings.update({'adaptive_pacing': self.gui.adaptive_pacing})
+        self.settings.update({'engine': self.engine})
+        self.settings.update({'chapter_slider': self.gui.chapter_slider})
+        # if the program is closed before the last document has been restored, where the user was is left as it was
+        if not self.restoring:
+            self.settings.update({'current_word': self.core.current_word})
+            # the text itself lives in the document store and only needs writing when it has changed
+            self.remember_position()
+            self.settings.update({'document_id': self.document_id})
+            self.settings.pop('reading_text', None)
+
+        self.write_settings()
+
+    def write_settings(self):
+        """
+        Method to replace the settings file with the current settings, which then hold everything in the progress
+        journal, so the journal is emptied. The position in the settings is journaled first, so that whenever the
+        program stops, replaying the journal never takes the user back past what the settings file says.
+        :return:
+        """
+        if self.settings.get('document_id'):
+            self.journal.record(
+                self.settings['document_id'], self.settings['current_word'] or 0, self.settings['speed'])
+        replace_file(self.data_dir + '/settings.json', json.dumps(self.settings, indent=2).encode('utf-8'))
+        self.journal.clear()
 
-        with open(settings_file, 'w') as file:
-            file.write(json.dumps(self.settings, indent=2))
+    def journal_progress(self):
+        """
+        Method called every journal_interval to add the word the user is on to the progress journal if it has changed,
+        compacting the journal into the settings file once it is full. A text that hasn't been stored yet is stored
+        first, so that there is a document to come back to.
+        :return:
+        """
+        if not self.core.words or self.restoring or self.core.text_loading:
+            return
+        if not self.document_id:
+            self.store_document()
+
+        self.journal.record(self.document_id, self.core.current_word, self.core.wpm)
+        if self.journal.full():
+            self.remember_position()
+            self.settings.update({'speed': self.core.wpm})
+            self.settings.update({'current_word': self.core.current_word})
+            self.settings.update({'document_id': self.document_id})
+            self.write_settings()
+
+    def recover_progress(self):
+        """
+        Method to bring the settings and the library up to date with the progress journal left by a session that
+        didn't close normally, and compact it
+        :return:
+        """
+        records = self.journal.replay()
+        if not records:
+            # anything in the journal is a record torn by a crash, which new records mustn't be written after
+            self.journal.clear()
+            return
+
+        positions = {document_id: (current_word, wpm) for document_id, current_word, wpm in records}
+        for document_id, (current_word, wpm) in positions.items():
+            self.library.set_position(document_id, current_word, wpm)
+
+        document_id, current_word, wpm = records[-1]
+        self.settings.update({'speed': wpm})
+        self.settings.update({'current_word': current_word})
+        self.settings.update({'document_id': document_id})
+        self.settings.pop('reading_text', None)
+        self.write_settings()
 
     def apply_settings(self):
         """
-        Method to take the current settings and apply them to the program
+        Method to take the current settings and apply them to the program. The document the user was last reading is
+        opened separately, by restore_document.
         :return:
         """
-        if self.settings['reading_text'] and len(self.settings['reading_text']) > 0:
-            self.change_text(self.settings['reading_text'])
-            self.gui.reading_ready.emit(len(self.settings['reading_text'].split(' ')))
-
-        self.wpm = self.settings['speed']
         self.set_reading_speed(self.settings['speed'])
-        self.gui.set_speed_slider_value.emit(self.wpm)
+        self.gui.set_speed_slider_value.emit(self.core.wpm)
+        self.gui.set_gui_settings.emit(self.settings)
 
+    def restore_document(self):
+        """
+        Method to start opening the document the user was last reading on a DocumentLoader thread, so that the window
+        doesn't wait for it. If the user loads another text first, the restored document is dropped when it arrives.
+        :return: True if there is a document to restore
+        """
+        document_id = self.settings.get('document_id')
+        # settings saved by earlier versions carry the text itself
+        text = self.settings.get('reading_text')
+        if not document_id and not text:
+            return False
+
+        self.restoring = True
+        self.document_loader = DocumentLoader(self.documents, document_id, text, self.core.plan.options())
+        self.document_loader.loaded.connect(self.document_restored)
+        self.document_loader.start()
+        return True
+
+    def document_restored(self, token_store, plan):
+        """
+        Method called by the document loader's loaded signal. Sets the restored document as the text to be read and
+        moves to the word the user was on.
+        :param TokenStore token_store: The document's words, or None if it couldn't be opened
+        :param ReadingPlan plan: The words' reading plan
+        :return:
+        """
+        if not self.restoring:
+            return
+
+        self.restoring = False
+        if token_store is None:
+            self.document_id = None
+            return
+
+        # set first so that the document's search index is read back rather than built again
+        self.document_id = self.document_loader.document_id
+        self.load_words(token_store, plan)
+        if self.document_id:
+            self.library.add(self.document_id, self.default_title(), len(self.core))
         if self.settings['current_word']:
             self.set_current_word(self.settings['current_word'])
-        else:
-            self.current_word = 0
 
-        self.gui.set_gui_settings.emit(self.settings)
+def connect_signals(gui, speed_read):
+    """
+    Function to wire GUI and SpeedRead together: connecting GUI's signals to the slots that handle them, and sharing
+    the objects the gui reads directly. Used by Startup, and by anything else that runs the two, such as the
+    benchmarks, so that they run the program as it is wired.
+    :param GUI gui: The current instance of GUI
+    :param SpeedRead speed_read: The current instance of SpeedRead
+    :return:
+    """
+    gui.set_reading_speed.connect(speed_read.set_reading_speed)
+    gui.start_words.connect(speed_read.start_reading)
+    gui.stop_words.connect(speed_read.stop)
+    gui.set_current_word_index.connect(speed_read.set_current_word)
+    gui.go_to_word.connect(speed_read.go_to_word)
+    gui.skip_sentences.connect(speed_read.skip_sentences)
+    gui.skip_chapters.connect(speed_read.skip_chapters)
+    gui.set_chapters.connect(gui.set_chapter_starts)
+    gui.set_current_word_string.connect(gui.set_word)
+    gui.change_text.connect(speed_read.change_text)
+    gui.load_pasted_words.connect(speed_read.load_pasted_words)
+    gui.append_text.connect(speed_read.append_text)
+    gui.change_words.connect(speed_read.change_words)
+    gui.continue_words.connect(speed_read.continue_words)
+    gui.set_text_loading.connect(speed_read.set_text_loading)
+    gui.open_document.connect(speed_read.open_document)
+    gui.save_import.connect(speed_read.save_import)
+    gui.remove_document.connect(speed_read.remove_document)
+    gui.pin_document.connect(speed_read.library.set_pinned)
+    gui.remember_position.connect(speed_read.remember_position)
+    gui.documents = speed_read.documents
+    gui.library = speed_read.library
+    gui.document_search = speed_read.document_search
+    gui.frame_stats = speed_read.core.frame_stats
+    gui.reading_core = speed_read.core
+    gui.save_settings.connect(speed_read.save_settings)
+    gui.timed_popup.connect(speed_read.timed_popup)
+    gui.block_word_slider_signals.connect(gui.word_slider_block_signals)
+    gui.set_word_slider_value.connect(gui.word_slider_set_value)
+    gui.set_speed_slider_value.connect(gui.speed_slider_set_value)
+    gui.set_time_remaining_text.connect(gui.time_remainting_set_text)
+    gui.reading_ready.connect(gui.reading_ready_widget_set)
+    gui.set_gui_settings.connect(gui.set_settings)
+    gui.set_reading_options.connect(speed_read.set_reading_options)
+    gui.set_engine.connect(speed_read.set_engine)
+    gui.prepare_words.connect(gui.word_display.prepare)
+
 
 class Startup:
-    def __init__(self):
+    def __init__(self, profile=None, source=None):
         """
-        Startup initializes the program by first initializing GUI, then SpeedRead, setting GUI's various signals.
+        Startup initializes the program by first initializing GUI, then SpeedRead, setting GUI's various signals. The
+        window is shown before the last document is restored, or the file given on the command line is imported.
+        :param StartupProfile profile: Profile to time the startup phases with, for --startup-profile
+        :param str source: File to import instead of restoring the last document, or '-' for standard input
         """
+        self.profile = profile
+
         gui = GUI()
+        self.mark('main window built')
 
         speed_read = SpeedRead(gui)
+        self.mark('settings and documents')
 
-        gui.set_reading_speed.connect(speed_read.set_reading_speed)
-        gui.start_words.connect(speed_read.start)
-        gui.stop_words.connect(speed_read.stop)
-        gui.set_current_word_index.connect(speed_read.set_current_word)
-        gui.set_current_word_string.connect(gui.set_word)
-        gui.change_text.connect(speed_read.change_text)
-        gui.save_settings.connect(speed_read.save_settings)
-        gui.timed_popup.connect(speed_read.timed_popup)
-        gui.block_word_slider_signals.connect(gui.word_slider_block_signals)
-        gui.set_word_slider_value.connect(gui.word_slider_set_value)
-        gui.set_speed_slider_value.connect(gui.speed_slider_set_value)
-        gui.set_time_remaining_text.connect(gui.time_remainting_set_text)
-        gui.reading_ready.connect(gui.reading_ready_widget_set)
-        gui.set_gui_settings.connect(gui.set_settings)
+        connect_signals(gui, speed_read)
+        self.mark('signals connected')
 
         speed_read.apply_settings()
+        self.mark('settings applied')
         gui.showMaximized()
+
+        if profile:
+            # runs once the events showing the window have been handled
+            QTimer.singleShot(0, profile.mark_window_shown)
+        if source:
+            QTimer.singleShot(0, lambda: gui.import_file(source))
+            if profile:
+                QTimer.singleShot(0, profile.report)
+        else:
+            QTimer.singleShot(0, lambda: self.restore_document(speed_read))
+
         app.exec()
 
+    def restore_document(self, speed_read):
+        """
+        Method called once the window is up to start restoring the document the user was last reading
+        :param SpeedRead speed_read: The current instance of SpeedRead
+        :return:
+        """
+        restoring = speed_read.restore_document()
+        if self.profile:
+            if restoring:
+                speed_read.document_loader.loaded.connect(lambda: self.finish_profile('document restored'))
+            else:
+                self.profile.report()
+
+    def mark(self, phase):
+        """
+        Method to end a startup phase when profiling
+        :param str phase: Name of the phase
+        :return:
+        """
+        if self.profile:
+            self.profile.mark(phase)
+
+    def finish_profile(self, phase):
+        """
+        Method to end the last startup phase and write out the profile
+        :param str phase: Name of the phase
+        :return:
+        """
+        self.profile.mark(phase)
+        self.profile.report()
+
 
 if __name__ == '__main__':
     """
     Main entry point
     """
+    profile = None
+    if '--startup-profile' in sys.argv:
+        profile = StartupProfile(started)
+        profile.mark('imports')
+
+    # a file to read, or - to read what is piped in
+    source = next((arg for arg in sys.argv[1:] if arg == '-' or not arg.startswith('-')), None)
+
     app = QApplication(sys.argv)
-    startup = Startup()
+    if profile:
+        profile.mark('QApplication')
+    startup = Startup(profile, source)
 
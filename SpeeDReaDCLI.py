@@ -0,0 +1,164 @@
+"""
+This file and all files contained within this distribution are parts of the SpeeDReaD speed reading program.
+
+SpeeDReaD v.2.1.3
+Written by Jeremy G Wilson
+
+SpeeDReaD is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License (GNU GPL)
+published by the Free Software Foundation, either version 3 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+from ReadingCore import ReadingCore
+from TextStreams import TextStream, is_html
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+
+class TerminalReader:
+    def __init__(self, core, stream=sys.stdout):
+        """
+        Flashes the frames of a reading core in a terminal, each one centered on the same line. When the output isn't
+        a terminal, each frame is written on a line of its own instead.
+        :param ReadingCore core: The reading core, with its text loaded
+        :param stream: Where to write the frames
+        """
+        self.core = core
+        self.stream = stream
+        self.interactive = stream.isatty()
+
+    def show(self, text):
+        """
+        Method to show one frame
+        :param str text: The frame's text
+        :return:
+        """
+        if self.interactive:
+            width = shutil.get_terminal_size().columns - 1
+            self.stream.write('\r\x1b[2K' + text.center(width)[:width])
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
+
+    def run(self):
+        """
+        Method to read the whole text from the current word, keeping to the reading speed
+        :return: True if the end of the text was reached, False if the reader was interrupted
+        """
+        core = self.core
+        core.start()
+        try:
+            while True:
+                frame = core.next_frame()
+                if frame is None:
+                    break
+                word, start, count, delay = frame
+                self.show(word)
+                core.clock.frame_shown()
+                core.clock.wait(delay)
+        except KeyboardInterrupt:
+            core.stop()
+            return False
+        finally:
+            if self.interactive:
+                self.stream.write('\n')
+        return True
+
+
+def read_input(file_name):
+    """
+    Function to read the words to be read from a file or from standard input. Plain text and HTML are streamed into
+    the token store a block at a time, so the whole text is never held as one string.
+    :param str file_name: Path to a text, HTML or EPUB file, or '-' for standard input
+    :return: The words, in a token store
+    """
+    token_store = TokenStore()
+    token_store.mark_chapter()
+
+    if file_name.lower().endswith('.epub'):
+        # only loaded when needed, so that reading plain text starts quickly
+        from ebooklib import epub
+        from TextExtraction import extract_book_text, spine_documents
+
+        book = epub.read_epub(file_name)
+        tokenize(extract_book_text([document.get_content() for document in spine_documents(book)]), token_store)
+        return token_store
+
+    file = sys.stdin.buffer if file_name == '-' else open(file_name, 'rb')
+    try:
+        for text in TextStream(file, is_html(file_name)).pieces():
+            tokenize(text, token_store)
+    finally:
+        if file is not sys.stdin.buffer:
+            file.close()
+    return token_store
+
+
+def main(argv=None):
+    """
+    Function to read a file or standard input in the terminal
+    :param list argv: Command line arguments, defaulting to sys.argv[1:]
+    :return: Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog='speedread',
+        description='Flash the words of a text in the terminal at a set reading speed.'
+    )
+    parser.add_argument('file', nargs='?', default='-', help='text, HTML or EPUB file to read, or - for standard input')
+    parser.add_argument('-w', '--wpm', type=int, default=300, help='reading speed in words per minute (default 300)')
+    parser.add_argument('-s', '--start', type=int, default=0, help='index of the word to start from')
+    parser.add_argument('-c', '--chunk', type=int, default=1, help='words to show at once (default 1)')
+    parser.add_argument('--chunk-characters', type=int, default=0, help='most characters a chunk may take up')
+    parser.add_argument('--combine', action='store_true', help='combine small words with the word after them')
+    parser.add_argument('--no-pause', action='store_true', help="don't pause longer on punctuation")
+    parser.add_argument('--adaptive', action='store_true',
+                        help='pace words by their length and how common they are, at the same average speed')
+    args = parser.parse_args(argv)
+
+    if args.wpm <= 0:
+        parser.error('--wpm must be greater than 0')
+
+    try:
+        words = read_input(args.file)
+    except OSError as ex:
+        parser.error(str(ex))
+
+    core = ReadingCore()
+    core.set_options(
+        args.combine, not args.no_pause, max(args.chunk, 1), max(args.chunk_characters, 0), args.adaptive)
+    core.load_words(words)
+    core.set_speed(args.wpm)
+    core.seek(args.start)
+
+    try:
+        completed = TerminalReader(core).run()
+    except BrokenPipeError:
+        # whatever the words were piped into has stopped reading them
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+    if not completed:
+        sys.stderr.write(
+            'Stopped at word ' + str(core.current_word) + ' of ' + str(len(core)) +
+            '; use --start ' + str(core.current_word) + ' to pick up from there.\n'
+        )
+        return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import sys
+import time
+
+# how long, in ms, the window may take to appear after the program starts
+STARTUP_BUDGET_MS = 400
+
+
+class StartupProfile:
+    def __init__(self, started=None, budget=STARTUP_BUDGET_MS):
+        """
+        Times the phases of starting the program, for the --startup-profile switch. Each call to mark() ends a phase
+        that began at the previous mark, or at started for the first one.
+        :param float started: perf_counter() time the program started, defaulting to now
+        :param float budget: Time, in ms, the window may take to appear
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.budget = budget
+        self.last = self.started
+        self.phases = []
+        self.window_shown = None
+
+    def mark(self, phase):
+        """
+        Method to end a phase
+        :param str phase: Name of the phase
+        :return:
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def mark_window_shown(self):
+        """
+        Method to end the phase that finishes with the window appearing, the one that counts against the budget
+        :return:
+        """
+        self.mark('window shown')
+        self.window_shown = (self.last - self.started) * 1000
+
+    def report(self, stream=sys.stderr):
+        """
+        Method to write the time taken by each phase and whether the window appeared within the budget
+        :param stream: Where to write the report
+        :return:
+        """
+        lines = ['Startup profile:']
+        for phase, elapsed in self.phases:
+            lines.append('  {:<28}{:>9.1f} ms'.format(phase, elapsed))
+        lines.append('  {:<28}{:>9.1f} ms'.format('total', (self.last - self.started) * 1000))
+        if self.window_shown is not None:
+            if self.window_shown <= self.budget:
+                verdict = 'within'
+            else:
+                verdict = 'OVER'
+            lines.append('Window shown after {:.1f} ms, {} the {:.0f} ms budget'.format(
+                self.window_shown, verdict, self.budget))
+        stream.write('\n'.join(lines) + '\n')
+        stream.flush()
@@ -0,0 +1,116 @@
+import html
+import re
+from html.parser import HTMLParser
+
+# tags whose start and end break the text into a new line
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer', 'h1',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td',
+    'th', 'tr', 'ul'
+}
+# tags whose contents are never read
+SKIP_TAGS = {'head', 'script', 'style', 'template'}
+# EPUB documents are XHTML, whose element names are always lower case, so these patterns match case for speed
+# an element whose contents are never read, from its start tag to its end tag
+SKIP_PATTERN = re.compile(r'<(' + '|'.join(sorted(SKIP_TAGS)) + r')\b[^>]*?(?:/>|>.*?</\1\s*>)', re.DOTALL)
+# the start or end tag of a block element, or a <br>
+BLOCK_TAG_PATTERN = re.compile(r'</?(?:' + '|'.join(sorted(BLOCK_TAGS | {'br'})) + r')\b[^>]*>')
+# any other tag, comment or declaration
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
+class HtmlTextParser(HTMLParser):
+    def __init__(self):
+        """
+        Implements HTMLParser to turn an HTML or XHTML document into plain text in a single streaming pass. Block
+        elements and <br> become line breaks, entities are decoded, and the contents of <script>, <style> and <head>
+        are dropped.
+        """
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS or tag == 'br':
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if self.skip_depth == 0:
+            self.parts.append(data)
+
+    def get_text(self):
+        """
+        Method to get the text parsed so far
+        :return: The text, with block elements separated by line breaks
+        """
+        return ''.join(self.parts)
+
+    def take_text(self):
+        """
+        Method to get the text parsed since the last call, for a document that is fed in a piece at a time
+        :return: The text
+        """
+        text = ''.join(self.parts)
+        self.parts = []
+        return text
+
+
+def extract_document_text(content):
+    """
+    Function to extract the plain text of one XHTML document, such as an EPUB's, with a few passes of compiled
+    patterns over the whole document: the contents of <script>, <style> and <head> are dropped, block elements and
+    <br> become line breaks, the remaining tags are removed, and then entities are decoded
+    :param bytes content: The raw document
+    :return: The document's text, stripped of surrounding whitespace
+    """
+    text = SKIP_PATTERN.sub('', content.decode('utf-8', errors='replace'))
+    text = BLOCK_TAG_PATTERN.sub('\n', text)
+    return html.unescape(TAG_PATTERN.sub('', text)).strip()
+
+
+def extract_texts(contents):
+    """
+    Function to extract the text of a list of HTML documents. Texts are yielded in the order of the documents as each
+    one is done, so a caller can start using the first document while the rest are still being extracted.
+    :param list contents: The raw documents, as bytes
+    :return: Generator of document texts
+    """
+    for content in contents:
+        yield extract_document_text(content)
+
+
+def extract_book_text(contents):
+    """
+    Function to extract the text of a whole book's documents and join them in order in one step
+    :param list contents: The raw documents, as bytes, in reading order
+    :return: The book's text, with documents separated by line breaks
+    """
+    return '\n'.join([text for text in extract_texts(contents) if len(text) > 0])
+
+
+def spine_documents(book):
+    """
+    Function to list an EPUB's documents in the order given by its spine, falling back to the order of the manifest if
+    the spine does not reference any documents
+    :param epub.EpubBook book: The book, as read by ebooklib
+    :return: List of the book's documents
+    """
+    import ebooklib
+
+    documents = []
+    for item_id, linear in book.spine:
+        item = book.get_item_with_id(item_id)
+        if item is not None and item.get_type() == ebooklib.ITEM_DOCUMENT:
+            documents.append(item)
+
+    if len(documents) == 0:
+        documents = list(book.get_items_of_type(ebooklib.ITEM_DOCUMENT))
+    return documents
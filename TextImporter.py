@@ -0,0 +1,97 @@
+import hashlib
+import os
+import sys
+
+from PyQt5.QtCore import QThread, QSemaphore, pyqtSignal
+
+from TextStreams import TextStream, is_html
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+# pieces of text sent to the reader that it hasn't taken yet; the importer waits rather than reading further ahead, so
+# only this many pieces are ever waiting in memory
+MAX_PENDING_PIECES = 4
+# steps the progress of reading a file is reported in
+PROGRESS_STEPS = 1000
+
+
+class TextImporter(QThread):
+    words_ready = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, file_name, documents):
+        """
+        Implements QThread to stream a plain text or HTML file, or standard input, to the reader a piece at a time,
+        so that reading can begin with the first piece, and memory use stays the same however large the source is.
+        Each piece is tokenized here, so the reader only has to add its words. Whatever handles words_ready must call
+        piece_taken() for each piece.
+        :param str file_name: Path to the file, or '-' for standard input
+        :param DocumentStore documents: The program's document store
+        """
+        self.file_name = file_name
+        self.documents = documents
+        self.source_key = None
+        self.title = ''
+        self.completed = False
+        self.keep_running = True
+        self.pending = QSemaphore(MAX_PENDING_PIECES)
+
+        super().__init__()
+
+    def run(self):
+        """
+        Reads the source to the end, or until stopped, emitting words_ready with the words of each piece of its text
+        and, for a file, progress after each one. The file's source key is worked out as it is read.
+        :return: None
+        """
+        if self.file_name == '-':
+            file = sys.stdin.buffer
+            size = 0
+            file_hash = None
+        else:
+            file = open(self.file_name, 'rb')
+            size = os.fstat(file.fileno()).st_size
+            file_hash = hashlib.sha256()
+
+        stream = TextStream(file, is_html(self.file_name), file_hash)
+        try:
+            first_piece = True
+            for text in stream.pieces():
+                token_store = TokenStore()
+                if first_piece:
+                    token_store.mark_chapter()
+                tokenize(text, token_store)
+                if len(token_store) == 0:
+                    continue
+                first_piece = False
+
+                while not self.pending.tryAcquire(1, 100):
+                    if not self.keep_running:
+                        return
+                if not self.keep_running:
+                    return
+
+                self.words_ready.emit(token_store)
+                if size:
+                    self.progress.emit(min(stream.bytes_read * PROGRESS_STEPS // size, PROGRESS_STEPS), PROGRESS_STEPS)
+        finally:
+            if file_hash:
+                file.close()
+
+        if file_hash:
+            self.source_key = self.documents.hashed_source_key(file_hash)
+        self.completed = True
+
+    def piece_taken(self):
+        """
+        Method to let the importer read on once a piece it sent has been added to the reader's text
+        :return:
+        """
+        self.pending.release()
+
+    def stop(self):
+        """
+        Convenience method to set self.keep_running to False, cancelling the import before the next piece
+        :return:
+        """
+        self.keep_running = False
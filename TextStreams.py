@@ -0,0 +1,73 @@
+import codecs
+
+from TextExtraction import HtmlTextParser
+
+# bytes read from a file or pipe at a time
+STREAM_BLOCK_SIZE = 1024 * 1024
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+
+
+def is_html(file_name):
+    """
+    Function to check whether a file should be read as HTML rather than plain text
+    :param str file_name: Path to the file
+    :return: True for HTML and XHTML files
+    """
+    return file_name.lower().endswith(HTML_EXTENSIONS)
+
+
+class TextStream:
+    def __init__(self, file, html=False, file_hash=None, block_size=STREAM_BLOCK_SIZE):
+        """
+        Reads the text of a plain text or HTML file, or of a pipe, a block at a time: decoding UTF-8, stripping the
+        markup of HTML as it goes, and handing out the text in pieces that each end between words so that every piece
+        can be tokenized on its own. Only a block or so of the source is held at once, however large it is.
+        :param file: The source, opened in binary mode
+        :param bool html: Whether the source is HTML
+        :param file_hash: Hash object to feed every block read, such as for DocumentStore.hashed_source_key()
+        :param int block_size: Number of bytes to read at a time
+        """
+        self.file = file
+        self.html = html
+        self.file_hash = file_hash
+        self.block_size = block_size
+        self.bytes_read = 0
+
+    def pieces(self):
+        """
+        Method to read the source to the end
+        :return: Generator of pieces of the text, in order, none of them splitting a word
+        """
+        # a pipe hands over whatever it has, rather than waiting for a whole block
+        read = getattr(self.file, 'read1', self.file.read)
+        decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+        parser = HtmlTextParser() if self.html else None
+        carry = ''
+        while True:
+            block = read(self.block_size)
+            self.bytes_read += len(block)
+            if self.file_hash:
+                self.file_hash.update(block)
+
+            text = decoder.decode(block, final=not block)
+            if parser:
+                parser.feed(text)
+                if not block:
+                    parser.close()
+                text = parser.take_text()
+            text = carry + text
+
+            carry = ''
+            if block and text and not text[-1].isspace():
+                # the last word may go on in the next block; a run without any whitespace is let go once it is
+                # longer than a block, so that what is held back stays bounded
+                carry = text.rsplit(None, 1)[-1]
+                if len(carry) < len(text) or len(carry) <= self.block_size:
+                    text = text[:len(text) - len(carry)]
+                else:
+                    carry = ''
+
+            if text and not text.isspace():
+                yield text
+            if not block:
+                return
@@ -0,0 +1,108 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+class TimerEngine(QObject):
+    # how often to check for more text when the reader has caught up with a text that is still being imported, in ms
+    loading_poll_interval = 100
+    # how long the last word stays up before going back to the first word, in ms
+    end_of_text_delay = 2000
+
+    def __init__(self, speed_read):
+        """
+        Plays the reading plan on the gui thread instead of on SpeedRead's own thread. Each frame's deadline is worked
+        out ahead of time by the reading core's PlaybackClock, and a single-shot Qt.PreciseTimer is armed to fire just
+        before it, the last moment being spun off by the clock. Nothing ever waits on the gui thread longer than that,
+        and the gui is only ever touched from the thread it lives on.
+        :param SpeedRead speed_read: The current instance of SpeedRead, whose reading core is played
+        """
+        super().__init__()
+        self.speed_read = speed_read
+        self.running = False
+        self.next_ui_update = 0
+        self.waiting_for_text = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.next_frame)
+
+        self.end_timer = QTimer(self)
+        self.end_timer.setSingleShot(True)
+        self.end_timer.timeout.connect(lambda: self.speed_read.set_current_word(0))
+
+    def start(self):
+        """
+        Method to start playing from the current word
+        :return:
+        """
+        if self.running:
+            return
+
+        self.end_timer.stop()
+        self.running = True
+        self.next_ui_update = 0
+        self.waiting_for_text = False
+        self.speed_read.core.start()
+        self.next_frame()
+
+    def stop(self):
+        """
+        Method to stop playing, leaving the reader on the word after the last frame shown
+        :return:
+        """
+        if not self.running:
+            return
+
+        self.running = False
+        self.timer.stop()
+        word_num = self.speed_read.core.stop()
+        self.speed_read.gui.set_word_slider_value.emit(word_num + 1)
+        self.speed_read.calc_time_remaining()
+
+    def next_frame(self):
+        """
+        Method called by the timer when the next frame is due. Shows the frame and arms the timer for the one after.
+        :return:
+        """
+        if not self.running:
+            return
+
+        speed_read = self.speed_read
+        core = speed_read.core
+        clock = core.clock
+
+        if core.frame_num >= len(core.follow_plan()):
+            if core.more_coming():
+                # the reader has caught up with a text that is still being imported or planned
+                self.waiting_for_text = True
+                self.timer.start(self.loading_poll_interval)
+            else:
+                self.running = False
+                self.end_timer.start(self.end_of_text_delay)
+            return
+
+        if self.waiting_for_text:
+            self.waiting_for_text = False
+            core.resume()
+
+        remaining = clock.next_deadline - time.perf_counter()
+        if remaining > clock.spin_threshold:
+            # woken up early; go back to sleep rather than spin on the gui thread
+            self.timer.start(int(remaining * 1000))
+            return
+        clock.spin()
+
+        word, start, count, delay = core.next_frame()
+        speed_read.gui.set_current_word_string.emit(word)
+        if clock.next_deadline >= self.next_ui_update:
+            self.next_ui_update = clock.next_deadline + speed_read.ui_update_interval
+            speed_read.gui.set_word_slider_value.emit(start + count)
+            speed_read.gui.prepare_words.emit(core.upcoming_texts(speed_read.prepare_ahead))
+            speed_read.calc_time_remaining(start + count)
+        clock.frame_shown()
+
+        # the timer only has millisecond resolution, so it is set to fire up to a millisecond early
+        remaining = clock.advance(delay)
+        self.timer.start(max(0, int(remaining * 1000)))
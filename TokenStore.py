@@ -0,0 +1,154 @@
+import re
+from array import array
+from itertools import accumulate, compress, islice, repeat
+from operator import add
+
+# the end of a word that ends a sentence, with any closing quotes or brackets, and the space after it. '’' and '”' are
+# matched as whole UTF-8 sequences, as their bytes on their own are part of other characters.
+SENTENCE_END_PATTERN = re.compile(b'[.?!](?:[\'")\\]]|\xe2\x80[\x99\x9d])* ')
+# 0xFF never occurs in UTF-8, so it can mark sentence ends without being confused with the text
+SENTENCE_END_MARK = b'\xff '
+NOT_MARK = bytes(range(0x20)) + bytes(range(0x21, 0xFF))
+UNMARKED_TABLE = bytes.maketrans(b' ', b'\x00')
+
+
+class TokenStore:
+    def __init__(self):
+        """
+        Holds the words of a text as one contiguous UTF-8 buffer, each word followed by a space, plus an offset table
+        giving where each word starts. Indexing, slicing and len() are O(1), and the buffer is already the text with
+        its words joined by spaces, so nothing has to be joined or split again to save or size the text.
+        """
+        self.buffer = bytearray()
+        # offsets[i] is where word i starts; the final entry is the end of the buffer
+        self.offsets = array('I', [0])
+        # indices of the words that start a sentence, and of the words that start a chapter
+        self.sentences = array('I', [0])
+        self.chapters = array('I')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Gets a single word, or for a slice, the words in that range joined by spaces
+        :param int|slice index: Index of the word, or a slice of word indices
+        :return: The word or words
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('TokenStore slices cannot have a step')
+            if stop <= start:
+                return ''
+            return str(self.buffer[self.offsets[start]:self.offsets[stop] - 1], 'utf-8')
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('word index out of range')
+        return str(self.buffer[self.offsets[index]:self.offsets[index + 1] - 1], 'utf-8')
+
+    def extend(self, words):
+        """
+        Method to add words to the end of the store
+        :param list words: The words to add. Words must not contain spaces.
+        :return:
+        """
+        if len(words) == 0:
+            return
+        if not isinstance(self.buffer, bytearray):
+            self.make_writable()
+
+        base = len(self)
+
+        encoded = ' '.join(words).encode('utf-8')
+
+        # each word takes up its encoded length plus the space after it
+        steps = map(add, map(len, encoded.split(b' ')), repeat(1))
+
+        self.buffer.extend(encoded)
+        self.buffer.extend(b' ')
+        self.offsets.extend(islice(accumulate(steps, initial=self.offsets[-1]), 1, None))
+
+        # reduce each word to one flag byte saying whether it ends a sentence; a sentence starts after each flagged word
+        marks = SENTENCE_END_PATTERN.sub(SENTENCE_END_MARK, encoded + b' ').translate(None, NOT_MARK)
+        sentence_ends = marks.replace(SENTENCE_END_MARK, b'\x01').translate(UNMARKED_TABLE)
+        self.sentences.extend(compress(range(base + 1, base + len(words) + 1), sentence_ends))
+
+    def extend_store(self, other):
+        """
+        Method to add the words of another store to the end of this one, such as words tokenized on another thread,
+        without splitting and joining them again. Whether the first of them starts a sentence is taken from this store,
+        as it is when adding words with extend(); a chapter marked at the start of the other store is kept.
+        :param TokenStore other: The words to add
+        :return:
+        """
+        if len(other) == 0:
+            return
+        if not isinstance(self.buffer, bytearray):
+            self.make_writable()
+
+        base = len(self)
+        self.buffer.extend(other.buffer)
+        self.offsets.extend(map(add, islice(other.offsets, 1, None), repeat(self.offsets[-1])))
+        self.sentences.extend(map(add, islice(other.sentences, 1, None), repeat(base)))
+        if len(other.chapters) > 0 and other.chapters[0] == 0 and len(self.chapters) > 0 and self.chapters[-1] == base:
+            # already marked here
+            self.chapters.extend(map(add, islice(other.chapters, 1, None), repeat(base)))
+        else:
+            self.chapters.extend(map(add, other.chapters, repeat(base)))
+
+    def mark_chapter(self):
+        """
+        Method to record that the next word added begins a new chapter
+        :return:
+        """
+        if len(self.chapters) == 0 or self.chapters[-1] != len(self):
+            if not isinstance(self.buffer, bytearray):
+                self.make_writable()
+            self.chapters.append(len(self))
+
+    def make_writable(self):
+        """
+        Method to copy a store that is backed by a read-only, memory-mapped file into memory so that it can be added to
+        :return:
+        """
+        self.buffer = bytearray(self.buffer)
+        for name in ('offsets', 'sentences', 'chapters'):
+            writable = array('I')
+            # the mapped tables are memoryviews cast to 'I', which frombytes() only takes as plain bytes
+            writable.frombytes(memoryview(getattr(self, name)).cast('B'))
+            setattr(self, name, writable)
+
+    def raw(self, start=0, stop=None):
+        """
+        Method to get the encoded bytes of a range of words, each followed by a space, for passes that can work on the
+        buffer without decoding it
+        :param int start: Index of the first word
+        :param int stop: Index after the last word, defaulting to the end of the store
+        :return: The words' bytes
+        """
+        start, stop, step = slice(start, stop).indices(len(self))
+        if stop <= start:
+            return b''
+        return bytes(self.buffer[self.offsets[start]:self.offsets[stop]])
+
+    def words(self, start=0, stop=None):
+        """
+        Method to get a range of words as a list, for passes that need to look at every word
+        :param int start: Index of the first word
+        :param int stop: Index after the last word, defaulting to the end of the store
+        :return: List of words
+        """
+        start, stop, step = slice(start, stop).indices(len(self))
+        if stop <= start:
+            return []
+        return self[start:stop].split(' ')
+
+    def get_text(self):
+        """
+        Method to get the whole text
+        :return: The words of the store, separated by spaces
+        """
+        return str(self.buffer[:-1], 'utf-8')
@@ -0,0 +1,57 @@
+# bump whenever the way text is cleaned and split into words changes, so that cached documents are imported again
+TOKENIZER_VERSION = 1
+# number of characters of a text that are tokenized at once
+CHUNK_SIZE = 65536
+
+
+class Tokenizer:
+    def __init__(self, token_store):
+        """
+        Cleans text and splits it into words, adding them straight to a token store. Text can be fed in any number of
+        chunks, split anywhere, and produces the same words as the whole text would: em dashes and hyphens end the
+        word they are in, and any run of whitespace separates words.
+        :param TokenStore token_store: Where to put the words
+        """
+        self.token_store = token_store
+        # the end of the last chunk, if it stopped partway through a word
+        self.carry = ''
+
+    def feed(self, chunk):
+        """
+        Method to tokenize the next chunk of text. Any word at the end of the chunk that may continue in the next
+        chunk is held back until the next call to feed() or close().
+        :param str chunk: The next piece of text
+        :return:
+        """
+        if len(chunk) == 0:
+            return
+
+        text = self.carry + chunk.replace('\u2014', '-').replace('-', '- ')
+        words = text.split()
+        if len(words) > 0 and not text[-1].isspace():
+            self.carry = words.pop()
+        else:
+            self.carry = ''
+        self.token_store.extend(words)
+
+    def close(self):
+        """
+        Method to finish tokenizing, adding the word held back from the last chunk
+        :return:
+        """
+        if len(self.carry) > 0:
+            self.token_store.extend([self.carry])
+            self.carry = ''
+
+
+def tokenize(text, token_store):
+    """
+    Function to tokenize a whole text that is already in memory, a chunk at a time
+    :param str text: The text
+    :param TokenStore token_store: Where to put the words
+    :return:
+    """
+    tokenizer = Tokenizer(token_store)
+    for start in range(0, len(text), CHUNK_SIZE):
+        tokenizer.feed(text[start:start + CHUNK_SIZE])
+    tokenizer.close()
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QEvent, QPointF, QSize
+from PyQt5.QtGui import QColor, QPainter, QStaticText, QTransform
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+
+# number of prepared words kept
+STATIC_TEXT_CACHE_SIZE = 512
+
+
+class WordDisplay(QWidget):
+    def __init__(self, text=''):
+        """
+        Implements QWidget to show the word(s) being read. Unlike a QLabel, changing the word never changes the
+        widget's size hint, so the layout it sits in is never invalidated during playback; the widget simply repaints
+        itself, drawing from an LRU cache of QStaticText whose glyph layout has already been worked out. Words that
+        are about to be shown can be laid out ahead of time with prepare().
+        :param str text: Text to show to begin with
+        """
+        super().__init__()
+        self.text_ = text
+        self.background = QColor('white')
+        self.foreground = QColor('black')
+        self.cache = OrderedDict()
+
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # every pixel is painted here, so Qt doesn't need to paint anything underneath first
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def sizeHint(self):
+        """
+        Overrides sizeHint to give the same size whatever the text, so that a new word never relays out the window
+        :return: QSize
+        """
+        return QSize(400, 200)
+
+    def text(self):
+        """
+        Method to get the text shown
+        :return: The word(s) being shown
+        """
+        return self.text_
+
+    def setText(self, text):
+        """
+        Method to change the text shown
+        :param str text: The word(s) to show
+        :return:
+        """
+        if text != self.text_:
+            self.text_ = text
+            self.update()
+
+    def set_colors(self, background, foreground):
+        """
+        Method to set the colors of the reading area
+        :param str background: Background color, as a color name or #RRGGBB
+        :param str foreground: Text color, as a color name or #RRGGBB
+        :return:
+        """
+        self.background = QColor(background)
+        self.foreground = QColor(foreground)
+        self.update()
+
+    def prepare(self, texts):
+        """
+        Method to lay out texts that will be shown soon, so that showing them only has to draw them
+        :param list texts: The texts of the coming frames
+        :return:
+        """
+        for text in texts:
+            self.static_text(text)
+
+    def static_text(self, text):
+        """
+        Method to get the laid out form of a text, from the cache if it's there
+        :param str text: The text
+        :return: QStaticText prepared for the current font
+        """
+        static_text = self.cache.get(text)
+        if static_text is not None:
+            self.cache.move_to_end(text)
+            return static_text
+
+        static_text = QStaticText(text)
+        static_text.setTextFormat(Qt.PlainText)
+        static_text.setPerformanceHint(QStaticText.AggressiveCaching)
+        static_text.prepare(QTransform(), self.font())
+        self.cache[text] = static_text
+        if len(self.cache) > STATIC_TEXT_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return static_text
+
+    def changeEvent(self, evt):
+        """
+        Overrides changeEvent to throw away texts laid out for the old font when the font changes
+        :param QEvent evt:
+        :return:
+        """
+        if evt.type() == QEvent.FontChange:
+            self.cache.clear()
+        super().changeEvent(evt)
+
+    def paintEvent(self, evt):
+        """
+        Overrides paintEvent to draw the background and the current text centered in the widget
+        :param QPaintEvent evt:
+        :return:
+        """
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.background)
+        if len(self.text_) > 0:
+            static_text = self.static_text(self.text_)
+            size = static_text.size()
+            painter.setFont(self.font())
+            painter.setPen(self.foreground)
+            painter.drawStaticText(
+                QPointF((self.width() - size.width()) / 2, (self.height() - size.height()) / 2),
+                static_text
+            )
+        painter.end()
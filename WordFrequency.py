@@ -0,0 +1,58 @@
+import os
+from functools import lru_cache
+from itertools import repeat
+
+# English word forms, most common first, with how often each occurs, from wordfreq's English word list; see the file's
+# header for where it comes from and its license
+WORD_LIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'word_frequency.txt')
+# how long a word takes to take in, relative to an average word, by how common it is: the lowest Zipf frequency (log10
+# of occurrences per billion words) of each band, most common first, and the weight of the words in it. A word that
+# isn't in the list at all is rarer than any of them.
+FREQUENCY_BANDS = ((5.5, 0.8), (5.0, 0.85), (4.5, 0.9), (4.0, 0.95), (3.5, 1.0), (3.0, 1.05))
+RARE_WEIGHT = 1.15
+# punctuation dropped from words before they are looked up: ASCII, and then typographic marks that take more than one
+# byte
+LOOKUP_DELETE_CHARACTERS = b'!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~'
+LOOKUP_DELETE_MARKS = tuple(mark.encode('utf-8') for mark in '\u2018\u2019\u201C\u201D\u00AB\u00BB\u2026\u2013\u2014')
+
+
+def lookup_keys(words):
+    """
+    Function to turn encoded words into the keys they are looked up by: without punctuation, and with ASCII letters,
+    the only letters in the word list, in lower case
+    :param bytes words: UTF-8 encoded words, separated by single spaces
+    :return: List of keys, one for each word
+    """
+    for mark in LOOKUP_DELETE_MARKS:
+        if mark in words:
+            words = words.replace(mark, b'')
+    return words.translate(None, LOOKUP_DELETE_CHARACTERS).lower().split(b' ')
+
+
+@lru_cache(maxsize=None)
+def word_weights():
+    """
+    Function to read the word list and weigh each word by the band its frequency falls in. The list is read the first
+    time it is needed, so the program starts without it when adaptive pacing is off. The words in the list are
+    already in the form of lookup keys.
+    :return: Dictionary of key -> weight, so that weighing a word is one dictionary lookup
+    """
+    with open(WORD_LIST_FILE, 'rb') as file:
+        fields = b''.join(line for line in file if not line.startswith(b'#')).split()
+    words = fields[0::2]
+    frequencies = fields[1::2]
+    # only a few hundred different frequencies occur, so each is put in its band once rather than once per word
+    band_weights = {
+        frequency: next((weight for lowest, weight in FREQUENCY_BANDS if float(frequency) >= lowest), RARE_WEIGHT)
+        for frequency in set(frequencies)
+    }
+    return dict(zip(words, map(band_weights.get, frequencies)))
+
+
+def frequency_weights(words):
+    """
+    Function to weigh words by how common they are
+    :param bytes words: UTF-8 encoded words, each followed by a space, as from TokenStore.raw()
+    :return: Iterator of the words' weights
+    """
+    return map(word_weights().get, lookup_keys(words[:-1]), repeat(RARE_WEIGHT))
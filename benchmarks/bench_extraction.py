@@ -0,0 +1,72 @@
+"""
+Benchmark for EPUB text extraction. Builds a synthetic 2,000 page book in memory and times the old regex extraction
+against TextExtraction.extract_book_text, and against streaming the same documents through HtmlTextParser, as
+TextStream does for HTML files.
+
+Usage: python benchmarks/bench_extraction.py [pages]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import make_chapters
+from TextExtraction import HtmlTextParser, extract_book_text
+
+
+def regex_extraction(contents):
+    """
+    Function reproducing the extraction loop GUI.load_text used before TextExtraction
+    :param list contents: The raw chapter documents
+    :return: The book's text
+    """
+    all_text = ''
+    for content in contents:
+        text = content.decode('utf-8')
+        text = text.replace('</p>', ' ')
+        text = re.sub('<.*?>', '', text)
+        text = re.sub('\n+', ' ', text)
+        if len(text.strip()) > 0:
+            all_text += ' ' + text.strip()
+    return all_text
+
+
+def parser_extraction(contents):
+    """
+    Function extracting the text of each document with HtmlTextParser
+    :param list contents: The raw chapter documents
+    :return: The book's text
+    """
+    texts = []
+    for content in contents:
+        parser = HtmlTextParser()
+        parser.feed(content.decode('utf-8'))
+        parser.close()
+        texts.append(parser.get_text().strip())
+    return '\n'.join(texts)
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    contents = make_chapters(pages)
+
+    results = {
+        'pages': pages,
+        'documents': len(contents),
+        'megabytes': round(sum(len(content) for content in contents) / 1e6, 2),
+        'regex_seconds': round(time_call(regex_extraction, contents), 4),
+        'extract_book_text_seconds': round(time_call(extract_book_text, contents), 4),
+        'html_parser_seconds': round(time_call(parser_extraction, contents), 4)
+    }
+
+    print(json.dumps(results, indent=2))
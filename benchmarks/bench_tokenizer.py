@@ -0,0 +1,65 @@
+"""
+Benchmark for tokenizing. Generates a text of the given size, times the regular expression pipeline that
+SpeedRead.change_text used to run against Tokenizer feeding a TokenStore, and checks that both produce exactly the
+same words.
+
+Usage: python benchmarks/bench_tokenizer.py [megabytes]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import make_text
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+
+def regex_tokenize(text):
+    """
+    Function reproducing the cleaning and splitting SpeedRead.change_text did before Tokenizer
+    :param str text: The text
+    :return: List of words
+    """
+    text = re.sub("—", "- ", text)
+    text = re.sub("-", "- ", text)
+    text = re.sub("\\s+", " ", text)
+    text = re.sub("\r", "", text)
+    text = re.sub("\n", "", text)
+    text = re.sub("\t", "", text)
+    return text.strip().split(' ')
+
+
+if __name__ == '__main__':
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    text = make_text(megabytes)
+
+    start = time.perf_counter()
+    expected = regex_tokenize(text)
+    regex_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    token_store = TokenStore()
+    tokenize(text, token_store)
+    tokenizer_seconds = time.perf_counter() - start
+
+    identical = len(expected) == len(token_store)
+    step = 65536
+    for i in range(0, len(expected), step):
+        if not identical:
+            break
+        identical = expected[i:i + step] == token_store.words(i, i + step)
+
+    print(json.dumps({
+        'megabytes': round(len(text) / 1e6, 2),
+        'words': len(expected),
+        'regex_seconds': round(regex_seconds, 3),
+        'tokenizer_seconds': round(tokenizer_seconds, 3),
+        'speedup': round(regex_seconds / tokenizer_seconds, 2),
+        'identical': identical
+    }, indent=2))
+    sys.exit(0 if identical else 1)
@@ -0,0 +1,84 @@
+"""
+Generated texts and books for the benchmarks, so that every benchmark measures the same inputs without any files
+being checked in.
+"""
+
+import random
+
+from ebooklib import epub
+
+VOCABULARY = [
+    'the', 'of', 'and', 'a', 'to', 'in', 'is', 'you', 'that', 'it', 'reading', 'faster', 'comprehension', 'words,',
+    'sentence.', 'question?', 'exclamation!', 'semi;colon', 'well-known', 'twenty-one', 'dash—like', 'so—',
+    '—then', '--', 'café', 'naïve', '“quoted”', 'end.”', 'tab\tbed', 'line\nbreak',
+    'carriage\r\nreturn', '  spaced  ', 'non breaking', 'x'
+]
+WORDS_PER_PAGE = 300
+PAGES_PER_CHAPTER = 10
+PARAGRAPH = ('<p>It was the best of times, it was the worst of times&mdash;it was the age of wisdom; it was the '
+             'age of <i>foolishness</i>, it was the epoch of belief.<br/>It was the season of Light &amp; '
+             'Darkness!</p>\n')
+PARAGRAPH_WORDS = 43
+
+
+def make_text(megabytes):
+    """
+    Function to generate a text of roughly the given size out of a vocabulary that exercises every cleaning rule
+    :param float megabytes: Size of the text, in millions of characters
+    :return: The text
+    """
+    random.seed(1)
+    words = random.choices(VOCABULARY, k=int(megabytes * 1e6 / 7))
+    return ' '.join(words)
+
+
+def make_words(num_words):
+    """
+    Function to generate a text with a given number of words
+    :param int num_words: Number of words
+    :return: The text
+    """
+    random.seed(1)
+    return ' '.join(random.choices([word for word in VOCABULARY if word.split() == [word]], k=num_words))
+
+
+def make_chapters(pages):
+    """
+    Function to build the raw chapter documents of a synthetic book
+    :param int pages: Number of pages in the book
+    :return: List of chapter documents, as bytes
+    """
+    paragraphs_per_chapter = PAGES_PER_CHAPTER * WORDS_PER_PAGE // PARAGRAPH_WORDS
+    chapter = (
+        '<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Chapter'
+        '</title><style>p { margin: 0; }</style></head><body><h1>Chapter</h1>\n' +
+        PARAGRAPH * paragraphs_per_chapter +
+        '<script>var page = 0;</script></body></html>'
+    ).encode('utf-8')
+    return [chapter] * max(1, pages // PAGES_PER_CHAPTER)
+
+
+def write_epub(file_name, pages):
+    """
+    Function to write a synthetic book as an EPUB file
+    :param str file_name: Where to write the book
+    :param int pages: Number of pages in the book
+    :return:
+    """
+    book = epub.EpubBook()
+    book.set_identifier('speedread-benchmark-' + str(pages))
+    book.set_title('Benchmark ' + str(pages))
+    book.set_language('en')
+
+    chapters = []
+    for i, content in enumerate(make_chapters(pages)):
+        chapter = epub.EpubHtml(title='Chapter ' + str(i + 1), file_name='chapter' + str(i + 1) + '.xhtml')
+        chapter.content = content
+        book.add_item(chapter)
+        chapters.append(chapter)
+
+    book.toc = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = chapters
+    epub.write_epub(file_name, book)
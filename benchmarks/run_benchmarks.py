@@ -0,0 +1,468 @@
+"""
+Headless benchmark suite for the reading pipeline. Runs the real GUI and SpeedRead objects on Qt's offscreen platform
+against generated fixtures of several sizes, in a throwaway data directory, and prints the results as JSON so that
+runs on different versions can be compared.
+
+Covered:
+    epub_import             importing an EPUB through GUI.import_epub, both the first time and from the document store
+    change_text             tokenizing a pasted text with SpeedRead.change_text
+    reading_plan            planning a whole text with SpeedRead.set_reading_options, with and without adaptive pacing:
+                            how long the gui thread is held, and how long until the plan builder's plan is swapped in
+    settings                SpeedRead.save_settings followed by load_settings, apply_settings and restoring the
+                            document in the background with restore_document
+    progress                bytes and write calls per position saved, writing the progress journal with
+                            SpeedRead.journal_progress, its compactions included, against saving every setting with
+                            SpeedRead.save_settings, which is the only way position was saved before the journal
+    time_remaining          SpeedRead.calc_time_remaining
+    word_slider_drag        dragging the word slider across the whole text, with each move handled the way the gui
+                            handles a mouse move: scrubbing, which previews where the slider is at most once every
+                            GUI.scrub_interval and moves there when it is let go, against moving to every word the
+                            slider passes, as the slider did before
+    word_display            showing a word with GUI.set_word and letting the gui thread lay out and paint it
+    frame_timing            for each playback engine, lateness of each frame both when its word was sent and when it
+                            was painted, the reading speed actually achieved, the gui thread's event handling time and
+                            the process's CPU time
+    chunked_frame_timing    the same, above 1,000 wpm in chunk mode
+
+Usage: python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QAbstractEventDispatcher, QEventLoop, QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QApplication
+
+import SpeeDReaD
+from fixtures import make_text, make_words, write_epub
+from GUI import GUI
+from ProgressJournal import COMPACT_RECORDS, RECORD
+from ReadingPlan import INITIAL_SLOWDOWN
+from SpeeDReaD import SpeedRead
+
+EPUB_PAGES = {'small': 20, 'medium': 200, 'large': 2000}
+TEXT_MEGABYTES = {'small': 0.1, 'medium': 1, 'large': 10}
+FRAME_TIMING_WPM = (200, 600, 999)
+ENGINES = ('thread', 'timer')
+# speeds above 1,000 wpm are run in chunk mode, with this many words per frame
+CHUNKED_WPM = (1200, 2000)
+CHUNK_WORDS = 4
+# frames shown at each speed; the first len(INITIAL_SLOWDOWN) are slowed down on purpose and are left out of the
+# achieved speed
+FRAME_TIMING_FRAMES = 100
+QUICK_FRAME_TIMING_FRAMES = 40
+
+
+def io_counters():
+    """
+    Function to read how much the process has written so far, counting every write call whether or not it has reached
+    the disk yet. Only Linux keeps these counts.
+    :return: Tuple of bytes written and write calls made, or None where they aren't available
+    """
+    try:
+        with open('/proc/self/io') as file:
+            counters = dict(line.split(': ') for line in file.read().splitlines())
+    except OSError:
+        return None
+    return int(counters['wchar']), int(counters['syscw'])
+
+
+def summarize(values):
+    """
+    Function to reduce a list of timings to the figures worth comparing between runs
+    :param list values: Timings, in seconds
+    :return: Dictionary of statistics, in milliseconds
+    """
+    values = sorted(values)
+    if len(values) == 0:
+        return {}
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.mean(values) * 1000, 4),
+        'median_ms': round(statistics.median(values) * 1000, 4),
+        'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 4),
+        'p99_ms': round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 4),
+        'max_ms': round(values[-1] * 1000, 4)
+    }
+
+
+class Benchmarks:
+    def __init__(self, quick=False):
+        """
+        Sets up a GUI and SpeedRead wired together the same way Startup does, without entering the event loop, so
+        that each benchmark can drive them directly.
+        :param bool quick: Whether to only run the small fixtures and fewer frames
+        """
+        self.quick = quick
+        self.sizes = ['small'] if quick else ['small', 'medium', 'large']
+        self.work_dir = tempfile.mkdtemp(prefix='speedread-bench-')
+        os.environ['APPDATA'] = self.work_dir
+
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        SpeeDReaD.app = self.app
+
+        self.gui = GUI()
+        self.speed_read = SpeedRead(self.gui)
+
+        SpeeDReaD.connect_signals(self.gui, self.speed_read)
+
+        self.speed_read.apply_settings()
+        self.gui.show()
+        self.app.processEvents()
+
+    def close(self):
+        self.gui.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run(self):
+        """
+        Method to run every benchmark
+        :return: Dictionary of results
+        """
+        return {
+            'epub_import': self.bench_epub_import(),
+            'change_text': self.bench_change_text(),
+            'reading_plan': self.bench_reading_plan(),
+            'settings': self.bench_settings(),
+            'progress': self.bench_progress(),
+            'time_remaining': self.bench_time_remaining(),
+            'word_slider_drag': self.bench_word_slider_drag(),
+            'word_display': self.bench_word_display(),
+            'frame_timing': {engine: self.bench_frame_timing(engine) for engine in ENGINES},
+            'chunked_frame_timing': {
+                engine: self.bench_frame_timing(engine, CHUNKED_WPM, CHUNK_WORDS) for engine in ENGINES
+            }
+        }
+
+    def import_epub(self, file_name):
+        """
+        Method to import an EPUB the way the user's import does and wait for it to finish
+        :param str file_name: Path to the EPUB file
+        :return: Seconds until the first words were ready to read, and seconds until the import finished
+        """
+        first_words = []
+        mark_ready = lambda num_words: first_words.append(time.perf_counter()) if not first_words else None
+        self.gui.reading_ready.connect(mark_ready)
+
+        start = time.perf_counter()
+        self.gui.import_epub(file_name)
+        while not self.gui.importer.isFinished():
+            self.app.processEvents()
+            self.gui.importer.wait(1)
+        # deliver the signals the importer queued before it finished
+        self.app.processEvents()
+        end = time.perf_counter()
+
+        self.gui.reading_ready.disconnect(mark_ready)
+        return (first_words[0] if first_words else end) - start, end - start
+
+    def set_reading_options(self, *options):
+        """
+        Method to change the reading options the way the user's menus do and wait for the new plan to be swapped in
+        :param options: The options, as passed to SpeedRead.set_reading_options
+        :return: Seconds the gui thread was held by the change, and seconds until the new plan was in use
+        """
+        start = time.perf_counter()
+        self.speed_read.set_reading_options(*options)
+        held = time.perf_counter() - start
+        while self.speed_read.plan_builder:
+            self.speed_read.plan_builder.wait(1)
+            self.app.processEvents()
+        return held, time.perf_counter() - start
+
+    def bench_epub_import(self):
+        results = {}
+        for size in self.sizes:
+            file_name = self.work_dir + '/' + size + '.epub'
+            write_epub(file_name, EPUB_PAGES[size])
+
+            self.speed_read.documents.save_sources({})
+            first_words, import_time = self.import_epub(file_name)
+            cached_first_words, cached_time = self.import_epub(file_name)
+
+            results[size] = {
+                'pages': EPUB_PAGES[size],
+                'file_megabytes': round(os.path.getsize(file_name) / 1e6, 3),
+                'words': len(self.speed_read.core.words),
+                'first_words_seconds': round(first_words, 4),
+                'import_seconds': round(import_time, 4),
+                'cached_seconds': round(cached_time, 4)
+            }
+        return results
+
+    def bench_change_text(self):
+        results = {}
+        for size in self.sizes:
+            text = make_text(TEXT_MEGABYTES[size])
+            start = time.perf_counter()
+            self.speed_read.change_text(text)
+            elapsed = time.perf_counter() - start
+            results[size] = {
+                'megabytes': TEXT_MEGABYTES[size],
+                'words': len(self.speed_read.core.words),
+                'seconds': round(elapsed, 4),
+                'words_per_second': int(len(self.speed_read.core.words) / elapsed)
+            }
+        return results
+
+    def bench_reading_plan(self):
+        results = {}
+        for size in self.sizes:
+            self.speed_read.change_text(make_text(TEXT_MEGABYTES[size]))
+            results[size] = {'words': len(self.speed_read.core.words)}
+            for adaptive_pacing in (False, True, False):
+                held, elapsed = self.set_reading_options(True, True, 1, 0, adaptive_pacing)
+                key = 'adaptive' if adaptive_pacing else 'fixed'
+                results[size][key + '_gui_seconds'] = round(held, 4)
+                results[size][key + '_seconds'] = round(elapsed, 4)
+        return results
+
+    def bench_settings(self):
+        results = {}
+        repeats = 5 if self.quick else 20
+        for size in self.sizes:
+            self.speed_read.change_text(make_text(TEXT_MEGABYTES[size]))
+
+            # the first save after the text changes also has to store the text
+            start = time.perf_counter()
+            self.speed_read.save_settings()
+            first_save = time.perf_counter() - start
+
+            saves = []
+            loads = []
+            for i in range(repeats):
+                start = time.perf_counter()
+                self.speed_read.save_settings()
+                saves.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                self.speed_read.load_settings()
+                self.speed_read.apply_settings()
+                self.speed_read.restore_document()
+                self.speed_read.document_loader.wait()
+                self.app.processEvents()
+                loads.append(time.perf_counter() - start)
+
+            results[size] = {
+                'words': len(self.speed_read.core.words),
+                'first_save_ms': round(first_save * 1000, 4),
+                'save': summarize(saves),
+                'load': summarize(loads)
+            }
+        return results
+
+    def bench_progress(self):
+        results = {}
+        # enough journaled positions to compact the journal once, or twice
+        repeats = COMPACT_RECORDS if self.quick else 2 * COMPACT_RECORDS
+        speed_read = self.speed_read
+        speed_read.change_text(make_text(TEXT_MEGABYTES['small']))
+        speed_read.save_settings()
+
+        methods = {'journal': speed_read.journal_progress, 'save_settings': speed_read.save_settings}
+        for name, save_position in methods.items():
+            timings = []
+            before = io_counters()
+            for i in range(repeats):
+                speed_read.core.current_word = i + 1
+                start = time.perf_counter()
+                save_position()
+                timings.append(time.perf_counter() - start)
+            after = io_counters()
+
+            results[name] = summarize(timings)
+            if before:
+                bytes_written = (after[0] - before[0]) / repeats
+                results[name].update({
+                    'bytes_per_update': round(bytes_written, 1),
+                    'write_calls_per_update': round((after[1] - before[1]) / repeats, 2),
+                    # against the position itself: the document's ID, the word and the speed
+                    'write_amplification': round(bytes_written / RECORD.size, 1)
+                })
+
+        if 'bytes_per_update' in results['journal']:
+            results['save_settings_to_journal_bytes'] = round(
+                results['save_settings']['bytes_per_update'] / results['journal']['bytes_per_update'], 1)
+        return results
+
+    def bench_time_remaining(self):
+        results = {}
+        repeats = 200 if self.quick else 1000
+        for size in self.sizes:
+            self.speed_read.change_text(make_text(TEXT_MEGABYTES[size]))
+            timings = []
+            for i in range(repeats):
+                self.speed_read.core.current_word = i % len(self.speed_read.core.words)
+                start = time.perf_counter()
+                self.speed_read.calc_time_remaining()
+                timings.append(time.perf_counter() - start)
+            results[size] = summarize(timings)
+            results[size]['words'] = len(self.speed_read.core.words)
+        return results
+
+    def bench_word_slider_drag(self):
+        results = {}
+        moves = 500 if self.quick else 2000
+        slider = self.gui.word_slider
+        seeks = []
+        self.gui.set_current_word_index.connect(seeks.append)
+        for size in self.sizes:
+            self.speed_read.change_text(make_text(TEXT_MEGABYTES[size]))
+            # so that the search index arriving doesn't land in the middle of a drag
+            for builder in self.speed_read.index_builders:
+                builder.wait()
+            self.app.processEvents()
+            num_words = len(self.speed_read.core.words)
+            results[size] = {'words': num_words}
+
+            for mode, scrub in (('scrub', True), ('seek_every_move', False)):
+                slider.setTracking(not scrub)
+                if not scrub:
+                    slider.sliderMoved.disconnect(self.gui.scrub_word_slider)
+                seeks.clear()
+                previews = []
+                self.gui.scrub_timer.timeout.connect(lambda: previews.append(1))
+
+                timings = []
+                start = time.perf_counter()
+                slider.setSliderDown(True)
+                for i in range(1, moves + 1):
+                    move_start = time.perf_counter()
+                    slider.setSliderPosition(1 + (num_words - 1) * i // moves)
+                    self.app.processEvents()
+                    timings.append(time.perf_counter() - move_start)
+                slider.setSliderDown(False)
+                self.app.processEvents()
+
+                self.gui.scrub_timer.timeout.disconnect()
+                self.gui.scrub_timer.timeout.connect(self.gui.show_scrub_preview)
+                if not scrub:
+                    slider.sliderMoved.connect(self.gui.scrub_word_slider)
+                results[size][mode] = {
+                    'moves': moves,
+                    'seeks': len(seeks),
+                    'previews': len(previews),
+                    'drag_seconds': round(time.perf_counter() - start, 4),
+                    'move': summarize(timings)
+                }
+
+        slider.setTracking(False)
+        self.gui.set_current_word_index.disconnect(seeks.append)
+        return results
+
+    def bench_word_display(self):
+        results = {}
+        words = make_words(200 if self.quick else 1000).split(' ')
+        saved_font = self.gui.current_font
+        for font_size in (36, 96):
+            self.gui.word_display.setFont(QFont(saved_font.family(), font_size))
+            timings = []
+            for word in words:
+                start = time.perf_counter()
+                self.gui.set_word(word)
+                self.app.processEvents()
+                timings.append(time.perf_counter() - start)
+            results[str(font_size)] = summarize(timings)
+        self.gui.word_display.setFont(saved_font)
+        return results
+
+    def bench_frame_timing(self, engine, speeds=FRAME_TIMING_WPM, chunk_words=1):
+        frames = QUICK_FRAME_TIMING_FRAMES if self.quick else FRAME_TIMING_FRAMES
+        self.speed_read.change_text(make_words(frames * 10 * chunk_words))
+        # no pauses, so every frame should last exactly 60 * chunk_words / wpm seconds
+        self.set_reading_options(False, False, chunk_words, 0)
+        self.speed_read.set_engine(engine)
+
+        results = {}
+        for wpm in speeds:
+            self.speed_read.set_reading_speed(wpm)
+            self.speed_read.core.current_word = 0
+            self.speed_read.core.frame_stats.clear()
+
+            # play the way the program does, with the gui thread in its event loop, adding up the time between the loop
+            # waking up and going back to sleep
+            event_loop_time = [0.0, None]
+
+            def awake():
+                event_loop_time[1] = time.perf_counter()
+
+            def about_to_block():
+                if event_loop_time[1] is not None:
+                    event_loop_time[0] += time.perf_counter() - event_loop_time[1]
+                    event_loop_time[1] = None
+
+            def check_done():
+                if self.speed_read.core.frame_stats.count >= frames:
+                    loop.quit()
+
+            loop = QEventLoop()
+            poll_timer = QTimer()
+            poll_timer.timeout.connect(check_done)
+            poll_timer.start(50)
+            dispatcher = QAbstractEventDispatcher.instance()
+            dispatcher.awake.connect(awake)
+            dispatcher.aboutToBlock.connect(about_to_block)
+
+            cpu_start = time.process_time()
+            self.speed_read.start_reading()
+            loop.exec()
+            cpu_time = time.process_time() - cpu_start
+
+            dispatcher.awake.disconnect(awake)
+            dispatcher.aboutToBlock.disconnect(about_to_block)
+            poll_timer.stop()
+            self.speed_read.stop()
+            self.speed_read.wait()
+            self.app.processEvents()
+
+            timed_frames = self.speed_read.core.frame_stats.frames()[len(INITIAL_SLOWDOWN):]
+            painted = [frame[1] for frame in timed_frames if frame[1]]
+            achieved_wpm = None
+            if len(painted) > 1:
+                achieved_wpm = round(60 * (len(painted) - 1) * chunk_words / (painted[-1] - painted[0]), 2)
+
+            results[str(wpm)] = {
+                'frames': len(self.speed_read.core.clock.lateness),
+                'lateness': summarize(list(self.speed_read.core.clock.lateness)),
+                'achieved_wpm': achieved_wpm,
+                'event_loop_ms_per_frame': round(event_loop_time[0] * 1000 / frames, 4),
+                'cpu_ms_per_frame': round(cpu_time * 1000 / frames, 4),
+                'painted': self.speed_read.core.frame_stats.summary()
+            }
+        return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the SpeeDReaD reading pipeline.')
+    parser.add_argument('--quick', action='store_true', help='only run the small fixtures')
+    parser.add_argument('--output', help='write the results to this file instead of printing them')
+    args = parser.parse_args()
+
+    benchmarks = Benchmarks(quick=args.quick)
+    try:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'quick': args.quick,
+            'results': benchmarks.run()
+        }
+    finally:
+        benchmarks.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
@@ -0,0 +1,68 @@
+import os
+
+from DocumentStore import DocumentStore
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+
+def make_store(text):
+    token_store = TokenStore()
+    token_store.mark_chapter()
+    tokenize(text, token_store)
+    return token_store
+
+
+def test_stored_document_opens_with_its_tables(tmp_path):
+    documents = DocumentStore(str(tmp_path))
+    token_store = make_store('One two. Three four five.')
+    document_id = documents.save(token_store)
+    assert documents.save(token_store) == document_id
+
+    stored = documents.load(document_id)
+    assert stored.words() == token_store.words()
+    assert list(stored.sentences) == list(token_store.sentences)
+    assert list(stored.chapters) == [0]
+    assert documents.verify(document_id)
+    assert documents.load('0' * 40) is None
+
+
+def test_document_whose_sizes_dont_add_up_is_removed(tmp_path):
+    documents = DocumentStore(str(tmp_path))
+    document_id = documents.save(make_store('One two. Three four five.'))
+    path = documents.document_path(document_id)
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) - 1)
+
+    assert documents.load(document_id) is None
+    assert not os.path.exists(path)
+
+
+def test_damaged_document_is_found_by_verify_not_load(tmp_path):
+    documents = DocumentStore(str(tmp_path))
+    document_id = documents.save(make_store('One two. Three four five.'))
+    documents.add_source('key', document_id)
+    path = documents.document_path(document_id)
+    with open(path, 'r+b') as file:
+        file.seek(-3, os.SEEK_END)
+        file.write(b'X')
+
+    # opening reads only the header and the ends of the tables
+    assert documents.load(document_id).words()[-1] == 'fivX.'
+    assert documents.find_source('key') is None
+    assert not os.path.exists(path)
+    assert documents.load_sources() == {}
+
+
+def test_plan_is_kept_for_its_options(tmp_path):
+    documents = DocumentStore(str(tmp_path))
+    token_store = make_store('One two. Three four five.')
+    document_id = documents.save(token_store)
+    options = (True, True, 1, 0, True)
+    assert documents.stored_plan(document_id, token_store, options) is None
+
+    plan = documents.load_plan(document_id, token_store, options)
+    stored = documents.stored_plan(document_id, token_store, options)
+    assert stored.options() == options
+    assert stored.frames == plan.frames
+    assert list(stored.elapsed) == list(plan.elapsed)
+    assert documents.stored_plan(document_id, token_store, (False, False, 1, 0, False)) is None
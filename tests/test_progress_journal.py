@@ -0,0 +1,100 @@
+import os
+
+import ProgressJournal
+from ProgressJournal import ProgressJournal as Journal, RECORD_SIZE, replace_file
+
+DOCUMENT = '0123456789abcdef0123456789abcdef01234567'
+OTHER_DOCUMENT = 'fedcba9876543210fedcba9876543210fedcba98'
+
+
+def open_journal(tmp_path):
+    return Journal(str(tmp_path / 'progress.journal'))
+
+
+def test_records_are_replayed_in_order(tmp_path):
+    journal = open_journal(tmp_path)
+    assert journal.replay() == []
+    assert journal.record(DOCUMENT, 10, 300)
+    assert journal.record(OTHER_DOCUMENT, 0, 250)
+    assert journal.record(DOCUMENT, 20, 300)
+    assert len(journal) == 3
+    assert journal.replay() == [(DOCUMENT, 10, 300), (OTHER_DOCUMENT, 0, 250), (DOCUMENT, 20, 300)]
+    journal.close()
+
+
+def test_repeated_record_is_not_written(tmp_path):
+    journal = open_journal(tmp_path)
+    assert journal.record(DOCUMENT, 10, 300)
+    assert not journal.record(DOCUMENT, 10, 300)
+    assert journal.record(DOCUMENT, 10, 350)
+    assert len(journal) == 2
+    assert os.path.getsize(journal.path) == 2 * RECORD_SIZE
+    journal.close()
+
+
+def test_reopened_journal_counts_its_records(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record(DOCUMENT, 10, 300)
+    journal.record(DOCUMENT, 20, 300)
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert len(journal) == 2
+    journal.record(DOCUMENT, 30, 300)
+    assert journal.replay()[-1] == (DOCUMENT, 30, 300)
+    journal.close()
+
+
+def test_torn_record_is_left_off(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record(DOCUMENT, 10, 300)
+    journal.record(DOCUMENT, 20, 300)
+    journal.close()
+    with open(journal.path, 'r+b') as file:
+        file.truncate(2 * RECORD_SIZE - 5)
+
+    assert open_journal(tmp_path).replay() == [(DOCUMENT, 10, 300)]
+
+
+def test_replay_stops_at_a_corrupted_record(tmp_path):
+    journal = open_journal(tmp_path)
+    for word in (10, 20, 30):
+        journal.record(DOCUMENT, word, 300)
+    journal.close()
+    with open(journal.path, 'r+b') as file:
+        file.seek(RECORD_SIZE + 21)
+        file.write(b'\xff')
+
+    assert open_journal(tmp_path).replay() == [(DOCUMENT, 10, 300)]
+
+
+def test_clear_empties_the_journal(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.record(DOCUMENT, 10, 300)
+    journal.clear()
+    assert len(journal) == 0
+    assert journal.replay() == []
+    # the last record is forgotten too, so the same position is written again
+    assert journal.record(DOCUMENT, 10, 300)
+    assert journal.replay() == [(DOCUMENT, 10, 300)]
+    journal.close()
+
+
+def test_journal_is_full_after_compact_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(ProgressJournal, 'COMPACT_RECORDS', 4)
+    journal = open_journal(tmp_path)
+    for word in range(3):
+        journal.record(DOCUMENT, word, 300)
+    assert not journal.full()
+    journal.record(DOCUMENT, 3, 300)
+    assert journal.full()
+    journal.close()
+
+
+def test_replace_file(tmp_path):
+    path = str(tmp_path / 'settings.ini')
+    replace_file(path, b'old')
+    replace_file(path, b'new')
+    with open(path, 'rb') as file:
+        assert file.read() == b'new'
+    assert not os.path.exists(path + '.tmp')
@@ -0,0 +1,122 @@
+import pytest
+
+from ReadingCore import ReadingCore, duration_text
+from ReadingPlan import INITIAL_SLOWDOWN, PUNCTUATION_WEIGHT
+
+# chapters start at words 0 and 10, and sentences at 0, 4, 7, 10 and 16
+CHAPTERS = [
+    'One two three four. Five six seven. Eight nine ten.',
+    'Eleven twelve thirteen fourteen fifteen sixteen. Seventeen eighteen nineteen twenty'
+]
+
+
+def make_core(wpm=60):
+    core = ReadingCore()
+    core.set_text(CHAPTERS[0])
+    core.append_text(CHAPTERS[1])
+    core.set_speed(wpm)
+    return core
+
+
+def test_text_layout():
+    core = make_core()
+    assert len(core) == 20
+    assert list(core.words.sentences) == [0, 4, 7, 10, 16]
+    assert list(core.words.chapters) == [0, 10]
+
+
+@pytest.mark.parametrize('current_word, step, expected', [
+    (0, -1, 0),
+    (5, -1, 4),
+    (4, -1, 0),
+    (4, -2, 0),
+    (8, -2, 4),
+    (0, 1, 4),
+    (4, 1, 7),
+    (5, 2, 10),
+    (16, 1, 16),
+    (19, 1, 19),
+])
+def test_sentence_boundary(current_word, step, expected):
+    core = make_core()
+    core.seek(current_word)
+    assert core.sentence_boundary(step) == expected
+
+
+@pytest.mark.parametrize('current_word, step, expected', [
+    (0, -1, 0),
+    (3, -1, 0),
+    (10, -1, 0),
+    (12, -1, 10),
+    (3, 1, 10),
+    (12, 1, 12),
+])
+def test_chapter_boundary(current_word, step, expected):
+    core = make_core()
+    core.seek(current_word)
+    assert core.chapter_boundary(step) == expected
+
+
+def test_boundary_without_a_text():
+    core = ReadingCore()
+    assert core.sentence_boundary(1) == 0
+    assert core.chapter_boundary(-1) == 0
+
+
+def test_time_remaining_counts_every_frame_and_the_easing_up_to_speed():
+    core = make_core(wpm=60)
+    # a second a word, plus the easing up to speed over the first frames after starting
+    easing = sum(factor - 1 for factor in INITIAL_SLOWDOWN)
+    assert core.time_remaining() == pytest.approx((20 + easing) / 60)
+    assert core.time_remaining(15) == pytest.approx((5 + sum(factor - 1 for factor in INITIAL_SLOWDOWN[:5])) / 60)
+    assert core.time_remaining(0, stop_word=10) == pytest.approx((10 + sum(
+        factor - 1 for factor in INITIAL_SLOWDOWN[:10])) / 60)
+    # the last word, with the first and slowest frame of the easing
+    assert core.time_remaining(19) == pytest.approx(INITIAL_SLOWDOWN[0] / 60)
+
+
+def test_time_remaining_follows_speed_and_pauses():
+    core = make_core(wpm=120)
+    before = core.time_remaining(10)
+    core.set_options(False, True)
+    # the one sentence end from word 10 on, word 15, is the sixth frame after starting there, and at half a second a
+    # word its pause is eased up to speed along with it
+    pause = (PUNCTUATION_WEIGHT - 1) * INITIAL_SLOWDOWN[5] * 0.5 / 60
+    assert core.time_remaining(10) == pytest.approx(before + pause)
+    core.set_speed(60)
+    assert core.time_remaining(10) == pytest.approx((before + pause) * 2)
+
+
+def test_time_remaining_while_reading_only_counts_the_easing_still_to_come():
+    core = make_core(wpm=60)
+    core.start()
+    for i in range(5):
+        core.next_frame()
+    assert core.time_remaining(5) == pytest.approx((15 + sum(factor - 1 for factor in INITIAL_SLOWDOWN[5:20])) / 60)
+    assert core.stop() == 5
+    assert core.time_remaining(5) == pytest.approx((15 + sum(factor - 1 for factor in INITIAL_SLOWDOWN[:15])) / 60)
+
+
+def test_chapter_time_remaining():
+    core = make_core(wpm=60)
+    core.seek(5)
+    assert core.chapter_time_remaining() == core.time_remaining(5, 10)
+    assert core.chapter_time_remaining(12) == core.time_remaining(12)
+
+
+def test_duration_text():
+    assert duration_text(0.5) == 'less than 1 minute'
+    assert duration_text(61.5) == '1:01:30'
+
+
+def test_replaced_plan_is_followed_from_the_next_word():
+    core = make_core(wpm=6000)
+    core.start()
+    for i in range(5):
+        core.next_frame()
+    plan = core.plan.copy()
+    plan.set_options(False, False, 3, 0, False, word_num=0)
+    core.replace_plan(plan)
+    word, start, count, delay = core.next_frame()
+    assert (start, count) == (6, 3)
+
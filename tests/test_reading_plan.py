@@ -0,0 +1,218 @@
+import itertools
+import random
+from itertools import accumulate
+
+import pytest
+
+from ReadingPlan import ReadingPlan, PUNCTUATION_WEIGHT, PLAN_CHUNK_SIZE
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+VOCABULARY = [
+    'a', 'I', 'an', 'to', 'of', 'the', 'and', 'cat', 'was', 'people', 'years', 'reading', 'quickly,', 'end.',
+    'really?', 'stop!', 'wait;', 'clause:', '"quoted."', 'über', 'naïve', 'café,', '日本語', 'x，',
+    'extraordinarily', 'incomprehensibilities', 'well-', 'known', '(aside)', 'it’s'
+]
+OPTIONS = list(itertools.product((False, True), (False, True), (1, 3), (0, 12), (False, True)))
+
+
+def make_words(num_words, seed=1, chapters=3):
+    rng = random.Random(seed)
+    token_store = TokenStore()
+    for chapter in range(chapters):
+        token_store.mark_chapter()
+        tokenize(' '.join(rng.choice(VOCABULARY) for i in range(num_words // chapters)), token_store)
+    return token_store
+
+
+def make_plan(words, options):
+    plan = ReadingPlan()
+    plan.set_options(*options)
+    plan.set_words(words)
+    return plan
+
+
+def check_frames(plan, words):
+    starts, counts, weights = plan.frames
+    assert len(starts) == len(counts) == len(weights) == len(plan)
+    assert starts[0] == 0
+    for i in range(len(plan) - 1):
+        assert starts[i] + counts[i] == starts[i + 1]
+    assert starts[-1] + counts[-1] == len(words)
+    assert list(plan.elapsed) == pytest.approx(list(accumulate(weights, initial=0.0)))
+
+
+def assert_same_plan(plan, expected, compare_weights=True):
+    assert list(plan.frames[0]) == list(expected.frames[0])
+    assert list(plan.frames[1]) == list(expected.frames[1])
+    if compare_weights:
+        assert list(plan.frames[2]) == pytest.approx(list(expected.frames[2]), rel=1e-5)
+        assert list(plan.elapsed) == pytest.approx(list(expected.elapsed), rel=1e-5)
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_frames_cover_every_word_once(options):
+    words = make_words(3000)
+    plan = make_plan(words, options)
+    check_frames(plan, words)
+
+    group_words, punctuation_pause, chunk_words, chunk_characters = options[:4]
+    assert max(plan.frames[1]) <= max(chunk_words, 2 if group_words else 1)
+    if chunk_words > 1 and chunk_characters:
+        for start, count in zip(plan.frames[0], plan.frames[1]):
+            if count > 1:
+                assert len(words[start:start + count]) <= chunk_characters
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_adding_words_in_pieces_plans_the_same_frames(options):
+    whole = make_words(2000)
+    expected = make_plan(whole, options)
+
+    text = whole.get_text().split(' ')
+    words = TokenStore()
+    words.mark_chapter()
+    plan = make_plan(words, options)
+    for start in range(0, len(text), 350):
+        num_words = len(words)
+        piece = TokenStore()
+        tokenize(' '.join(text[start:start + 350]), piece)
+        words.extend_store(piece)
+        plan.rebuild_from(max(num_words - 1, 0))
+        check_frames(plan, words)
+
+    # adaptive pacing shares out the time of just the frames it replans, so only the frames themselves match
+    assert_same_plan(plan, expected, compare_weights=not options[4])
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_rebuilding_from_any_word_matches_planning_from_the_start(options):
+    words = make_words(2000)
+    expected = make_plan(words, options)
+    for word_num in (0, 1, 999, 1998, 1999):
+        plan = make_plan(words, options)
+        plan.rebuild_from(word_num)
+        check_frames(plan, words)
+        # adaptive pacing shares out the time of just the frames it replans, so only the frames themselves match
+        assert_same_plan(plan, expected, compare_weights=not options[4])
+
+
+def test_changing_options_keeps_the_frames_already_read():
+    words = make_words(2000)
+    plan = make_plan(words, (False, False, 1, 0, False))
+    plan.set_options(True, True, 3, 0, False, word_num=1000)
+    check_frames(plan, words)
+    assert list(plan.frames[0][:1000]) == list(range(1000))
+    assert list(plan.frames[2][:1000]) == [1.0] * 1000
+    assert set(plan.frames[1][1000:-1]) == {3}
+
+
+def test_words_shown_singly():
+    words = make_words(300)
+    plan = make_plan(words, (False, False, 1, 0, False))
+    assert list(plan.frames[0]) == list(range(300))
+    assert set(plan.frames[1]) == {1}
+    assert set(plan.frames[2]) == {1.0}
+    assert plan.duration(10, 20) == 10
+
+
+def test_punctuation_pause_weighs_punctuated_words():
+    words = TokenStore()
+    words.extend(['one,', 'two', 'three.', 'four，', 'five'])
+    plan = make_plan(words, (False, True, 1, 0, False))
+    assert list(plan.frames[2]) == [PUNCTUATION_WEIGHT, 1, PUNCTUATION_WEIGHT, PUNCTUATION_WEIGHT, 1]
+
+
+def test_small_words_are_combined_with_the_word_after_them():
+    words = TokenStore()
+    words.extend(['to', 'be', 'or', 'not', 'reading', 'the', 'end.'])
+    plan = make_plan(words, (True, True, 1, 0, False))
+    assert list(plan.frames[0]) == [0, 2, 4, 5]
+    assert list(plan.frames[1]) == [2, 2, 1, 2]
+    assert list(plan.frames[2]) == [1, 1, 1, PUNCTUATION_WEIGHT]
+
+
+def test_chunks_stay_up_for_a_word_delay_per_word():
+    words = TokenStore()
+    words.extend(['one', 'two', 'three.', 'four', 'five', 'six', 'seven'])
+    plan = make_plan(words, (False, True, 3, 0, False))
+    assert list(plan.frames[0]) == [0, 3, 6]
+    assert list(plan.frames[1]) == [3, 3, 1]
+    assert list(plan.frames[2]) == [3 + PUNCTUATION_WEIGHT - 1, 3, 1]
+
+
+def test_chunks_are_cut_short_by_the_character_limit():
+    words = TokenStore()
+    words.extend(['a', 'bb', 'ccc', 'incomprehensibilities', 'dd', 'e'])
+    plan = make_plan(words, (False, False, 3, 8, False))
+    assert list(plan.frames[0]) == [0, 3, 4]
+    assert list(plan.frames[1]) == [3, 1, 2]
+
+
+def test_adaptive_pacing_keeps_the_average_speed():
+    words = make_words(3000)
+    for options in ((False, False, 1, 0), (True, True, 1, 0), (False, True, 3, 12)):
+        fixed = make_plan(words, options + (False,))
+        paced = make_plan(words, options + (True,))
+        assert paced.elapsed[-1] == pytest.approx(fixed.elapsed[-1], rel=1e-4)
+
+
+def test_adaptive_pacing_weighs_rare_and_long_words_more():
+    words = TokenStore()
+    words.extend(['the', 'people', 'incomprehensibilities', 'the'])
+    weights = make_plan(words, (False, False, 1, 0, True)).frames[2]
+    assert weights[0] < weights[1] < weights[2]
+    assert weights[0] == weights[3]
+
+
+def test_plans_longer_than_a_planning_chunk():
+    words = make_words(PLAN_CHUNK_SIZE + 500, chapters=1)
+    for options in OPTIONS[::5]:
+        check_frames(make_plan(words, options), words)
+
+
+def test_copy_is_independent():
+    words = make_words(500)
+    plan = make_plan(words, (False, False, 1, 0, False))
+    copy = plan.copy()
+    copy.set_options(True, True, 3, 0, True, word_num=100)
+    assert copy.options() == (True, True, 3, 0, True)
+    assert plan.options() == (False, False, 1, 0, False)
+    assert list(plan.frames[0]) == list(range(len(words)))
+    check_frames(copy, words)
+
+
+def test_frame_lookups():
+    words = make_words(300)
+    plan = make_plan(words, (False, False, 3, 0, False))
+    assert plan.frame_at(0) == 0
+    assert plan.frame_at(5) == 1
+    assert plan.frame_after(0, 7) == 2
+    assert plan.frame_after(0, 1000) == len(plan)
+    text, start, count, weight = plan.frame(1)
+    assert (text, start, count, weight) == (words[3:6], 3, 3, 3)
+    assert plan.frame_texts(len(plan) - 1, 5) == [words[297:300]]
+
+
+def test_only_whole_punctuation_marks_end_a_clause():
+    # 'ом' and '一' end in bytes that are also part of the UTF-8 encodings of '，', '’' and '”'
+    words = TokenStore()
+    words.extend(['жзом', 'жзот', '一一', '三三', 'жзом，', 'жзом,’'])
+    weights = make_plan(words, (False, True, 1, 0, True)).frames[2]
+    assert weights[0] == weights[1]
+    assert weights[2] == weights[3]
+    assert weights[4] > weights[0]
+    assert weights[5] == weights[4]
+
+
+def test_words_left_unplanned_are_planned_from_the_start():
+    words = make_words(2000)
+    expected = make_plan(words, (True, True, 3, 0, False))
+    plan = ReadingPlan()
+    plan.set_options(True, True, 1, 0, False)
+    plan.set_words(words, plan_now=False)
+    assert len(plan) == 0
+    # even when the reader has moved on into the text
+    plan.set_options(True, True, 3, 0, False, word_num=1000)
+    check_frames(plan, words)
+    assert_same_plan(plan, expected)
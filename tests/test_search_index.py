@@ -0,0 +1,93 @@
+import pytest
+
+from SearchIndex import SearchIndex, DocumentSearch, search_terms
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+TEXT = ('The cat sat. "The Cat," she said, “sat on the mat”—then the cat-flap swung. '
+        'Nothing else; the end. The cat sat again.')
+
+
+def make_index(text=TEXT):
+    token_store = TokenStore()
+    tokenize(text, token_store)
+    index = SearchIndex()
+    index.build(token_store)
+    return token_store, index
+
+
+def test_search_terms_drop_case_and_surrounding_punctuation():
+    assert search_terms('"The Cat," “sat… it’s') == ['the', 'cat', 'sat', 'it’s']
+
+
+def test_single_word():
+    words, index = make_index()
+    count, hits = index.search('cat')
+    assert count == 4
+    assert [words[hit] for hit in hits] == ['cat', 'Cat,"', 'cat-', 'cat']
+
+
+def test_phrase_words_must_follow_one_another():
+    words, index = make_index()
+    count, hits = index.search('the cat sat')
+    assert count == 2
+    assert hits == [0, len(words) - 4]
+    assert index.search('cat the') == (0, [])
+
+
+def test_case_and_punctuation_are_ignored():
+    words, index = make_index()
+    assert index.search('THE CAT,')[0] == index.search('the cat')[0] == 4
+    assert index.search('sat on the mat')[0] == 1
+
+
+def test_hyphenated_query_is_split_like_the_text():
+    words, index = make_index()
+    count, hits = index.search('cat-flap')
+    assert count == 1
+    assert words[hits[0]:hits[0] + 2] == 'cat- flap'
+
+
+def test_missing_and_empty_queries():
+    words, index = make_index()
+    assert index.search('dog') == (0, [])
+    assert index.search('') == (0, [])
+    assert index.search('... ,') == (0, [])
+
+
+def test_hits_are_limited_but_all_counted():
+    words, index = make_index(' '.join(['word'] * 1000))
+    count, hits = index.search('word', limit=10)
+    assert count == 1000
+    assert hits == list(range(10))
+
+
+def test_index_rebuilt_from_its_tables_searches_the_same():
+    words, index = make_index()
+    terms = sorted(index.terms)
+    counts = [len(index.positions(term)) for term in terms]
+    copy = SearchIndex()
+    copy.set_tables(terms, counts, index.postings, index.num_words)
+    for query in ('the cat', 'sat', 'nothing else', 'mat'):
+        assert copy.search(query) == index.search(query)
+
+
+def test_document_search_waits_for_its_index():
+    words, index = make_index()
+    document_search = DocumentSearch()
+    document_search.set_index(words, None)
+    assert not document_search.ready()
+    document_search.set_index(words, index)
+    assert document_search.ready()
+    assert document_search.search('the end') == index.search('the end')
+
+
+@pytest.mark.parametrize('query', ['the', 'cat sat', 'end'])
+def test_hits_match_a_scan_of_the_words(query):
+    words, index = make_index()
+    terms = search_terms(words.get_text())
+    query_terms = search_terms(query)
+    expected = [
+        i for i in range(len(terms) - len(query_terms) + 1) if terms[i:i + len(query_terms)] == query_terms
+    ]
+    assert index.search(query) == (len(expected), expected)
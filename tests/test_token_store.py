@@ -0,0 +1,109 @@
+from array import array
+
+import pytest
+
+from DocumentStore import DocumentStore
+from Tokenizer import tokenize
+from TokenStore import TokenStore
+
+
+def make_store(text, chapter=True):
+    token_store = TokenStore()
+    if chapter:
+        token_store.mark_chapter()
+    tokenize(text, token_store)
+    return token_store
+
+
+def test_indexing_and_slicing():
+    token_store = TokenStore()
+    token_store.extend(['alpha', 'béta', 'gamma'])
+    assert len(token_store) == 3
+    assert token_store[0] == 'alpha'
+    assert token_store[1] == 'béta'
+    assert token_store[-1] == 'gamma'
+    assert token_store[0:2] == 'alpha béta'
+    assert token_store[2:1] == ''
+    assert token_store.get_text() == 'alpha béta gamma'
+    with pytest.raises(IndexError):
+        token_store[3]
+    with pytest.raises(ValueError):
+        token_store[0:3:2]
+
+
+def test_offsets_point_at_each_word_in_the_buffer():
+    token_store = TokenStore()
+    token_store.extend(['a', 'bé', 'c'])
+    assert bytes(token_store.buffer) == 'a bé c '.encode('utf-8')
+    assert list(token_store.offsets) == [0, 2, 6, 8]
+    assert token_store.words(1) == ['bé', 'c']
+
+
+def test_raw_bytes():
+    token_store = TokenStore()
+    token_store.extend(['a', 'bé', 'c'])
+    assert token_store.raw(1, 2) == 'bé '.encode('utf-8')
+    assert token_store.raw() == 'a bé c '.encode('utf-8')
+    assert token_store.raw(2, 2) == b''
+
+
+def test_sentences_start_after_sentence_ends():
+    token_store = make_store('He said "Stop." Then (really?) it ended. Ok! Fine')
+    # sentences start at the first word and after each word ending in ., ? or !, closing quotes and brackets included
+    assert list(token_store.sentences) == [0, 3, 5, 7, 8]
+
+
+def test_only_whole_closing_quotes_follow_a_sentence_end():
+    # '♝' is encoded as E2 99 9D, bytes that are also part of the UTF-8 encodings of '’' and '”'
+    token_store = make_store('Move Bb5.♝ now. “Check.” Mate')
+    assert list(token_store.sentences) == [0, 3, 4]
+
+
+def test_chapters_are_marked_once():
+    token_store = make_store('one two')
+    token_store.mark_chapter()
+    token_store.mark_chapter()
+    tokenize('three', token_store)
+    assert list(token_store.chapters) == [0, 2]
+
+
+def test_words_added_in_several_calls_match_one_call():
+    whole = make_store('One. Two three. Four five six.')
+    token_store = TokenStore()
+    token_store.mark_chapter()
+    token_store.extend(['One.', 'Two'])
+    token_store.extend(['three.', 'Four', 'five', 'six.'])
+    assert bytes(token_store.buffer) == bytes(whole.buffer)
+    assert list(token_store.offsets) == list(whole.offsets)
+    assert list(token_store.sentences) == list(whole.sentences)
+
+
+@pytest.mark.parametrize('split', [1, 2, 3, 4, 5])
+def test_extend_store_matches_tokenizing_the_whole_text(split):
+    words = 'One. Two three. Four five "six." Seven'.split(' ')
+    whole = make_store(' '.join(words))
+    token_store = make_store(' '.join(words[:split]))
+    token_store.extend_store(make_store(' '.join(words[split:]), chapter=False))
+    assert bytes(token_store.buffer) == bytes(whole.buffer)
+    assert list(token_store.offsets) == list(whole.offsets)
+    assert list(token_store.sentences) == list(whole.sentences)
+    assert list(token_store.chapters) == [0]
+
+
+def test_extend_store_keeps_a_chapter_started_by_the_other_store():
+    token_store = make_store('one two')
+    token_store.extend_store(make_store('three four'))
+    assert list(token_store.chapters) == [0, 2]
+
+
+def test_stored_document_is_copied_before_adding_words(tmp_path):
+    documents = DocumentStore(str(tmp_path))
+    token_store = documents.load(documents.save(make_store('one two.')))
+    assert isinstance(token_store.offsets, memoryview)
+    token_store.extend(['three'])
+    token_store.mark_chapter()
+    assert isinstance(token_store.buffer, bytearray)
+    assert isinstance(token_store.offsets, array)
+    assert token_store.words() == ['one', 'two.', 'three']
+    assert list(token_store.sentences) == [0, 2]
+    assert list(token_store.chapters) == [0, 3]
@@ -0,0 +1,49 @@
+import pytest
+
+from Tokenizer import Tokenizer, tokenize
+from TokenStore import TokenStore
+
+TEXT = 'He said "Stop." Then—well-known (really?)  words!\n\tEnd'
+WORDS = ['He', 'said', '"Stop."', 'Then-', 'well-', 'known', '(really?)', 'words!', 'End']
+
+
+def tokenized(text):
+    token_store = TokenStore()
+    tokenize(text, token_store)
+    return token_store
+
+
+def test_splits_on_whitespace_dashes_and_hyphens():
+    assert tokenized(TEXT).words() == WORDS
+
+
+def test_empty_and_blank_text_have_no_words():
+    assert len(tokenized('')) == 0
+    assert len(tokenized(' \n\t ')) == 0
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 11])
+def test_chunks_split_anywhere_give_the_same_words(size):
+    token_store = TokenStore()
+    tokenizer = Tokenizer(token_store)
+    for start in range(0, len(TEXT), size):
+        tokenizer.feed(TEXT[start:start + size])
+    tokenizer.close()
+    assert token_store.words() == WORDS
+
+
+def test_word_at_the_end_of_a_chunk_is_held_back_until_close():
+    token_store = TokenStore()
+    tokenizer = Tokenizer(token_store)
+    tokenizer.feed('one two')
+    assert token_store.words() == ['one']
+    tokenizer.feed('three ')
+    assert token_store.words() == ['one', 'twothree']
+    tokenizer.feed('four')
+    tokenizer.close()
+    assert token_store.words() == ['one', 'twothree', 'four']
+
+
+def test_non_ascii_words_are_kept_whole():
+    assert tokenized('café naïve über—straße').words() == [
+        'café', 'naïve', 'über-', 'straße']